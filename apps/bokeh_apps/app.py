@@ -0,0 +1,241 @@
+"""This module contains the Bokeh app. Run it with
+
+    bokeh serve apps/bokeh_apps/app.py
+
+The data is read once per server process by the dataset module and shared by the sessions. The
+charts have a fixed number of rows, so a new filter or question only patches the values that
+changed. The answers table grows by streaming the next rows. An update therefore sends a small
+delta to the browser instead of a new ColumnDataSource.
+"""
+from typing import Dict, List
+
+import pandas as pd
+from bokeh.io import curdoc
+from bokeh.layouts import column, row
+from bokeh.models import (
+    Button,
+    ColumnDataSource,
+    DataTable,
+    Div,
+    MultiChoice,
+    Select,
+    TableColumn,
+)
+from bokeh.plotting import figure
+
+import awesome_analytics_apps.stack_overflow as stack_overflow
+import dataset
+
+PREVIEW_COLUMNS = [
+    "Respondent",
+    "Country",
+    "DevType",
+    "YearsCode",
+    "LanguageWorkedWith",
+    "ConvertedComp",
+]
+PREVIEW_ROWS = 50
+
+
+def patch(source: ColumnDataSource, data: Dict[str, List]) -> int:
+    """Patches the values of the source that differ from the data.
+
+    The data must have the same columns and number of rows as the source
+
+    Arguments:
+        source {ColumnDataSource} -- The source to update
+        data {Dict[str, List]} -- The new values per column
+
+    Returns:
+        int -- The number of values patched
+    """
+    patches = {}
+    for name, values in data.items():
+        changed = [
+            (position, value)
+            for position, (old, value) in enumerate(zip(source.data[name], values))
+            if old != value
+        ]
+        if changed:
+            patches[name] = changed
+    if patches:
+        source.patch(patches)
+    return sum(len(changed) for changed in patches.values())
+
+
+def _answer_data(counts: pd.DataFrame) -> Dict[str, List]:
+    # The chart always has TOP_ANSWERS bars. Missing answers are empty bars
+    counts = counts.reindex(range(dataset.TOP_ANSWERS))
+    return {
+        "Rank": list(range(dataset.TOP_ANSWERS, 0, -1)),
+        "Answer": counts["Answer"].fillna("").astype(str).tolist(),
+        "Respondents": counts["Respondents"].fillna(0).astype(int).tolist(),
+    }
+
+
+def _country_data(counts: pd.DataFrame) -> Dict[str, List]:
+    return {
+        "Country": counts["Country"].tolist(),
+        "Respondents": counts["Respondents"].astype(int).tolist(),
+    }
+
+
+def _preview_data(answers: pd.DataFrame) -> Dict[str, List]:
+    return {
+        name: answers[name].fillna("").astype(str).tolist() for name in PREVIEW_COLUMNS
+    }
+
+
+class StackOverflowExplorer:
+    """The components of one session. Only the selection of respondents and the Bokeh models
+    belong to the session. The data is shared via the dataset module"""
+
+    def __init__(self):
+        self.selection = None
+
+        self.filters = {
+            name: MultiChoice(
+                title=name,
+                options=[str(value) for value in dataset.index().values(name)],
+            )
+            for name in dataset.FILTER_COLUMNS
+        }
+        for widget in self.filters.values():
+            widget.on_change("value", self.on_filter)
+        self.selected = Div()
+
+        questions = dataset.questions()
+        self.question = Select(
+            title="Question",
+            value="MainBranch" if "MainBranch" in questions else questions[0],
+            options=questions,
+        )
+        self.question.on_change("value", self.on_question)
+        self.answer_source = ColumnDataSource(
+            _answer_data(dataset.answer_counts(self.question.value))
+        )
+        self.country_source = ColumnDataSource(
+            _country_data(dataset.respondents_per_country())
+        )
+        answers = dataset.answers(None, 0, PREVIEW_ROWS)
+        self.preview_source = ColumnDataSource(_preview_data(answers))
+        self.previewed = len(answers)
+        self.more = Button(label=f"Show {PREVIEW_ROWS} more", width=200)
+        self.more.on_click(self.on_more)
+
+        self.layout = row(
+            column(
+                Div(text="<h2>Filter Respondents</h2>"),
+                *self.filters.values(),
+                self.selected,
+            ),
+            column(
+                Div(text=self._introduction()),
+                self.question,
+                self._answer_chart(),
+                Div(text="<h3>Answers 2019</h3>"),
+                DataTable(
+                    source=self.preview_source,
+                    columns=[
+                        TableColumn(field=name, title=name) for name in PREVIEW_COLUMNS
+                    ],
+                    width=900,
+                    height=400,
+                ),
+                self.more,
+                self._country_chart(),
+            ),
+        )
+        self._update_selected()
+
+    @staticmethod
+    def _introduction() -> str:
+        return f"""<h1>Awesome Analytics Apps in Bokeh</h1>
+<h2>Stack Overflow 2019</h2>
+<p>You will be analyzing and providing insights from the
+<a href="{stack_overflow.SURVEY_2019_URL}" target="_blank">Stack Overflow 2019 survey</a>.
+Data: <a href="{stack_overflow.DATA_URL}" target="_blank">{stack_overflow.DATA_URL}</a></p>"""
+
+    def _answer_chart(self):
+        chart = figure(
+            title="Answers", height=400, width=900, tools="", toolbar_location=None
+        )
+        chart.hbar(y="Rank", right="Respondents", height=0.8, source=self.answer_source)
+        chart.text(
+            x=0,
+            y="Rank",
+            text="Answer",
+            text_baseline="middle",
+            text_font_size="9pt",
+            source=self.answer_source,
+        )
+        chart.yaxis.visible = False
+        chart.ygrid.visible = False
+        return chart
+
+    def _country_chart(self):
+        chart = figure(
+            title="Respondents per Country",
+            y_range=list(self.country_source.data["Country"]),
+            height=1000,
+            width=900,
+            tools="",
+            toolbar_location=None,
+        )
+        chart.hbar(
+            y="Country", right="Respondents", height=0.8, source=self.country_source
+        )
+        return chart
+
+    def _update_selected(self):
+        if self.selection is None:
+            selected = dataset.index().size
+        else:
+            selected = len(self.selection)
+        self.selected.text = (
+            f"{selected} of {dataset.index().size} respondents selected"
+        )
+
+    def on_filter(self, attr, old, new):  # pylint: disable=unused-argument
+        """Selects the respondents and patches the charts"""
+        self.selection = dataset.select(
+            {name: widget.value for name, widget in self.filters.items()}
+        )
+        self._update_selected()
+        patch(
+            self.answer_source,
+            _answer_data(dataset.answer_counts(self.question.value, self.selection)),
+        )
+        patch(
+            self.country_source,
+            _country_data(dataset.respondents_per_country(self.selection)),
+        )
+        # Other respondents are shown, so the table starts over with one page
+        answers = dataset.answers(self.selection, 0, PREVIEW_ROWS)
+        self.preview_source.data = _preview_data(answers)
+        self.previewed = len(answers)
+
+    def on_question(self, attr, old, new):  # pylint: disable=unused-argument
+        """Patches the answer chart"""
+        patch(
+            self.answer_source, _answer_data(dataset.answer_counts(new, self.selection))
+        )
+
+    def on_more(self):
+        """Streams the next rows to the answers table"""
+        answers = dataset.answers(
+            self.selection, self.previewed, self.previewed + PREVIEW_ROWS
+        )
+        if len(answers):
+            self.preview_source.stream(_preview_data(answers))
+        self.previewed += len(answers)
+
+
+def main():
+    """This is the main function of the app. It's run once per session"""
+    document = curdoc()
+    document.title = "Awesome Analytics Apps in Bokeh"
+    document.add_root(StackOverflowExplorer().layout)
+
+
+main()
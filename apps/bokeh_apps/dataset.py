@@ -0,0 +1,172 @@
+"""This module holds the Stack Overflow data shared by all sessions of the Bokeh app.
+
+The Bokeh server runs app.py once per session, but this module is only imported once per server
+process. So the results are read, indexed and aggregated once and every session reuses them. The
+index and the answer counts come from the disk cache of the package, so they are shared with the
+other apps and server processes. A session only keeps its selection of respondents, which is a
+Bitmap of one bit per respondent.
+"""
+import functools
+import threading
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import awesome_analytics_apps.stack_overflow as stack_overflow
+from awesome_analytics_apps import aggregation
+from awesome_analytics_apps.bitmap_index import MAX_CARDINALITY, Bitmap, BitmapIndex
+from awesome_analytics_apps.column_store import ColumnStore
+
+FILTER_COLUMNS = stack_overflow.FILTER_COLUMNS_2019
+TOP_COUNTRIES = 50
+TOP_ANSWERS = 15
+
+_LOCK = threading.RLock()
+
+
+def _shared(function):
+    """Computes the value once per server process. Sessions started at the same time wait for
+    the first one instead of computing it again"""
+    value = []
+
+    @functools.wraps(function)
+    def wrapper():
+        if not value:
+            with _LOCK:
+                if not value:
+                    value.append(function())
+        return value[0]
+
+    return wrapper
+
+
+@_shared
+def results() -> pd.DataFrame:
+    """The Stack Overflow Developer Survey Results 2019"""
+    return stack_overflow.read_results()
+
+
+@_shared
+def schema() -> pd.DataFrame:
+    """The questions of the Stack Overflow Developer Survey 2019"""
+    return stack_overflow.read_schema()
+
+
+@_shared
+def index() -> BitmapIndex:
+    """A BitmapIndex of the FILTER_COLUMNS of the results"""
+    return stack_overflow.get_bitmap_index()
+
+
+@_shared
+def store() -> ColumnStore:
+    """The ColumnStore of the results. The answers of a selection are counted from its codes"""
+    return stack_overflow.get_column_store()
+
+
+@_shared
+def _answers_per_question() -> Dict[str, pd.Series]:
+    return stack_overflow.get_answers_per_question()
+
+
+@_shared
+def questions() -> List[str]:
+    """The text questions with at most MAX_CARDINALITY answer options, in the order of the
+    schema"""
+    counts = _answers_per_question()
+    return [
+        column
+        for column in schema()["Column"]
+        if column in counts
+        and not pd.api.types.is_numeric_dtype(results()[column])
+        and len(counts[column]) <= MAX_CARDINALITY
+    ]
+
+
+@_shared
+def countries() -> List[str]:
+    """The TOP_COUNTRIES countries with the most respondents, fewest first"""
+    return index().values("Country")[:TOP_COUNTRIES][::-1]
+
+
+def select(filters) -> Optional[Bitmap]:
+    """The respondents matching the filters
+
+    Arguments:
+        filters {Mapping[str, Iterable[str]]} -- A list of values per column
+
+    Returns:
+        Optional[Bitmap] -- The respondents or None if no values are selected
+    """
+    if not any(filters.values()):
+        return None
+    return index().match(filters)
+
+
+def _count(column: str, values: List, selection: Optional[Bitmap]) -> List[int]:
+    bitmaps = [index().eq(column, value) for value in values]
+    if selection is None:
+        return [len(bitmap) for bitmap in bitmaps]
+    return [len(bitmap & selection) for bitmap in bitmaps]
+
+
+def answer_counts(question: str, selection: Optional[Bitmap] = None) -> pd.DataFrame:
+    """The TOP_ANSWERS most common answers to the question.
+
+    For a multi-select question the answer options are counted. The counts of all respondents
+    are precomputed and shared by the sessions. The counts of a selection are computed from the
+    codes of the selected respondents in the store()
+
+    Arguments:
+        question {str} -- One of the questions()
+
+    Keyword Arguments:
+        selection {Optional[Bitmap]} -- The respondents to count. If None all (default: {None})
+
+    Returns:
+        pd.DataFrame -- A DataFrame with the columns Answer and Respondents, largest first
+    """
+    if selection is None:
+        counts = _answers_per_question()[question]
+    else:
+        counts = aggregation.answer_counts(
+            store(), question, rows=selection.to_positions()
+        )
+    counts = counts.head(TOP_ANSWERS)
+    return pd.DataFrame({"Answer": counts.index, "Respondents": counts.values})
+
+
+def respondents_per_country(selection: Optional[Bitmap] = None) -> pd.DataFrame:
+    """The number of respondents of the countries()
+
+    The countries are the same for any selection, so a chart can be updated by patching the
+    counts only
+
+    Keyword Arguments:
+        selection {Optional[Bitmap]} -- The respondents to count. If None all (default: {None})
+
+    Returns:
+        pd.DataFrame -- A DataFrame with the columns Country and Respondents
+    """
+    return pd.DataFrame(
+        {
+            "Country": countries(),
+            "Respondents": _count("Country", countries(), selection),
+        }
+    )
+
+
+def answers(selection: Optional[Bitmap], start: int, stop: int) -> pd.DataFrame:
+    """The answers of the selected respondents from start to stop
+
+    Arguments:
+        selection {Optional[Bitmap]} -- The respondents. If None all
+        start {int} -- The first of the selected respondents
+        stop {int} -- The respondent after the last
+
+    Returns:
+        pd.DataFrame -- The answers
+    """
+    if selection is None:
+        return results().iloc[start:stop]
+    return results().iloc[selection.to_positions()[start:stop]]
@@ -0,0 +1,174 @@
+"""This module contains the Dash app. Run it with
+
+    python apps/dash_apps/app.py
+
+or with several workers
+
+    gunicorn --workers 4 --chdir apps/dash_apps app:server
+
+The results are read once per worker when the module is imported. The outputs of the callbacks
+are memoized in a file system cache shared by the workers, so an answer computed by one worker is
+reused by the others. Interactions that only change the presentation, like the number of countries
+shown, run in the browser as clientside callbacks in assets/clientside.js.
+"""
+import pathlib
+from typing import Dict, List, Optional
+
+import dash
+import dash_core_components as dcc
+import dash_html_components as html
+import dash_table
+from dash.dependencies import ClientsideFunction, Input, Output
+from flask_caching import Cache
+
+import awesome_analytics_apps.stack_overflow as stack_overflow
+
+CACHE_DIRECTORY = (
+    stack_overflow.LOCAL_ROOT
+    / stack_overflow.DATA_STACK_OVERFLOW
+    / stack_overflow.CACHE
+    / "dash"
+)
+CACHE_TIMEOUT = 0  # The entries never expire. The dataset version is part of the keys
+CACHE_THRESHOLD = 1000
+ROWS_OPTIONS = [10, 50, 500]
+
+app = dash.Dash(__name__, assets_folder=str(pathlib.Path(__file__).parent / "assets"))
+app.title = "Awesome Analytics Apps in Dash"
+# gunicorn serves the Flask server of the app
+server = app.server
+cache = Cache(
+    server,
+    config={
+        "CACHE_TYPE": "FileSystemCache",
+        "CACHE_DIR": str(CACHE_DIRECTORY),
+        "CACHE_DEFAULT_TIMEOUT": CACHE_TIMEOUT,
+        "CACHE_THRESHOLD": CACHE_THRESHOLD,
+    },
+)
+
+SCHEMA = stack_overflow.read_schema()
+RESULTS = stack_overflow.read_results()
+# Memoized outputs of an older version of the survey data are never hit
+VERSION = stack_overflow.dataset_fingerprint()
+
+
+@cache.memoize()
+def respondents_per_country(version: str) -> Dict[str, List]:
+    """The number of respondents of all countries sorted descending.
+
+    The clientside callback slices the top countries from these counts
+
+    Arguments:
+        version {str} -- The version of the dataset
+
+    Returns:
+        Dict[str, List] -- The Country and Respondent columns
+    """
+    # pylint: disable=unused-argument
+    distribution = stack_overflow.respondents_per_country(RESULTS, top=len(RESULTS))
+    distribution = distribution.iloc[::-1]
+    return {
+        "Country": distribution["Country"].tolist(),
+        "Respondent": distribution["Respondent"].tolist(),
+    }
+
+
+@cache.memoize()
+def preview_answers(
+    version: str, questions: Optional[tuple], rows: int
+) -> Dict[str, List]:
+    """The first rows of the answers to the questions as DataTable data and columns
+
+    Arguments:
+        version {str} -- The version of the dataset
+        questions {Optional[tuple]} -- The questions to show. If None or empty all
+        rows {int} -- The number of rows
+
+    Returns:
+        Dict[str, List] -- The data and columns of a DataTable
+    """
+    # pylint: disable=unused-argument
+    answers = stack_overflow.preview_answers(RESULTS, list(questions or []), rows)
+    return {
+        "data": answers.to_dict("records"),
+        "columns": [{"name": column, "id": column} for column in answers.columns],
+    }
+
+
+def layout():
+    """The layout of the app"""
+    return html.Div(
+        [
+            html.H1("Awesome Analytics Apps in Dash"),
+            html.H2("Stack Overflow 2019"),
+            dcc.Markdown(
+                f"""You will be analyzing and providing insights from the
+[Stack Overflow 2019 survey]({stack_overflow.SURVEY_2019_URL}).
+
+Data: [{stack_overflow.DATA_URL}]({stack_overflow.DATA_URL})"""
+            ),
+            html.H3("Stack Overflow Questions 2019"),
+            dash_table.DataTable(
+                id="questions-table",
+                data=SCHEMA.to_dict("records"),
+                columns=[{"name": column, "id": column} for column in SCHEMA.columns],
+                page_size=10,
+                style_cell={"textAlign": "left", "whiteSpace": "normal"},
+            ),
+            html.H3("Answers 2019"),
+            dcc.Dropdown(
+                id="questions",
+                options=[
+                    {"label": question, "value": question}
+                    for question in sorted(SCHEMA["Column"].unique())
+                ],
+                multi=True,
+                placeholder="Select questions",
+            ),
+            dcc.RadioItems(
+                id="rows",
+                options=[{"label": str(rows), "value": rows} for rows in ROWS_OPTIONS],
+                value=ROWS_OPTIONS[0],
+                labelStyle={"display": "inline-block", "margin-right": "10px"},
+            ),
+            dash_table.DataTable(id="answers-table", style_table={"overflowX": "auto"}),
+            html.H3("Respondents per Country"),
+            dcc.Slider(
+                id="top-countries",
+                min=5,
+                max=100,
+                step=5,
+                value=50,
+                marks={top: str(top) for top in range(10, 101, 10)},
+            ),
+            dcc.Store(id="country-counts", data=respondents_per_country(VERSION)),
+            dcc.Graph(id="country-chart"),
+        ],
+        style={"margin": "20px"},
+    )
+
+
+app.layout = layout
+
+
+@app.callback(
+    [Output("answers-table", "data"), Output("answers-table", "columns")],
+    [Input("questions", "value"), Input("rows", "value")],
+)
+def update_answers(questions, rows):
+    """Updates the answers table with the selected questions and number of rows"""
+    answers = preview_answers(VERSION, tuple(questions or ()), rows)
+    return answers["data"], answers["columns"]
+
+
+# The counts are sent once with the layout. Changing the number of countries only slices them
+app.clientside_callback(
+    ClientsideFunction(namespace="charts", function_name="topCountries"),
+    Output("country-chart", "figure"),
+    [Input("country-counts", "data"), Input("top-countries", "value")],
+)
+
+
+if __name__ == "__main__":
+    app.run_server(debug=True)
@@ -0,0 +1,29 @@
+// Clientside callbacks of the Dash app. They run in the browser without a round trip to the server
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    charts: {
+        // A horizontal bar chart of the top countries. The counts are sorted descending
+        topCountries: function (counts, top) {
+            if (!counts) {
+                return window.dash_clientside.no_update;
+            }
+            var countries = counts.Country.slice(0, top).reverse();
+            var respondents = counts.Respondent.slice(0, top).reverse();
+            return {
+                data: [
+                    {
+                        type: "bar",
+                        orientation: "h",
+                        x: respondents,
+                        y: countries,
+                    },
+                ],
+                layout: {
+                    title: "Count",
+                    height: Math.max(400, 20 * countries.length),
+                    margin: { l: 200 },
+                    yaxis: { automargin: true },
+                },
+            };
+        },
+    },
+});
@@ -7,6 +7,13 @@ import streamlit as st
 from plotly import express as px
 
 import awesome_analytics_apps.stack_overflow as stack_overflow
+from awesome_analytics_apps import choropleth, profiling, rasterize
+from awesome_analytics_apps.bitmap_index import BitmapIndex
+from awesome_analytics_apps.similarity import SimilarityIndex
+
+FILTER_COLUMNS = stack_overflow.FILTER_COLUMNS_2019
+SIMILAR_RESPONDENTS = 10
+NUMERIC_COLUMNS = ["Age", "ConvertedComp", "WorkWeekHrs", "CodeRevHrs"]
 
 
 def main():
@@ -25,13 +32,38 @@ def main():
 
     resources_component()
 
-    with st.spinner("Loading data from Stack Overflow ..."):
-        schema = read_stack_overflow_schema_2019()
-        results = read_stack_overflow_results_2019()
+    # Only the reruns of the sessions that switch on profiling are sampled
+    with profiling.profile("streamlit", enabled=profiling_component()) as profiler:
+        with st.spinner("Loading data from Stack Overflow ..."):
+            # A rerun picks up the rows appended since the last one
+            version = stack_overflow.dataset_fingerprint()
+            results = read_stack_overflow_results_2019(version)
+            schema = read_stack_overflow_schema_2019(version)
+            index = read_stack_overflow_index_2019(version)
+
+        all_results = results
+        results = respondents_filter_component(results, index)
+        stack_overflow_component(schema, results)
+        similar_respondents_component(all_results)
+
+        # Insert your app code below
+
+    if profiler is not None:
+        st.sidebar.markdown(
+            "Profile written to\n\n"
+            + "\n".join(f"- `{path}`" for path in profiler.paths)
+        )
+
 
-    stack_overflow_component(schema, results)
+def profiling_component() -> bool:
+    """The Profiling component writes a toggle to the sidebar for profiling the reruns of this
+    session
 
-    # Insert your app code below
+    Returns:
+        bool -- True if profiling is switched on
+    """
+    st.sidebar.header("Profiling")
+    return st.sidebar.checkbox("Profile this session")
 
 
 def resources_component():
@@ -51,6 +83,32 @@ def resources_component():
     )
 
 
+def respondents_filter_component(
+    results: pd.DataFrame, index: BitmapIndex
+) -> pd.DataFrame:
+    """The Respondents Filter component writes a filter per question to the sidebar and returns
+    the matching results
+
+    Arguments:
+        results {pd.DataFrame} -- A DataFrame of the Results
+        index {BitmapIndex} -- A BitmapIndex of the Results
+
+    Returns:
+        pd.DataFrame -- The Results of the selected respondents
+    """
+    st.sidebar.header("Filter Respondents")
+    filters = {
+        column: st.sidebar.multiselect(column, options=index.values(column))
+        for column in FILTER_COLUMNS
+    }
+    if not any(filters.values()):
+        return results
+
+    selected = index.match(filters)
+    st.sidebar.markdown(f"{len(selected)} of {index.size} respondents selected")
+    return index.select(results, selected)
+
+
 def stack_overflow_component(schema: pd.DataFrame, results: pd.DataFrame):
     """The Stack Overflow compontent writes the Questions, Results and a Distribution"""
     st.header("Stack Overflow 2019")
@@ -73,6 +131,8 @@ def stack_overflow_component(schema: pd.DataFrame, results: pd.DataFrame):
     selected_questions = stack_overflow_questions_component(schema)
     stack_overflow_answers_component(results, selected_questions)
     respondents_per_country_component(results)
+    respondents_map_component(results)
+    numeric_answers_component(results)
 
 def stack_overflow_questions_component(schema: pd.DataFrame) -> Optional[List[str]]:
     """This component writes the Stack Overflow Developer Questions and returns a selected list of
@@ -97,6 +157,9 @@ def stack_overflow_questions_component(schema: pd.DataFrame) -> Optional[List[st
         schema_to_show = schema.head(number_of_schema_rows)
 
     st.table(schema_to_show)
+    if questions:
+        st.markdown("Top answers of all respondents")
+        st.table(stack_overflow.top_answers(questions))
     return questions
 
 def stack_overflow_answers_component(results, selected_questions: Optional[List[str]]):
@@ -114,10 +177,9 @@ def stack_overflow_answers_component(results, selected_questions: Optional[List[
     number_of_rows_to_show = st.selectbox(
         "Select # Answers to show", options=[10, 50, 500, 5000, len(results)], index=0
     )
-    results_to_show = results
-    if selected_questions:
-        results_to_show = results_to_show[selected_questions]
-    results_to_show = results_to_show.head(number_of_rows_to_show)
+    results_to_show = stack_overflow.preview_answers(
+        results, selected_questions, number_of_rows_to_show
+    )
 
     if len(results_to_show.columns) > 2:
         st_answers_dataframe.dataframe(results_to_show)
@@ -135,11 +197,7 @@ def respondents_per_country_component(results):
         """You can plot using matplot, seaborn, vega lite, plotly and other.
     Here we have chosen plotly"""
     )
-    distributions = (
-        (results[["Country", "Respondent"]].groupby("Country").count().reset_index())
-        .sort_values("Respondent")
-        .tail(50)
-    )
+    distributions = stack_overflow.respondents_per_country(results, top=50)
     fig = px.bar(
         distributions,
         x="Respondent",
@@ -150,28 +208,194 @@ def respondents_per_country_component(results):
     )
     st.plotly_chart(fig, height=1000)
 
-# The @st.cache annotation caches the dataframe
-# so that it only takes time to read the first time.
-@st.cache
-def read_stack_overflow_results_2019() -> pd.DataFrame:
+def respondents_map_component(results):
+    """This component writes a world map of the number of Respondents per Country
+
+    Arguments:
+        results {[type]} -- A DataFrame of the Results
+    """
+    st.subheader("Respondents per Country Map")
+    if len(results) == len(read_stack_overflow_results_2019()):
+        fig = read_stack_overflow_map_2019(stack_overflow_version_2019())
+    else:
+        distribution = stack_overflow.respondents_per_country(results, top=len(results))
+        fig = choropleth.choropleth_figure(distribution)
+    st.plotly_chart(fig)
+
+
+# The map of all respondents is built from the precomputed counts of the disk cache.
+# allow_output_mutation=True avoids hashing the figure on every rerun
+@st.cache(allow_output_mutation=True)
+def read_stack_overflow_map_2019(version: str):  # pylint: disable=unused-argument
+    """A world map of the number of respondents per country of the Stack Overflow Survey
+    Results 2019
+
+    Arguments:
+        version {str} -- The version of the results. The map is cached per version
+
+    Returns:
+        go.Figure -- A Plotly choropleth figure
+    """
+    return choropleth.choropleth_figure(stack_overflow.get_respondents_per_country())
+
+
+# The results are read once per process and kept in this state. When rows are appended only the
+# new blocks are read. allow_output_mutation=True avoids hashing the results on every rerun
+@st.cache(allow_output_mutation=True)
+def _read_stack_overflow_results_2019_state() -> dict:
+    return {"version": None, "results": None}
+
+
+def read_stack_overflow_results_2019(version: Optional[str] = None) -> pd.DataFrame:
     """A dataframe of Stack Overflow Survey Results 2019
 
+    Keyword Arguments:
+        version {Optional[str]} -- The dataset_fingerprint of the results. If None the results
+            last read (default: {None})
+
     Returns:
         pd.DataFrame -- A dataframe of Stack Overflow Surve Results 2019]
     """
-    return stack_overflow.read_results()
+    state = _read_stack_overflow_results_2019_state()
+    if version is None:
+        version = state["version"] or stack_overflow.dataset_fingerprint()
+    if state["version"] != version:
+        if state["results"] is None:
+            results = stack_overflow.read_results()
+        else:
+            results = stack_overflow.refresh_results(state["results"], state["version"])
+        state.update(version=version, results=results)
+    return state["results"]
+
+
+def stack_overflow_version_2019() -> str:
+    """The dataset_fingerprint of the results returned by read_stack_overflow_results_2019"""
+    read_stack_overflow_results_2019()
+    return _read_stack_overflow_results_2019_state()["version"]
+
+
+def numeric_answers_component(results):
+    """This component writes a scatter plot of two numeric answers. Large numbers of respondents
+    are rasterized on the server so the size of the chart does not grow with the data.
+
+    The ordinal answers like YearsCode are the numbers of read_stack_overflow_ordinals_2019
+
+    Arguments:
+        results {[type]} -- A DataFrame of the Results
+    """
+    st.subheader("Numeric Answers")
+    options = NUMERIC_COLUMNS + list(stack_overflow.ORDINAL_NUMBERS_2019)
+    x = st.selectbox("X", options=options, index=0)
+    y = st.selectbox("Y", options=options, index=1)
+    ordinals = read_stack_overflow_ordinals_2019(stack_overflow_version_2019())
+    # The ordinals are aligned to the filtered results by their row number
+    numbers = results[NUMERIC_COLUMNS].join(
+        ordinals[list(stack_overflow.ORDINAL_NUMBERS_2019)]
+    )
+    st.plotly_chart(rasterize.scatter_figure(numbers, x, y))
+
+
+# The ordinals are normalized once per dataset and stored in the disk cache
+@st.cache
+def read_stack_overflow_ordinals_2019(
+    version: str,  # pylint: disable=unused-argument
+) -> pd.DataFrame:
+    """A dataframe of the ordinal answers of the Stack Overflow Survey Results 2019 as numbers
+    and ordered categoricals
+
+    Arguments:
+        version {str} -- The version of the results. The ordinals are cached per version
+
+    Returns:
+        pd.DataFrame -- A dataframe of the ORDINAL_COLUMNS indexed by row number
+    """
+    return stack_overflow.read_ordinals()
+
+
+def similar_respondents_component(results):
+    """This component writes the respondents with the most similar answers to a selected
+    respondent. They are found by a SimilarityIndex in milliseconds
+
+    Arguments:
+        results {[type]} -- A DataFrame of all the Results
+    """
+    st.subheader("Similar Respondents")
+    similarity_index = read_stack_overflow_similarity_index_2019(
+        stack_overflow_version_2019()
+    )
+    respondent = st.number_input(
+        "Respondent",
+        min_value=int(results["Respondent"].min()),
+        max_value=int(results["Respondent"].max()),
+        value=int(results["Respondent"].iloc[0]),
+    )
+    positions = (results["Respondent"] == respondent).to_numpy().nonzero()[0]
+    if not len(positions):
+        st.warning(f"There is no respondent {respondent}")
+        return
+
+    similar, distances = similarity_index.similar_to(
+        positions[0], k=SIMILAR_RESPONDENTS
+    )
+    columns = ["Respondent"] + similarity_index.columns
+    similar_results = results[columns].iloc[similar].copy()
+    similar_results.insert(1, "Differences", distances)
+    st.table(results[columns].iloc[positions[:1]])
+    st.dataframe(similar_results)
+
+
+# The index is built once per dataset and stored in the disk cache
+@st.cache(allow_output_mutation=True)
+def read_stack_overflow_similarity_index_2019(
+    version: str,  # pylint: disable=unused-argument
+) -> SimilarityIndex:
+    """A SimilarityIndex of the Stack Overflow Survey Results 2019
+
+    Arguments:
+        version {str} -- The version of the results. The index is cached per version
+
+    Returns:
+        SimilarityIndex -- A SimilarityIndex used to find similar respondents
+    """
+    return stack_overflow.get_similarity_index()
+
+
+# The index is built once per dataset, stored in the disk cache and extended when rows are
+# appended, so other Streamlit processes and restarts reuse it.
+# allow_output_mutation=True avoids hashing the index on every rerun
+@st.cache(allow_output_mutation=True)
+def read_stack_overflow_index_2019(
+    version: str,  # pylint: disable=unused-argument
+) -> BitmapIndex:
+    """A BitmapIndex of the FILTER_COLUMNS of the Stack Overflow Survey Results 2019
+
+    Arguments:
+        version {str} -- The version of the results. The index is cached per version
+
+    Returns:
+        BitmapIndex -- A BitmapIndex used to filter the respondents
+    """
+    return stack_overflow.get_bitmap_index()
 
 
 # The @st.cache annotation caches the dataframe
 # so that it only takes time to read the first time.
 @st.cache
-def read_stack_overflow_schema_2019() -> pd.DataFrame:
+def read_stack_overflow_schema_2019(
+    version: str,  # pylint: disable=unused-argument
+) -> pd.DataFrame:
     """A dataframe containing the schema of the Stack Overflow Survey Results 2019
 
+    Questions without answers or with the same answer from all respondents are left out
+
+    Arguments:
+        version {str} -- The version of the results. The schema is cached per version
+
     Returns:
         pd.DataFrame -- A dataframe of the schema of the Stack Overflow Survey Results 2019
     """
-    return stack_overflow.read_schema()
+    schema = stack_overflow.read_schema()
+    return schema[~schema["Column"].isin(stack_overflow.uninformative_questions())]
 
 
 main()
@@ -1,15 +1,25 @@
+import os
 from functools import lru_cache
 from typing import List, Optional
+from urllib.parse import parse_qs
 
 import IPython.display as ip
+from IPython import get_ipython
 import ipywidgets as widgets
 import pandas as pd
 import qgrid
 from markdown import markdown
 from plotly import express as px
 import plotly.graph_objects as go
+import layout
 import styles
-from awesome_analytics_apps import stack_overflow
+from awesome_analytics_apps import (
+    choropleth,
+    html_table,
+    profiling,
+    rasterize,
+    stack_overflow,
+)
 
 IPYTHON_DISPLAY_DOCS = (
     "https://ipython.readthedocs.io/en/stable/api/generated/IPython.display.html"
@@ -24,16 +34,31 @@ QGRID_DOCS = "https://qgrid.readthedocs.io/en/latest/index.html"
 def main():
     configure()
 
-    app_layout = widgets.AppLayout(
-        header=get_header(),
-        left_sidebar=get_sidebar(),
-        center=get_center(),
-        right_sidebar=widgets.Output(),
-        pane_widths=[2, "1400px", 1],
-        pane_heights=["75px", 1, "75px"],
-    )
-
-    ip.display(app_layout)
+    footer = widgets.HTML()
+    # Static content is batched into a few HTML widgets. We report the number of widgets and
+    # messages, since each of them delays the time until the page is interactive.
+    # Open the app with ?profile=1 to profile the page load of your session
+    with profiling.profile("voila", enabled=is_profiling()) as profiler:
+        with layout.measure() as report:
+            app_layout = widgets.AppLayout(
+                header=get_header(),
+                left_sidebar=get_sidebar(),
+                center=get_center(),
+                footer=footer,
+                pane_widths=[2, "1400px", 1],
+                pane_heights=["75px", 1, "75px"],
+            )
+            ip.display(app_layout)
+    footer.value = f"<small>Page load: {report}</small>"
+    if profiler is not None:
+        footer.value += f"<small>. Profile written to {profiler.paths[0]}</small>"
+
+
+def is_profiling() -> bool:
+    """True if the page was opened with the query parameter profile=1. Voila passes the query
+    string of the page to the kernel in the QUERY_STRING environment variable"""
+    query = parse_qs(os.environ.get("QUERY_STRING", ""))
+    return query.get("profile", ["0"])[0] == "1"
 
 
 def get_header():
@@ -58,9 +83,15 @@ def get_sidebar():
     )
 
 def configure():
-    pd.set_option("display.max_columns", 1000)  # or 1000
-    pd.set_option("display.max_rows", 100)  # or 1000
-    pd.set_option("display.max_colwidth", -1)
+    pd.set_option("display.max_columns", html_table.MAX_COLUMNS)
+    pd.set_option("display.max_rows", html_table.ROWS_PER_PAGE)
+    pd.set_option("display.max_colwidth", html_table.MAX_CHARS)
+    # A displayed DataFrame is rendered as one bounded page, however many answers it holds
+    shell = get_ipython()
+    if shell is not None:
+        shell.display_formatter.formatters["text/html"].for_type(
+            pd.DataFrame, html_table.to_html
+        )
 
     # Todo: Change 1000 to styles.MAX_WIDTH
     ip.display(
@@ -77,9 +108,7 @@ def configure():
 
 
 def get_center():
-    items = [get_resources(), get_stack_overflow()]
-    return to_output_widget(items)
-    # widgets.VBox((get_resources(), get_stack_overflow()))
+    return layout.build([get_resources(), get_stack_overflow()])
 
 
 def get_resources():
@@ -106,15 +135,7 @@ ip.display(
         ip.Markdown("For more info watch the ***30 minutes introduction*** to Voila"),
         ip.YouTubeVideo("VtchVpoSdoQ"),
     ]
-    return to_output_widget(items)
-
-
-def to_output_widget(items) -> widgets.Widget:
-    out = widgets.Output()
-    with out:
-        for item in items:
-            ip.display(item)
-    return out
+    return items
 
 
 def run_all_code_below(input):
@@ -129,7 +150,10 @@ def run_all_code_below_button():
 
 @lru_cache(maxsize=2)
 def get_data():
-    return stack_overflow.read_schema(), stack_overflow.read_results()
+    schema = stack_overflow.read_schema()
+    # Questions without answers or with the same answer from everybody are hidden
+    schema = schema[~schema["Column"].isin(stack_overflow.uninformative_questions())]
+    return schema, stack_overflow.read_results()
 
 
 def get_stack_overflow():
@@ -144,9 +168,11 @@ def get_stack_overflow():
         ip.Markdown("## Stack Overflow Results 2019"),
         stack_overflow_results_grid(results, questions_grid),
         respondents_per_country_component(results),
+        respondents_map_component(),
+        numeric_answers_component(results),
     ]
 
-    return to_output_widget(items)
+    return items
 
 
 def get_stack_overflow_intro():
@@ -167,7 +193,7 @@ Data: [{stack_overflow.DATA_URL}]({stack_overflow.DATA_URL})
 """
         )
     ]
-    return to_output_widget(items)
+    return items
 
 
 def stack_overflow_questions_grid(schema: pd.DataFrame) -> qgrid.QGridWidget:
@@ -190,14 +216,15 @@ def stack_overflow_questions_grid(schema: pd.DataFrame) -> qgrid.QGridWidget:
     return questions_grid
 
 
-def stack_overflow_results_grid(
-    results, questions_grid: qgrid.QGridWidget
-) -> widgets.Widget:
+def stack_overflow_results_grid(results, questions_grid: qgrid.QGridWidget) -> List:
     """This component writes the Stack Overflow Developer Survey Questions
 
     Arguments:
         results {[type]} -- A DataFrame of the Results
         questions_grid {qgrid.QGridWidget} -- The table of questions
+
+    Returns:
+        List -- The items of the component for layout.build
     """
 
     def get_selected_questions(questions_grid):
@@ -226,7 +253,7 @@ def stack_overflow_results_grid(
 
     questions_grid.observe(handler=questions_grid_handler, names="_selected_rows")
 
-    return to_output_widget([no_results_grid, results_grid])
+    return [no_results_grid, results_grid]
 
 
 def respondents_per_country_component(results):
@@ -235,30 +262,55 @@ def respondents_per_country_component(results):
     Arguments:
         results {[type]} -- A DataFrame of the Results
     """
-    distributions = (
-        (results[["Country", "Respondent"]].groupby("Country").count().reset_index())
-        .sort_values("Respondent")
-        .tail(50)
-    )
-    fig = px.bar(
-        distributions,
-        x="Respondent",
-        y="Country",
-        title="Count",
-        orientation="h",
-        height=800,
-        width=1200,
+    # The figure is shared by all kernels via the disk cache
+    fig = stack_overflow.get_disk_cache().get_or_set(
+        "voila_respondents_per_country_figure",
+        lambda: px.bar(
+            stack_overflow.respondents_per_country(results, top=50),
+            x="Respondent",
+            y="Country",
+            title="Count",
+            orientation="h",
+            height=800,
+            width=1200,
+        ),
     )
-    return to_output_widget(
-        [
-            ip.Markdown(
-                """### Respondents per Countrys
+    return [
+        ip.Markdown(
+            """### Respondents per Countrys
 You can plot using matplot, seaborn, vega lite, plotly and other. Here we have chosen plotly
             """
-            ),
-            go.FigureWidget(fig),
-        ]
+        ),
+        go.FigureWidget(fig),
+    ]
+
+
+def respondents_map_component():
+    """This component writes a world map of the number of Respondents per Country. The counts
+    are precomputed and the figure is shared by all kernels via the disk cache"""
+    fig = stack_overflow.get_disk_cache().get_or_set(
+        "voila_respondents_map_figure",
+        lambda: choropleth.choropleth_figure(
+            stack_overflow.get_respondents_per_country()
+        ),
     )
+    return [ip.Markdown("### Respondents per Country Map"), go.FigureWidget(fig)]
+
+
+def numeric_answers_component(results):
+    """This component writes a scatter plot of Age vs ConvertedComp. Large numbers of
+    respondents are rasterized on the server and re-aggregated when you zoom
+
+    Arguments:
+        results {[type]} -- A DataFrame of the Results
+    """
+    return [
+        ip.Markdown(
+            """### Compensation vs Age
+Zoom in to see the details. The chart is re-aggregated on the server"""
+        ),
+        rasterize.rasterized_figure_widget(results, "Age", "ConvertedComp"),
+    ]
 
 
 if __name__ == "__main__":
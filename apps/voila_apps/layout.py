@@ -0,0 +1,139 @@
+"""This module builds the layout of the Voila app with as few widgets and messages as possible.
+
+Every widget is a model the kernel opens with a comm message and every ip.display into an Output
+widget is a message of its own. A deep tree of Output widgets therefore sends many small messages
+before the page is interactive. The build function instead joins consecutive static items like
+Markdown, HTML, Code and videos into a single HTML widget and only keeps the interactive widgets.
+
+Use measure to report the number of widgets and messages of a page load
+
+    with layout.measure() as report:
+        app_layout = ...
+    print(report)
+"""
+import contextlib
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional
+
+import IPython.display as ip
+import ipywidgets as widgets
+from markdown import markdown
+
+
+def to_html(item: Any) -> Optional[str]:
+    """The HTML of a static item
+
+    Arguments:
+        item {Any} -- A str of Markdown, an IPython display object or a widget
+
+    Returns:
+        Optional[str] -- The HTML or None if the item is a widget or cannot be rendered
+    """
+    if isinstance(item, widgets.Widget):
+        return None
+    if isinstance(item, str):
+        return markdown(item)
+    if isinstance(item, ip.Markdown):
+        return markdown(item.data)
+    if hasattr(item, "_repr_html_"):
+        return item._repr_html_()  # pylint: disable=protected-access
+    return None
+
+
+def _flatten(items: Iterable) -> Iterator:
+    for item in items:
+        if isinstance(item, (list, tuple)):
+            yield from _flatten(item)
+        else:
+            yield item
+
+
+def build(items: Iterable, **kwargs) -> widgets.Box:
+    """A VBox of the items. Consecutive static items are joined into one HTML widget
+
+    Arguments:
+        items {Iterable} -- The items. Nested lists are flattened, so components can return
+            lists of items
+
+    Keyword Arguments:
+        kwargs -- Passed on to the VBox, for example layout
+
+    Returns:
+        widgets.Box -- The VBox
+    """
+    children: List[widgets.Widget] = []
+    html: List[str] = []
+
+    def flush():
+        if html:
+            children.append(widgets.HTML("\n".join(html)))
+            html.clear()
+
+    for item in _flatten(items):
+        item_html = to_html(item)
+        if item_html is not None:
+            html.append(item_html)
+            continue
+        flush()
+        if isinstance(item, widgets.Widget):
+            children.append(item)
+        else:
+            # An object we cannot render as HTML, for example a matplotlib figure
+            output = widgets.Output()
+            with output:
+                ip.display(item)
+            children.append(output)
+    flush()
+    return widgets.VBox(children, **kwargs)
+
+
+@dataclass
+class PageLoadReport:
+    """The number of widget models and messages sent by the kernel during a page load"""
+
+    widgets: int = 0
+    messages: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.widgets} widgets, {self.messages} messages"
+
+
+def _widget_ids() -> set:
+    # ipywidgets 7 keeps the open widgets in Widget.widgets, ipywidgets 8 in _instances
+    registry = getattr(widgets.Widget, "widgets", None)
+    if not isinstance(registry, dict):
+        registry = getattr(widgets.widget, "_instances", {})
+    return set(registry)
+
+
+@contextlib.contextmanager
+def measure() -> Iterator[PageLoadReport]:
+    """Counts the widgets created and the messages sent while running the block.
+
+    A message is the comm open of a widget, an update of the state of a widget or a display
+
+    Yields:
+        Iterator[PageLoadReport] -- The report. It's complete when the block exits
+    """
+    report = PageLoadReport()
+    widget_ids = _widget_ids()
+    send = widgets.Widget._send  # pylint: disable=protected-access
+    display = ip.display
+
+    def counting_send(self, msg, buffers=None):
+        report.messages += 1
+        return send(self, msg, buffers)
+
+    def counting_display(*objs, **kwargs):
+        report.messages += 1
+        return display(*objs, **kwargs)
+
+    widgets.Widget._send = counting_send  # pylint: disable=protected-access
+    ip.display = counting_display
+    try:
+        yield report
+    finally:
+        widgets.Widget._send = send  # pylint: disable=protected-access
+        ip.display = display
+        report.widgets = len(_widget_ids() - widget_ids)
+        report.messages += report.widgets
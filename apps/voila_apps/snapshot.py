@@ -0,0 +1,226 @@
+"""This module serves pre-executed snapshots of the Voila app. Run it next to the Voila server
+
+    voila apps/voila_apps/app.ipynb --port=8866
+    python apps/voila_apps/snapshot.py --voila-url=http://localhost:8866/
+
+Everything the app shows before a user interacts is the same for a given version of the survey
+data and of the code. So we execute app.ipynb once, store the outputs and the initial state of the
+widgets in the notebook and export it to a static HTML page. New visitors get that page without
+starting a kernel. The widgets are rendered from the stored state. When a visitor wants to
+interact, a link opens the app on the Voila server, which starts a live kernel.
+
+The snapshot is keyed by the dataset fingerprint and a hash of the code, so it's rebuilt when
+either changes. The rebuild runs in a thread while visitors get the last snapshot. Build it up
+front with
+
+    python apps/voila_apps/snapshot.py --build
+"""
+import argparse
+import hashlib
+import os
+import pathlib
+import tempfile
+from typing import Optional
+
+from awesome_analytics_apps import stack_overflow
+from awesome_analytics_apps.locking import FileLock
+
+HERE = pathlib.Path(__file__).parent
+NOTEBOOK = HERE / "app.ipynb"
+# A change to any of these files changes the output of the notebook
+CODE_FILES = (
+    [NOTEBOOK]
+    + sorted(HERE.glob("*.py"))
+    + sorted(pathlib.Path(stack_overflow.__file__).parent.glob("*.py"))
+)
+SNAPSHOTS = "voila_snapshots"
+EXECUTE_TIMEOUT = 600
+PORT = 8867
+VOILA_URL = "http://localhost:8866/"
+BANNER = """
+<div style="padding: 10px; background: #f5f5f5; border-bottom: 1px solid #ddd;">
+This is a snapshot of the app. <a href="{voila_url}">Start an interactive session</a>
+to filter and zoom.
+</div>
+"""
+
+
+def code_hash() -> str:
+    """A hash of the CODE_FILES
+
+    Returns:
+        str -- The hex digest
+    """
+    digest = hashlib.sha256()
+    for path in CODE_FILES:
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def snapshot_key(code: Optional[str] = None) -> str:
+    """The key of the snapshot of the current dataset and code
+
+    Keyword Arguments:
+        code {Optional[str]} -- The code_hash. If None it's computed (default: {None})
+
+    Returns:
+        str -- The key
+    """
+    if code is None:
+        code = code_hash()
+    return f"{stack_overflow.dataset_fingerprint()}-{code[:16]}"
+
+
+def _get_snapshot_directory() -> pathlib.Path:
+    return (
+        stack_overflow.LOCAL_ROOT
+        / stack_overflow.DATA_STACK_OVERFLOW
+        / stack_overflow.CACHE
+        / SNAPSHOTS
+    )
+
+
+def snapshot_path(code: Optional[str] = None) -> pathlib.Path:
+    """The path to the snapshot of the current dataset and code. It might not be built yet
+
+    Keyword Arguments:
+        code {Optional[str]} -- The code_hash. If None it's computed (default: {None})
+
+    Returns:
+        pathlib.Path -- The path to the HTML file
+    """
+    return _get_snapshot_directory() / f"{snapshot_key(code)}.html"
+
+
+def latest_snapshot() -> Optional[pathlib.Path]:
+    """The last snapshot built, possibly of an older dataset or code
+
+    Returns:
+        Optional[pathlib.Path] -- The path to the HTML file or None if there is none
+    """
+    paths = sorted(
+        _get_snapshot_directory().glob("*.html"), key=lambda path: path.stat().st_mtime
+    )
+    return paths[-1] if paths else None
+
+
+def build_snapshot(path: pathlib.Path, voila_url: str = VOILA_URL):
+    """Executes the NOTEBOOK and writes it to path as a static HTML page with the widget state
+
+    Arguments:
+        path {pathlib.Path} -- The path to the HTML file
+
+    Keyword Arguments:
+        voila_url {str} -- The url of the app on the Voila server (default: {VOILA_URL})
+    """
+    # pylint: disable=import-outside-toplevel
+    import nbformat
+    from nbclient import NotebookClient
+    from nbconvert import HTMLExporter
+
+    notebook = nbformat.read(str(NOTEBOOK), as_version=4)
+    # The widget state is stored in the metadata of the notebook and embedded in the page
+    NotebookClient(
+        notebook,
+        timeout=EXECUTE_TIMEOUT,
+        resources={"metadata": {"path": str(HERE)}},
+        store_widget_state=True,
+    ).execute()
+    # Like Voila we only show the outputs
+    body, _ = HTMLExporter(
+        exclude_input=True, exclude_input_prompt=True
+    ).from_notebook_node(notebook)
+    body = body.replace("<body>", "<body>" + BANNER.format(voila_url=voila_url), 1)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf-8"
+    ) as file:
+        file.write(body)
+    os.replace(file.name, path)
+
+
+def get_snapshot(
+    voila_url: str = VOILA_URL, code: Optional[str] = None
+) -> pathlib.Path:
+    """The snapshot of the current dataset and code. It's built if missing and older snapshots
+    are deleted. Concurrent processes build it only once
+
+    Keyword Arguments:
+        voila_url {str} -- The url of the app on the Voila server (default: {VOILA_URL})
+        code {Optional[str]} -- The code_hash. If None it's computed (default: {None})
+
+    Returns:
+        pathlib.Path -- The path to the HTML file
+    """
+    path = snapshot_path(code)
+    directory = path.parent
+    if path.exists():
+        return path
+
+    with FileLock(directory / "build.lock"):
+        if not path.exists():
+            build_snapshot(path, voila_url=voila_url)
+        for stale_path in directory.glob("*.html"):
+            if stale_path != path:
+                stale_path.unlink()
+    return path
+
+
+def main():
+    """Builds the snapshot or serves it with Tornado"""
+    # pylint: disable=import-outside-toplevel
+    import tornado.ioloop
+    import tornado.web
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--voila-url", default=VOILA_URL)
+    parser.add_argument(
+        "--build", action="store_true", help="Builds the snapshot and exits"
+    )
+    arguments = parser.parse_args()
+    if arguments.build:
+        print(get_snapshot(voila_url=arguments.voila_url))
+        return
+
+    # The code does not change while the server runs, so only the dataset is checked per request
+    code = code_hash()
+    # The builds in progress. Building executes the notebook, which can take minutes, so it
+    # runs in a thread and does not block the IOLoop serving the other visitors
+    builds = {}
+
+    def build(path: pathlib.Path):
+        if path not in builds:
+            builds[path] = tornado.ioloop.IOLoop.current().run_in_executor(
+                None, get_snapshot, arguments.voila_url, code
+            )
+            builds[path].add_done_callback(lambda _: builds.pop(path, None))
+        return builds[path]
+
+    class SnapshotHandler(tornado.web.RequestHandler):
+        """Serves the snapshot. While it's rebuilt the last snapshot is served. Tornado answers
+        304 Not Modified if it has not changed"""
+
+        async def get(self):  # pylint: disable=arguments-differ
+            path = snapshot_path(code)
+            try:
+                if not path.exists():
+                    rebuild = build(path)
+                    path = latest_snapshot() or await rebuild
+                data = path.read_bytes()
+            except FileNotFoundError:
+                # The last snapshot was deleted because the rebuild just finished
+                data = (await build(snapshot_path(code))).read_bytes()
+            self.set_header("Content-Type", "text/html; charset=UTF-8")
+            self.write(data)
+
+    application = tornado.web.Application([(r"/", SnapshotHandler)])
+    application.listen(arguments.port)
+    print(f"Serving the Voila app snapshot on http://localhost:{arguments.port}/")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
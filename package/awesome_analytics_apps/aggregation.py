@@ -0,0 +1,200 @@
+"""This module provides batch aggregation of survey columns from a ColumnStore.
+
+The columns are factorized once when the ColumnStore is written, for example by
+stack_overflow.get_column_store(). An aggregation is then a bincount of the memory mapped integer
+codes. For many columns of a large dataset they can be aggregated in a pool of processes, which
+memory map the codes they need instead of receiving a pickled copy of the DataFrame.
+
+Example:
+
+    distributions = aggregate_columns(stack_overflow.get_column_store(), ["Country"])
+    distributions["Country"].head(10)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from awesome_analytics_apps.column_store import ColumnStore
+
+MULTI_SELECT_SEPARATOR = ";"
+
+
+def _counts(
+    store: ColumnStore, column: str, rows: Optional[np.ndarray] = None
+) -> np.ndarray:
+    codes = store.codes(column)
+    if rows is not None:
+        codes = codes[rows]
+    values = store.values(column)
+    return np.bincount(codes[codes >= 0], minlength=len(values))
+
+
+def value_counts(
+    store: ColumnStore, column: str, rows: Optional[np.ndarray] = None
+) -> pd.Series:
+    """The number of respondents per answer of the column
+
+    Arguments:
+        store {ColumnStore} -- The ColumnStore
+        column {str} -- A column in the store
+
+    Keyword Arguments:
+        rows {Optional[np.ndarray]} -- The positions of the respondents to count. If None all
+            respondents are counted (default: {None})
+
+    Returns:
+        pd.Series -- The number of respondents per answer, largest first
+    """
+    counts = pd.Series(
+        _counts(store, column, rows), index=store.values(column), name=column
+    )
+    return counts.sort_values(ascending=False)
+
+
+def answer_counts(
+    store: ColumnStore, column: str, rows: Optional[np.ndarray] = None
+) -> pd.Series:
+    """The number of respondents per answer option of a multi-select column like 'DevType'
+
+    The counts are computed per distinct combination of answers and then split, so only the
+    distinct combinations are split and not every row.
+
+    Arguments:
+        store {ColumnStore} -- The ColumnStore
+        column {str} -- A column in the store
+
+    Keyword Arguments:
+        rows {Optional[np.ndarray]} -- The positions of the respondents to count. If None all
+            respondents are counted (default: {None})
+
+    Returns:
+        pd.Series -- The number of respondents per answer option, largest first
+    """
+    combinations = pd.Series(
+        _counts(store, column, rows), index=store.values(column).astype(str)
+    )
+    if combinations.empty:
+        return pd.Series(dtype=np.int64, name=column)
+    options = combinations.index.str.split(MULTI_SELECT_SEPARATOR)
+    counts = (
+        pd.Series(np.repeat(combinations.values, options.str.len()))
+        .groupby(np.concatenate(options.values))
+        .sum()
+        .rename(column)
+    )
+    return counts.sort_values(ascending=False)
+
+
+AGGREGATIONS: Dict[str, Callable[[ColumnStore, str], pd.Series]] = {
+    "value_counts": value_counts,
+    "answer_counts": answer_counts,
+}
+
+
+def crosstab(store: ColumnStore, index: str, columns: str) -> pd.DataFrame:
+    """The number of respondents per combination of answers of two columns
+
+    Arguments:
+        store {ColumnStore} -- The ColumnStore
+        index {str} -- The column of the rows
+        columns {str} -- The column of the columns
+
+    Returns:
+        pd.DataFrame -- The number of respondents
+    """
+    index_codes, columns_codes = store.codes(index), store.codes(columns)
+    index_values, columns_values = store.values(index), store.values(columns)
+    answered = (index_codes >= 0) & (columns_codes >= 0)
+    combined = (
+        index_codes[answered].astype(np.int64) * len(columns_values)
+        + columns_codes[answered]
+    )
+    counts = np.bincount(combined, minlength=len(index_values) * len(columns_values))
+    return pd.DataFrame(
+        counts.reshape(len(index_values), len(columns_values)),
+        index=pd.Index(index_values, name=index),
+        columns=pd.Index(columns_values, name=columns),
+    )
+
+
+def _aggregate(directory: str, aggregation: str, column: str) -> pd.Series:
+    return AGGREGATIONS[aggregation](ColumnStore(directory), column)
+
+
+def _crosstab(directory: str, index: str, columns: str) -> pd.DataFrame:
+    return crosstab(ColumnStore(directory), index, columns)
+
+
+def _map(function: Callable, arguments: List[Tuple], processes: Optional[int]) -> List:
+    processes = processes or os.cpu_count()
+    if processes == 1 or len(arguments) <= 1:
+        return [function(*argument) for argument in arguments]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(function, *zip(*arguments)))
+
+
+def aggregate_columns(
+    store: ColumnStore,
+    columns: Optional[Iterable[str]] = None,
+    aggregation: str = "value_counts",
+    processes: Optional[int] = 1,
+) -> Dict[str, pd.Series]:
+    """Aggregates each of the columns of the store
+
+    Arguments:
+        store {ColumnStore} -- A ColumnStore like the one returned by
+            stack_overflow.get_column_store()
+
+    Keyword Arguments:
+        columns {Optional[Iterable[str]]} -- The columns to aggregate. If None all columns are
+            aggregated (default: {None})
+        aggregation {str} -- One of the AGGREGATIONS (default: {"value_counts"})
+        processes {Optional[int]} -- The number of processes. If None the number of cores is
+            used. A pool only pays off for many columns of a large store, so by default the
+            columns are aggregated in this process (default: {1})
+
+    Returns:
+        Dict[str, pd.Series] -- The aggregate per column
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(
+            f"Unknown aggregation '{aggregation}'. Choose one of {list(AGGREGATIONS)}"
+        )
+    columns = list(store.columns if columns is None else columns)
+    aggregates = _map(
+        _aggregate,
+        [(str(store.directory), aggregation, column) for column in columns],
+        processes,
+    )
+    return dict(zip(columns, aggregates))
+
+
+def crosstab_columns(
+    store: ColumnStore,
+    pairs: Iterable[Tuple[str, str]],
+    processes: Optional[int] = 1,
+) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """Computes the crosstab of each pair of columns of the store
+
+    Arguments:
+        store {ColumnStore} -- A ColumnStore like the one returned by
+            stack_overflow.get_column_store()
+        pairs {Iterable[Tuple[str, str]]} -- The (index, columns) pairs
+
+    Keyword Arguments:
+        processes {Optional[int]} -- The number of processes. If None the number of cores is
+            used. If 1 the crosstabs are computed in this process (default: {1})
+
+    Returns:
+        Dict[Tuple[str, str], pd.DataFrame] -- The crosstab per pair
+    """
+    pairs = [tuple(pair) for pair in pairs]
+    crosstabs = _map(
+        _crosstab,
+        [(str(store.directory), index, column) for index, column in pairs],
+        processes,
+    )
+    return dict(zip(pairs, crosstabs))
@@ -0,0 +1,369 @@
+"""This module provides bitmap indexes for fast multi-criteria filtering of survey respondents.
+
+A bitmap is a set of row positions stored as NumPy packed bits, i.e. one bit per respondent.
+A BitmapIndex holds one bitmap per distinct value of each indexed column. Filters like
+
+    index.isin("Country", ["Denmark", "Sweden"]) & ~index.eq("DevType", "Student")
+
+are then resolved with bitwise operations on a few kilobytes instead of scanning the DataFrame.
+"""
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+MULTI_SELECT_SEPARATOR = ";"
+MAX_CARDINALITY = 500
+
+# Number of set bits in each possible byte value. Used to count the members of a Bitmap.
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class Bitmap:
+    """A set of row positions stored as NumPy packed bits.
+
+    Bitmaps of the same size can be combined with & (AND), | (OR), ^ (XOR) and ~ (NOT).
+    """
+
+    def __init__(self, bits: np.ndarray, size: int):
+        """A set of row positions
+
+        Arguments:
+            bits {np.ndarray} -- The packed bits as returned by np.packbits
+            size {int} -- The number of rows
+        """
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def from_mask(cls, mask: Iterable[bool]) -> "Bitmap":
+        """Creates a Bitmap from a boolean mask
+
+        Arguments:
+            mask {Iterable[bool]} -- A boolean mask with one element per row
+
+        Returns:
+            Bitmap -- A Bitmap with the rows where the mask is True
+        """
+        mask = np.asarray(mask, dtype=bool)
+        return cls(np.packbits(mask), len(mask))
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[int], size: int) -> "Bitmap":
+        """Creates a Bitmap from row positions
+
+        Arguments:
+            positions {Iterable[int]} -- The row positions to include
+            size {int} -- The number of rows
+
+        Returns:
+            Bitmap -- A Bitmap with the given rows
+        """
+        mask = np.zeros(size, dtype=bool)
+        mask[np.asarray(positions, dtype=np.int64)] = True
+        return cls.from_mask(mask)
+
+    @classmethod
+    def empty(cls, size: int) -> "Bitmap":
+        """A Bitmap without any rows"""
+        return cls(np.zeros((size + 7) // 8, dtype=np.uint8), size)
+
+    @classmethod
+    def full(cls, size: int) -> "Bitmap":
+        """A Bitmap with all rows"""
+        return ~cls.empty(size)
+
+    def _check_size(self, other: "Bitmap"):
+        if self.size != other.size:
+            raise ValueError(
+                f"Cannot combine Bitmaps of size {self.size} and {other.size}"
+            )
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        self._check_size(other)
+        return Bitmap(np.bitwise_and(self.bits, other.bits), self.size)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        self._check_size(other)
+        return Bitmap(np.bitwise_or(self.bits, other.bits), self.size)
+
+    def __xor__(self, other: "Bitmap") -> "Bitmap":
+        self._check_size(other)
+        return Bitmap(np.bitwise_xor(self.bits, other.bits), self.size)
+
+    def __invert__(self) -> "Bitmap":
+        bits = np.invert(self.bits)
+        padding = -self.size % 8
+        if padding:
+            # np.packbits is big endian, so the padding is the lowest bits of the last byte
+            bits[-1] &= (0xFF << padding) & 0xFF
+        return Bitmap(bits, self.size)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return self.size == other.size and np.array_equal(self.bits, other.bits)
+
+    def __len__(self) -> int:
+        return int(_POPCOUNT[self.bits].sum())
+
+    def __repr__(self) -> str:
+        return f"Bitmap(count={len(self)}, size={self.size})"
+
+    def to_mask(self) -> np.ndarray:
+        """The Bitmap as a boolean mask with one element per row"""
+        return np.unpackbits(self.bits)[: self.size].astype(bool)
+
+    def to_positions(self) -> np.ndarray:
+        """The row positions in the Bitmap"""
+        return np.flatnonzero(self.to_mask())
+
+    def extend(self, other: "Bitmap") -> "Bitmap":
+        """The rows of this Bitmap followed by the rows of the other one.
+
+        Only the bits of the other Bitmap and the last partial byte of this one are unpacked
+
+        Arguments:
+            other {Bitmap} -- The Bitmap of the rows after this one
+
+        Returns:
+            Bitmap -- A Bitmap of size self.size + other.size
+        """
+        full_bytes = self.size // 8
+        tail = np.unpackbits(self.bits[full_bytes:])[: self.size % 8].astype(bool)
+        bits = np.packbits(np.concatenate([tail, other.to_mask()]))
+        return Bitmap(
+            np.concatenate([self.bits[:full_bytes], bits]), self.size + other.size
+        )
+
+
+def _group_positions(
+    positions: np.ndarray, values: np.ndarray
+) -> Dict[Hashable, np.ndarray]:
+    """Groups the positions by value. Missing values are ignored"""
+    keep = pd.notnull(values)
+    positions, values = positions[keep], values[keep]
+    codes, uniques = pd.factorize(values)
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+    return dict(zip(uniques, np.split(positions[order], boundaries)))
+
+
+def _is_multi_select(series: pd.Series, separator: str) -> bool:
+    return bool(series.dropna().astype(str).str.contains(separator, regex=False).any())
+
+
+class BitmapIndex:
+    """One Bitmap per distinct value of each indexed column of a DataFrame.
+
+    Build it once with BitmapIndex.build(results) and keep it alongside the DataFrame.
+    """
+
+    def __init__(
+        self,
+        bitmaps: Dict[str, Dict[Hashable, Bitmap]],
+        size: int,
+        multi_select_columns: Optional[List[str]] = None,
+    ):
+        """One Bitmap per distinct value of each indexed column
+
+        Arguments:
+            bitmaps {Dict[str, Dict[Hashable, Bitmap]]} -- A Bitmap per column and value
+            size {int} -- The number of rows
+
+        Keyword Arguments:
+            multi_select_columns {Optional[List[str]]} -- The columns indexed per answer
+                option instead of per value (default: {None})
+        """
+        self.bitmaps = bitmaps
+        self.size = size
+        self.multi_select_columns = multi_select_columns or []
+
+    @classmethod
+    def build(
+        cls,
+        results: pd.DataFrame,
+        columns: Optional[List[str]] = None,
+        separator: str = MULTI_SELECT_SEPARATOR,
+        max_cardinality: int = MAX_CARDINALITY,
+    ) -> "BitmapIndex":
+        """Builds a BitmapIndex of the categorical columns of the results
+
+        Multi-select columns, i.e. columns like 'DevType' where the answers are separated by
+        the separator, are indexed per answer option.
+
+        Arguments:
+            results {pd.DataFrame} -- A DataFrame like the one returned by
+                stack_overflow.read_results()
+
+        Keyword Arguments:
+            columns {Optional[List[str]]} -- The columns to index. If None all text columns
+                with at most max_cardinality distinct values are indexed (default: {None})
+            separator {str} -- The separator of multi-select answers (default: {";"})
+            max_cardinality {int} -- The maximum number of distinct values of an
+                automatically selected column (default: {MAX_CARDINALITY})
+
+        Returns:
+            BitmapIndex -- The index
+        """
+        size = len(results)
+        positions = np.arange(size)
+        automatic = columns is None
+        if columns is None:
+            columns = [
+                column
+                for column in results.columns
+                if not pd.api.types.is_numeric_dtype(results[column])
+            ]
+
+        bitmaps: Dict[str, Dict[Hashable, Bitmap]] = {}
+        multi_select_columns = []
+        for column in columns:
+            series = results[column]
+            if _is_multi_select(series, separator):
+                exploded = (
+                    pd.Series(series.values, index=positions)
+                    .str.split(separator)
+                    .explode()
+                )
+                groups = _group_positions(exploded.index.values, exploded.values)
+                multi_select_columns.append(column)
+            else:
+                groups = _group_positions(positions, series.values)
+            if automatic and len(groups) > max_cardinality:
+                continue
+            bitmaps[column] = {
+                value: Bitmap.from_positions(group, size)
+                for value, group in groups.items()
+            }
+        multi_select_columns = [
+            column for column in multi_select_columns if column in bitmaps
+        ]
+        return cls(bitmaps, size, multi_select_columns)
+
+    @property
+    def columns(self) -> List[str]:
+        """The indexed columns"""
+        return list(self.bitmaps)
+
+    def values(self, column: str) -> List[Hashable]:
+        """The distinct values or answer options of the column
+
+        Arguments:
+            column {str} -- An indexed column
+
+        Returns:
+            List[Hashable] -- The values sorted by number of respondents, largest first
+        """
+        bitmaps = self.bitmaps[column]
+        return sorted(bitmaps, key=lambda value: len(bitmaps[value]), reverse=True)
+
+    def eq(self, column: str, value: Hashable) -> Bitmap:
+        """The respondents that answered the value.
+
+        For a multi-select column it's the respondents that selected the answer option.
+
+        Arguments:
+            column {str} -- An indexed column
+            value {Hashable} -- A value
+
+        Returns:
+            Bitmap -- The matching respondents
+        """
+        return self.bitmaps[column].get(value, Bitmap.empty(self.size))
+
+    def isin(self, column: str, values: Iterable[Hashable]) -> Bitmap:
+        """The respondents that answered any of the values
+
+        Arguments:
+            column {str} -- An indexed column
+            values {Iterable[Hashable]} -- The values
+
+        Returns:
+            Bitmap -- The matching respondents
+        """
+        bitmap = Bitmap.empty(self.size)
+        for value in values:
+            bitmap = bitmap | self.eq(column, value)
+        return bitmap
+
+    def notnull(self, column: str) -> Bitmap:
+        """The respondents that answered the question in the column"""
+        return self.isin(column, self.bitmaps[column])
+
+    def isnull(self, column: str) -> Bitmap:
+        """The respondents that did not answer the question in the column"""
+        return ~self.notnull(column)
+
+    def match(self, filters: Mapping[str, Iterable[Hashable]]) -> Bitmap:
+        """The respondents that answered any of the values for all the columns, i.e. the values
+        of a column are OR'ed and the columns are AND'ed.
+
+        Columns without any values are ignored. This makes it easy to feed the filters
+        directly from multiselect widgets.
+
+        Arguments:
+            filters {Mapping[str, Iterable[Hashable]]} -- A list of values per column
+
+        Returns:
+            Bitmap -- The matching respondents
+        """
+        bitmap = Bitmap.full(self.size)
+        for column, values in filters.items():
+            values = list(values)
+            if values:
+                bitmap = bitmap & self.isin(column, values)
+        return bitmap
+
+    def extend(self, other: "BitmapIndex") -> "BitmapIndex":
+        """The index of the rows of this index followed by the rows of the other one.
+
+        Build the other index of new rows only and extend the index of the existing rows with
+        it instead of rebuilding the index of all rows. A column is multi-select if it is in
+        either index, as an answer without separator is a single answer option
+
+        Arguments:
+            other {BitmapIndex} -- An index of the same columns
+
+        Returns:
+            BitmapIndex -- The index of self.size + other.size rows
+        """
+        if self.columns != other.columns:
+            raise ValueError(
+                f"Cannot extend an index of {self.columns} with one of {other.columns}"
+            )
+        bitmaps: Dict[str, Dict[Hashable, Bitmap]] = {}
+        for column, column_bitmaps in self.bitmaps.items():
+            other_bitmaps = other.bitmaps[column]
+            values = list(column_bitmaps) + [
+                value for value in other_bitmaps if value not in column_bitmaps
+            ]
+            bitmaps[column] = {
+                value: column_bitmaps.get(value, Bitmap.empty(self.size)).extend(
+                    other_bitmaps.get(value, Bitmap.empty(other.size))
+                )
+                for value in values
+            }
+        multi_select_columns = [
+            column
+            for column in self.columns
+            if column in self.multi_select_columns
+            or column in other.multi_select_columns
+        ]
+        return BitmapIndex(bitmaps, self.size + other.size, multi_select_columns)
+
+    def select(self, results: pd.DataFrame, bitmap: Bitmap) -> pd.DataFrame:
+        """The rows of the results in the bitmap
+
+        Arguments:
+            results {pd.DataFrame} -- The DataFrame the index was built from
+            bitmap {Bitmap} -- A Bitmap from this index
+
+        Returns:
+            pd.DataFrame -- The matching rows
+        """
+        if len(results) != self.size:
+            raise ValueError(
+                f"The index was built for {self.size} rows but the results has {len(results)}"
+            )
+        return results.iloc[bitmap.to_positions()]
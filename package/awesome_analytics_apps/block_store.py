@@ -0,0 +1,405 @@
+"""This module provides a block store for random access to the rows of a large CSV file.
+
+A deflated zip member can only be read from the start. So reading a few rows at the end of the
+survey results means decompressing the whole file. The block store recompresses the CSV once into
+independently zlib compressed blocks of BLOCK_ROWS records each, and writes an index with the byte
+offsets of the blocks. Reading a range or a sample of rows then only decompresses the blocks
+containing them.
+
+The store is a directory with two files
+
+- blocks.bin: The compressed blocks one after another.
+- index.json: The CSV header, the offsets of the blocks and the fingerprint of the source.
+
+New rows can be appended as blocks at the end without rewriting the store.
+"""
+import io
+import json
+import os
+import pathlib
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import IO, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+BLOCK_ROWS = 5000
+BLOCKS_FILE = "blocks.bin"
+INDEX_FILE = "index.json"
+COMPRESSION_LEVEL = 6
+
+
+@dataclass
+class Block:
+    """The location of a block of rows in the blocks file"""
+
+    offset: int
+    length: int
+    first_row: int
+    rows: int
+
+    @property
+    def stop_row(self) -> int:
+        """The row after the last row of the block"""
+        return self.first_row + self.rows
+
+
+@dataclass
+class BlockIndex:
+    """The index of a block store"""
+
+    header: str
+    source: str
+    blocks: List[Block] = field(default_factory=list)
+    # The number of batches of rows appended after the store was built
+    batches: int = 0
+
+    @property
+    def rows(self) -> int:
+        """The total number of rows in the store"""
+        return self.blocks[-1].stop_row if self.blocks else 0
+
+    def blocks_for(self, start: int, stop: int) -> List[Block]:
+        """The blocks containing the rows from start to stop
+
+        Arguments:
+            start {int} -- The first row
+            stop {int} -- The row after the last row
+
+        Returns:
+            List[Block] -- The blocks in row order
+        """
+        return [
+            block
+            for block in self.blocks
+            if block.first_row < stop and block.stop_row > start
+        ]
+
+    def to_dict(self) -> dict:
+        """The index as a JSON serializable dictionary"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BlockIndex":
+        """The index from a dictionary created by to_dict"""
+        data = dict(data)
+        data["blocks"] = [Block(**block) for block in data["blocks"]]
+        return cls(**data)
+
+
+def _terminate(record: bytes) -> bytes:
+    return record if record.endswith(b"\n") else record + b"\n"
+
+
+def iter_records(file: IO[bytes]) -> Iterator[bytes]:
+    """The CSV records of the file including the line endings.
+
+    A quoted value can contain line breaks, so a record can span several lines. As quotes inside
+    a quoted value are escaped by doubling them, a record is complete when it contains an even
+    number of quotes. A last record without a line ending gets one, so records appended later
+    start on a new line.
+
+    Arguments:
+        file {IO[bytes]} -- A CSV file opened in binary mode
+
+    Yields:
+        Iterator[bytes] -- The records
+    """
+    record = b""
+    quotes = 0
+    for line in file:
+        record += line
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            if record.strip():
+                yield _terminate(record)
+            record = b""
+            quotes = 0
+    if record.strip():
+        yield _terminate(record)
+
+
+def write_index(directory: pathlib.Path, index: BlockIndex):
+    """Writes the index of the block store. It replaces the old index atomically
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+        index {BlockIndex} -- The index
+    """
+    temporary_file = directory / (INDEX_FILE + ".tmp")
+    with open(temporary_file, "w") as file:
+        json.dump(index.to_dict(), file)
+    os.replace(temporary_file, directory / INDEX_FILE)
+
+
+def _write_blocks(
+    records: Iterator[bytes],
+    file: IO[bytes],
+    offset: int,
+    first_row: int,
+    block_rows: int,
+) -> List[Block]:
+    blocks = []
+    buffer: List[bytes] = []
+
+    def flush():
+        nonlocal offset, first_row
+        compressed = zlib.compress(b"".join(buffer), COMPRESSION_LEVEL)
+        file.write(compressed)
+        blocks.append(Block(offset, len(compressed), first_row, len(buffer)))
+        offset += len(compressed)
+        first_row += len(buffer)
+        buffer.clear()
+
+    for record in records:
+        buffer.append(record)
+        if len(buffer) == block_rows:
+            flush()
+    if buffer:
+        flush()
+    return blocks
+
+
+def build(
+    file: IO[bytes],
+    directory: pathlib.Path,
+    source: str = "",
+    block_rows: int = BLOCK_ROWS,
+) -> BlockIndex:
+    """Builds a block store of the CSV file
+
+    Arguments:
+        file {IO[bytes]} -- A CSV file opened in binary mode, for example a zip member
+        directory {pathlib.Path} -- The directory of the store
+
+    Keyword Arguments:
+        source {str} -- A fingerprint of the source. Used to identify a stale store
+            (default: {""})
+        block_rows {int} -- The number of rows per block (default: {BLOCK_ROWS})
+
+    Returns:
+        BlockIndex -- The index of the store
+    """
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    records = iter_records(file)
+    header = next(records, b"").decode("utf-8")
+
+    temporary_file = directory / (BLOCKS_FILE + ".tmp")
+    with open(temporary_file, "wb") as blocks_file:
+        blocks = _write_blocks(records, blocks_file, 0, 0, block_rows)
+    os.replace(temporary_file, directory / BLOCKS_FILE)
+
+    index = BlockIndex(header=header, source=source, blocks=blocks)
+    write_index(directory, index)
+    return index
+
+
+def append_blocks(
+    file: IO[bytes],
+    directory: pathlib.Path,
+    index: BlockIndex,
+    block_rows: int = BLOCK_ROWS,
+) -> BlockIndex:
+    """Writes the CSV records of the file as new blocks after the last block of the index.
+
+    The index is not written, so readers do not see the new blocks until write_index is called.
+    This lets the caller check the new blocks first. Blocks that never get indexed are
+    overwritten by the next append
+
+    Arguments:
+        file {IO[bytes]} -- A CSV file without a header opened in binary mode. The columns must
+            be in the order of the header of the store
+        directory {pathlib.Path} -- The directory of the store
+        index {BlockIndex} -- The current index of the store
+
+    Keyword Arguments:
+        block_rows {int} -- The number of rows per block (default: {BLOCK_ROWS})
+
+    Returns:
+        BlockIndex -- The new index of the store. The number of batches is incremented
+    """
+    directory = pathlib.Path(directory)
+    offset = index.blocks[-1].offset + index.blocks[-1].length if index.blocks else 0
+    with open(directory / BLOCKS_FILE, "r+b") as blocks_file:
+        # Drop anything an interrupted append left after the last indexed block
+        blocks_file.truncate(offset)
+        blocks_file.seek(offset)
+        blocks = _write_blocks(
+            iter_records(file), blocks_file, offset, index.rows, block_rows
+        )
+        blocks_file.flush()
+        os.fsync(blocks_file.fileno())
+
+    return BlockIndex(
+        header=index.header,
+        source=index.source,
+        blocks=index.blocks + blocks,
+        batches=index.batches + 1,
+    )
+
+
+def append(
+    file: IO[bytes],
+    directory: pathlib.Path,
+    index: BlockIndex,
+    block_rows: int = BLOCK_ROWS,
+) -> BlockIndex:
+    """Appends the CSV records of the file to the block store.
+
+    Only the new rows are compressed. They start a new block, so the existing blocks are not
+    rewritten and readers of the old index are not affected
+
+    Arguments:
+        file {IO[bytes]} -- A CSV file without a header opened in binary mode. The columns must
+            be in the order of the header of the store
+        directory {pathlib.Path} -- The directory of the store
+        index {BlockIndex} -- The current index of the store
+
+    Keyword Arguments:
+        block_rows {int} -- The number of rows per block (default: {BLOCK_ROWS})
+
+    Returns:
+        BlockIndex -- The new index of the store. The number of batches is incremented
+    """
+    index = append_blocks(file, directory, index, block_rows)
+    write_index(directory, index)
+    return index
+
+
+def read_index(directory: pathlib.Path) -> Optional[BlockIndex]:
+    """The index of the block store in the directory
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+
+    Returns:
+        Optional[BlockIndex] -- The index or None if there is no store
+    """
+    path = pathlib.Path(directory) / INDEX_FILE
+    if not path.exists():
+        return None
+    with open(path) as file:
+        return BlockIndex.from_dict(json.load(file))
+
+
+def partition_blocks(index: BlockIndex, partition_rows: int) -> List[List[Block]]:
+    """The blocks grouped into partitions of about partition_rows rows
+
+    Arguments:
+        index {BlockIndex} -- The index of the store
+        partition_rows {int} -- The number of rows per partition
+
+    Returns:
+        List[List[Block]] -- The partitions in row order
+    """
+    partitions: List[List[Block]] = []
+    rows = partition_rows
+    for block in index.blocks:
+        if rows >= partition_rows:
+            partitions.append([])
+            rows = 0
+        partitions[-1].append(block)
+        rows += block.rows
+    return partitions
+
+
+def read_blocks(
+    directory: pathlib.Path,
+    index: BlockIndex,
+    blocks: Sequence[Block],
+    dtype: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """The rows of the blocks
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+        index {BlockIndex} -- The index of the store
+        blocks {Sequence[Block]} -- The blocks to read
+
+    Keyword Arguments:
+        dtype {Optional[Dict[str, str]]} -- The types of the columns. If None they are inferred
+            from the blocks (default: {None})
+
+    Returns:
+        pd.DataFrame -- The rows. The index is the row number in the store
+    """
+    data = [index.header.encode("utf-8")]
+    row_numbers = []
+    with open(pathlib.Path(directory) / BLOCKS_FILE, "rb") as file:
+        for block in blocks:
+            file.seek(block.offset)
+            data.append(zlib.decompress(file.read(block.length)))
+            row_numbers.append(np.arange(block.first_row, block.stop_row))
+    frame = pd.read_csv(io.BytesIO(b"".join(data)), dtype=dtype)
+    frame.index = (
+        np.concatenate(row_numbers) if row_numbers else np.array([], dtype=np.int64)
+    )
+    return frame
+
+
+def read_rows(
+    directory: pathlib.Path,
+    index: BlockIndex,
+    rows: slice,
+    dtype: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """The rows in the slice. Only the blocks containing the rows are decompressed
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+        index {BlockIndex} -- The index of the store
+        rows {slice} -- The rows to read, for example slice(1000, 2000)
+
+    Keyword Arguments:
+        dtype {Optional[Dict[str, str]]} -- The types of the columns. If None they are inferred
+            from the blocks read, so they can differ between slices (default: {None})
+
+    Returns:
+        pd.DataFrame -- The rows. The index is the row number in the store
+    """
+    start, stop, step = rows.indices(index.rows)
+    if step < 0:
+        return read_rows(
+            directory, index, slice(stop + 1, start + 1), dtype=dtype
+        ).iloc[::step]
+    frame = read_blocks(directory, index, index.blocks_for(start, stop), dtype=dtype)
+    return frame.loc[start : stop - 1 : step]
+
+
+def sample_rows(
+    directory: pathlib.Path,
+    index: BlockIndex,
+    n: int,
+    random_state: Optional[int] = None,
+    dtype: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """A random sample of rows.
+
+    The sample is drawn from randomly chosen blocks so only about n / BLOCK_ROWS blocks are
+    decompressed. Use it for previews, not for statistics.
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+        index {BlockIndex} -- The index of the store
+        n {int} -- The number of rows
+
+    Keyword Arguments:
+        random_state {Optional[int]} -- Seed for reproducible samples (default: {None})
+        dtype {Optional[Dict[str, str]]} -- The types of the columns. If None they are inferred
+            from the blocks read (default: {None})
+
+    Returns:
+        pd.DataFrame -- The rows in row order. The index is the row number in the store
+    """
+    random = np.random.RandomState(random_state)
+    order = random.permutation(len(index.blocks))
+    blocks: List[Block] = []
+    for position in order:
+        if sum(block.rows for block in blocks) >= n:
+            break
+        blocks.append(index.blocks[position])
+    blocks.sort(key=lambda block: block.first_row)
+    frame = read_blocks(directory, index, blocks, dtype=dtype)
+    return frame.sample(n=min(n, len(frame)), random_state=random).sort_index()
@@ -0,0 +1,80 @@
+"""This module provides a world map of the number of respondents per country.
+
+The map uses the country geometry built into Plotly. It's a simplified world map at 1:110m that
+the browser loads once from the Plotly CDN and caches, so the figure itself only holds a name and
+a count per country. A few Stack Overflow country names are not recognized by Plotly and are
+mapped by COUNTRY_ALIASES first. Answers that are not countries are left out.
+"""
+from typing import Optional
+
+import pandas as pd
+import plotly.graph_objects as go
+
+# The Stack Overflow country names Plotly does not recognize and the names it does
+COUNTRY_ALIASES = {
+    "Congo, Republic of the...": "Republic of the Congo",
+    "Hong Kong (S.A.R.)": "Hong Kong",
+    "Iran, Islamic Republic of...": "Iran",
+    "Libyan Arab Jamahiriya": "Libya",
+    "Micronesia, Federated States of...": "Micronesia",
+    "The former Yugoslav Republic of Macedonia": "North Macedonia",
+    "Venezuela, Bolivarian Republic of...": "Venezuela",
+}
+NOT_COUNTRIES = ["Nomadic", "Other Country (Not Listed Above)"]
+HEIGHT = 600
+
+
+def to_map_countries(distribution: pd.DataFrame) -> pd.DataFrame:
+    """The distribution with the countries named like Plotly names them.
+
+    Answers that are not countries are left out
+
+    Arguments:
+        distribution {pd.DataFrame} -- A DataFrame with the columns Country and Respondent like
+            the one returned by stack_overflow.respondents_per_country
+
+    Returns:
+        pd.DataFrame -- The distribution
+    """
+    distribution = distribution[~distribution["Country"].isin(NOT_COUNTRIES)]
+    return distribution.assign(Country=distribution["Country"].replace(COUNTRY_ALIASES))
+
+
+def choropleth_figure(
+    distribution: pd.DataFrame, title: Optional[str] = None, height: int = HEIGHT
+) -> go.Figure:
+    """A world map colored by the number of respondents per country
+
+    Arguments:
+        distribution {pd.DataFrame} -- A DataFrame with the columns Country and Respondent like
+            the one returned by stack_overflow.respondents_per_country
+
+    Keyword Arguments:
+        title {Optional[str]} -- The title. If None the total number of respondents
+            (default: {None})
+        height {int} -- The height in pixels (default: {HEIGHT})
+
+    Returns:
+        go.Figure -- The figure
+    """
+    distribution = to_map_countries(distribution)
+    if title is None:
+        title = f"Respondents per Country ({distribution['Respondent'].sum():,})"
+    fig = go.Figure(
+        go.Choropleth(
+            locations=distribution["Country"],
+            locationmode="country names",
+            z=distribution["Respondent"],
+            colorscale="Blues",
+            marker_line_width=0.5,
+            colorbar_title="Respondents",
+            hovertemplate="%{location}<br>Respondents: %{z:,}<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        title=title,
+        height=height,
+        margin={"l": 0, "r": 0, "t": 40, "b": 0},
+        geo={"showframe": False, "projection_type": "natural earth"},
+    )
+    return fig
@@ -0,0 +1,119 @@
+"""This module provides a column store of dictionary encoded columns saved as .npy files.
+
+Each column is stored as an array of integer codes and an array of the distinct values. The codes
+can be memory mapped, so several processes can share a dataset via the OS page cache instead of
+each holding a copy.
+"""
+import json
+import pathlib
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_FILE = "manifest.json"
+MISSING_CODE = -1
+
+
+class ColumnStore:
+    """A directory of dictionary encoded columns"""
+
+    def __init__(self, directory: Union[str, pathlib.Path]):
+        """A directory of dictionary encoded columns written by ColumnStore.write
+
+        Arguments:
+            directory {Union[str, pathlib.Path]} -- The directory of the store
+        """
+        self.directory = pathlib.Path(directory)
+        with open(self.directory / MANIFEST_FILE) as file:
+            manifest = json.load(file)
+        self.rows: int = manifest["rows"]
+        self._stems: Dict[str, str] = manifest["columns"]
+
+    @classmethod
+    def write(
+        cls,
+        results: pd.DataFrame,
+        directory: Union[str, pathlib.Path],
+        columns: Optional[List[str]] = None,
+    ) -> "ColumnStore":
+        """Writes the columns of the results to the directory
+
+        Arguments:
+            results {pd.DataFrame} -- A DataFrame like the one returned by
+                stack_overflow.read_results()
+            directory {Union[str, pathlib.Path]} -- The directory to write to
+
+        Keyword Arguments:
+            columns {Optional[List[str]]} -- The columns to write. If None all columns are
+                written (default: {None})
+
+        Returns:
+            ColumnStore -- The ColumnStore
+        """
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        if columns is None:
+            columns = list(results.columns)
+
+        # The column names are not necessarily valid file names so we number the files
+        stems = {column: f"column_{number}" for number, column in enumerate(columns)}
+        for column, stem in stems.items():
+            codes, values = pd.factorize(results[column])
+            np.save(directory / f"{stem}.codes.npy", codes.astype(np.int32))
+            np.save(
+                directory / f"{stem}.values.npy",
+                np.asarray(values, dtype=object),
+                allow_pickle=True,
+            )
+
+        with open(directory / MANIFEST_FILE, "w") as file:
+            json.dump({"rows": len(results), "columns": stems}, file)
+        return cls(directory)
+
+    @property
+    def columns(self) -> List[str]:
+        """The columns in the store"""
+        return list(self._stems)
+
+    def _path(self, column: str, kind: str) -> pathlib.Path:
+        return self.directory / f"{self._stems[column]}.{kind}.npy"
+
+    def codes(self, column: str) -> np.ndarray:
+        """The codes of the column as a read only memory mapped array.
+
+        The code of a missing value is MISSING_CODE
+
+        Arguments:
+            column {str} -- A column in the store
+
+        Returns:
+            np.ndarray -- The codes
+        """
+        return np.load(self._path(column, "codes"), mmap_mode="r")
+
+    def values(self, column: str) -> np.ndarray:
+        """The distinct values of the column. The values[code] is the value of the code.
+
+        Arguments:
+            column {str} -- A column in the store
+
+        Returns:
+            np.ndarray -- The values
+        """
+        # The files are written by us, so it's safe to unpickle them
+        return np.load(self._path(column, "values"), allow_pickle=True)
+
+    def read_column(self, column: str) -> pd.Series:
+        """The column decoded into a Series
+
+        Arguments:
+            column {str} -- A column in the store
+
+        Returns:
+            pd.Series -- The column
+        """
+        codes = np.asarray(self.codes(column))
+        values = self.values(column)
+        decoded = np.append(values, None).take(codes)
+        return pd.Series(decoded, name=column).infer_objects()
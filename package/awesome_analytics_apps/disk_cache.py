@@ -0,0 +1,263 @@
+"""This module provides a persistent cache on local disk shared by processes.
+
+The values are pickled into a SQLite database. So a frame or figure computed by one Streamlit
+process or Voila kernel is reused by the others and survives a restart.
+
+- Every entry is stored with the version of the data it was computed from. When the version
+  changes, for example because the survey data changed, the old entries are never returned and
+  are deleted on the next write.
+- When the total size of the values exceeds max_bytes, the least recently used entries are
+  evicted. A read does not write to the database. The access times are kept in memory and
+  written with the next value stored by the same cache.
+- get_or_set holds a file lock per key while computing a missing value, so concurrent processes
+  compute it only once.
+
+Example:
+
+    cache = DiskCache("cache.sqlite", version=stack_overflow.dataset_fingerprint)
+    distribution = cache.get_or_set("respondents_per_country", compute_distribution)
+"""
+import contextlib
+import functools
+import hashlib
+import os
+import pathlib
+import pickle  # nosec
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Union
+
+from awesome_analytics_apps.locking import FileLock
+
+MAX_BYTES = 1 << 30
+TIMEOUT = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+_MISSING = object()
+
+
+def _hash(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """A persistent cache on local disk shared by processes"""
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path],
+        version: Union[str, Callable[[], str]] = "",
+        max_bytes: int = MAX_BYTES,
+    ):
+        """A persistent cache on local disk shared by processes
+
+        Arguments:
+            path {Union[str, pathlib.Path]} -- The path to the SQLite database. It's created if
+                it does not exist
+
+        Keyword Arguments:
+            version {Union[str, Callable[[], str]]} -- The version of the data the values are
+                computed from, or a function returning it. A function is called on every access,
+                so a change is detected while running (default: {""})
+            max_bytes {int} -- The maximum total size of the pickled values
+                (default: {MAX_BYTES})
+        """
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+        self._version = version
+        # A connection can only be used by the thread and process that opened it
+        self._local = threading.local()
+        # The access times of the keys read since the last write
+        self._accessed: Dict[str, float] = {}
+
+    @property
+    def version(self) -> str:
+        """The current version of the data"""
+        return self._version() if callable(self._version) else self._version
+
+    def _connection(self) -> sqlite3.Connection:
+        if getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                str(self.path), timeout=TIMEOUT, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection()
+        # IMMEDIATE takes the write lock up front, so concurrent writers wait instead of failing
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """The value of the key
+
+        Arguments:
+            key {str} -- The key
+
+        Keyword Arguments:
+            default {Any} -- Returned if there is no value of the current version
+                (default: {None})
+
+        Returns:
+            Any -- The value
+        """
+        return self._get(key, default, self.version)
+
+    def _get(self, key: str, default: Any, version: str) -> Any:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM entries WHERE key = ? AND version = ?",
+                (key, version),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return default
+        self._accessed[key] = time.time()
+        return pickle.loads(row[0])  # nosec
+
+    def set(self, key: str, value: Any):
+        """Stores the value of the key. Evicts the least recently used entries if the cache is
+        full. A value larger than max_bytes is not stored
+
+        Arguments:
+            key {str} -- The key
+            value {Any} -- A picklable value
+        """
+        self._set(key, value, self.version)
+
+    def _set(self, key: str, value: Any, version: str):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        current_version = self.version
+        accessed, self._accessed = self._accessed, {}
+        with self._transaction() as connection:
+            # A value computed from an older version is stored under that version. So the
+            # entries of the current version are kept
+            connection.execute(
+                "DELETE FROM entries WHERE version NOT IN (?, ?)",
+                (version, current_version),
+            )
+            connection.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in accessed.items()],
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, version, sqlite3.Binary(data), len(data), time.time()),
+            )
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection):
+        size = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if size <= self.max_bytes:
+            return
+        entries = connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ).fetchall()
+        for key, entry_size in entries:
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            size -= entry_size
+            if size <= self.max_bytes:
+                return
+
+    def get_or_set(self, key: str, compute: Callable[[], Any]) -> Any:
+        """The value of the key. If missing it's computed and stored.
+
+        A file lock per key makes concurrent processes wait for the first one computing the value.
+        The version is read once before computing, so the value is stored under the version it was
+        computed from even if the version changes meanwhile
+
+        Arguments:
+            key {str} -- The key
+            compute {Callable[[], Any]} -- Computes the value
+
+        Returns:
+            Any -- The value
+        """
+        version = self.version
+        value = self._get(key, _MISSING, version)
+        if value is not _MISSING:
+            return value
+        with FileLock(self.path.parent / f"{self.path.name}.locks" / _hash(key)):
+            value = self._get(key, _MISSING, version)
+            if value is _MISSING:
+                value = compute()
+                self._set(key, value, version)
+        return value
+
+    def memoize(self, function: Callable) -> Callable:
+        """Decorator caching the values of the function by its picklable arguments
+
+        Arguments:
+            function {Callable} -- The function
+
+        Returns:
+            Callable -- The cached function
+        """
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            arguments = pickle.dumps((args, sorted(kwargs.items())))
+            name = f"{function.__module__}.{function.__qualname__}"
+            key = f"{name}:{hashlib.sha256(arguments).hexdigest()}"
+            return self.get_or_set(key, lambda: function(*args, **kwargs))
+
+        return wrapper
+
+    def delete(self, key: str):
+        """Deletes the value of the key if any"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        """Deletes all values"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM entries")
+
+    @property
+    def size(self) -> int:
+        """The total size of the pickled values in bytes"""
+        return (
+            self._connection()
+            .execute("SELECT COALESCE(SUM(size), 0) FROM entries")
+            .fetchone()[0]
+        )
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT 1 FROM entries WHERE key = ? AND version = ?",
+                (key, self.version),
+            )
+            .fetchone()
+        )
+        return row is not None
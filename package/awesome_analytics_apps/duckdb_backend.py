@@ -0,0 +1,225 @@
+"""This module provides an optional DuckDB query backend for the Stack Overflow Developer Survey.
+
+The results are registered as a view over the Parquet copy returned by
+stack_overflow.get_parquet_path(), so DuckDB scans only the columns a query needs. Queries run
+vectorized and multi-threaded, and can spill to disk on surveys larger than memory.
+
+Example:
+
+    database = SurveyDatabase.from_stack_overflow()
+    database.respondents_per_country(top=50)
+
+Requires duckdb. Install it with 'pip install duckdb'.
+"""
+import pathlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from awesome_analytics_apps import stack_overflow
+
+RESULTS_TABLE = "results"
+SCHEMA_TABLE = "schema"
+
+
+def _import_duckdb():
+    try:
+        import duckdb  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError(
+            "The DuckDB backend requires duckdb. Install it with 'pip install duckdb'"
+        ) from error
+    return duckdb
+
+
+def quote(identifier: str) -> str:
+    """The identifier quoted for use in SQL, for example a column name"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _where(filters: Optional[Dict[str, Iterable[Any]]]) -> Tuple[str, List[Any]]:
+    """A WHERE clause matching any of the values for all the columns and its parameters"""
+    conditions = []
+    parameters: List[Any] = []
+    for column, values in (filters or {}).items():
+        values = list(values)
+        if values:
+            placeholders = ", ".join("?" for _ in values)
+            conditions.append(f"{quote(column)} IN ({placeholders})")
+            parameters.extend(values)
+    if not conditions:
+        return "", parameters
+    return "WHERE " + " AND ".join(conditions), parameters
+
+
+class SurveyDatabase:
+    """An embedded DuckDB database of survey results"""
+
+    def __init__(
+        self,
+        database: str = ":memory:",
+        threads: Optional[int] = None,
+        memory_limit: Optional[str] = None,
+    ):
+        """An embedded DuckDB database
+
+        Keyword Arguments:
+            database {str} -- The path to the database file or ':memory:' (default: {":memory:"})
+            threads {Optional[int]} -- The number of threads. If None DuckDB uses all cores
+                (default: {None})
+            memory_limit {Optional[str]} -- For example '2GB'. Beyond the limit DuckDB spills
+                to disk (default: {None})
+        """
+        duckdb = _import_duckdb()
+        self.connection = duckdb.connect(database)
+        if threads is not None:
+            self.connection.execute(f"SET threads TO {int(threads)}")
+        if memory_limit is not None:
+            self.connection.execute(
+                "SET memory_limit = '" + memory_limit.replace("'", "") + "'"
+            )
+
+    @classmethod
+    def from_stack_overflow(cls, **kwargs) -> "SurveyDatabase":
+        """A database with the Stack Overflow Developer Survey Results and Schema
+
+        Keyword arguments are passed on to SurveyDatabase
+
+        Returns:
+            SurveyDatabase -- The database
+        """
+        database = cls(**kwargs)
+        database.register_parquet(stack_overflow.get_parquet_path())
+        database.register_frame(stack_overflow.read_schema(), SCHEMA_TABLE)
+        return database
+
+    def register_parquet(self, path: pathlib.Path, name: str = RESULTS_TABLE):
+        """Registers a view over a Parquet file or a glob of files like 'data/*.parquet'
+
+        Arguments:
+            path {pathlib.Path} -- The path or glob
+
+        Keyword Arguments:
+            name {str} -- The name of the view (default: {RESULTS_TABLE})
+        """
+        path_literal = "'" + str(path).replace("'", "''") + "'"
+        self.connection.execute(
+            f"CREATE OR REPLACE VIEW {quote(name)} AS "
+            f"SELECT * FROM read_parquet({path_literal})"
+        )
+
+    def register_frame(self, frame: pd.DataFrame, name: str = RESULTS_TABLE):
+        """Registers a DataFrame as a view without copying it
+
+        Arguments:
+            frame {pd.DataFrame} -- The DataFrame
+
+        Keyword Arguments:
+            name {str} -- The name of the view (default: {RESULTS_TABLE})
+        """
+        self.connection.register(name, frame)
+
+    def query(
+        self, sql: str, parameters: Optional[Sequence[Any]] = None
+    ) -> pd.DataFrame:
+        """The result of the SQL query as a DataFrame
+
+        Arguments:
+            sql {str} -- The query. Use ? as placeholder for parameters
+
+        Keyword Arguments:
+            parameters {Optional[Sequence[Any]]} -- The parameters (default: {None})
+
+        Returns:
+            pd.DataFrame -- The result
+        """
+        return self.connection.execute(sql, list(parameters or [])).fetchdf()
+
+    def arrow(self, sql: str, parameters: Optional[Sequence[Any]] = None):
+        """The result of the SQL query as a pyarrow Table
+
+        Arguments:
+            sql {str} -- The query. Use ? as placeholder for parameters
+
+        Keyword Arguments:
+            parameters {Optional[Sequence[Any]]} -- The parameters (default: {None})
+
+        Returns:
+            pyarrow.Table -- The result
+        """
+        return self.connection.execute(sql, list(parameters or [])).fetch_arrow_table()
+
+    def answers(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        limit: Optional[int] = 10,
+        filters: Optional[Dict[str, Iterable[Any]]] = None,
+    ) -> pd.DataFrame:
+        """The answers of the respondents
+
+        Keyword Arguments:
+            columns {Optional[Sequence[str]]} -- The columns. If None all columns
+                (default: {None})
+            limit {Optional[int]} -- The maximum number of rows. If None all rows (default: {10})
+            filters {Optional[Dict[str, Iterable[Any]]]} -- Only respondents that answered any
+                of the values for all the columns (default: {None})
+
+        Returns:
+            pd.DataFrame -- The answers
+        """
+        selected = ", ".join(quote(column) for column in columns) if columns else "*"
+        where, parameters = _where(filters)
+        sql = f"SELECT {selected} FROM {RESULTS_TABLE} {where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, parameters)
+
+    def value_counts(
+        self,
+        column: str,
+        top: Optional[int] = None,
+        filters: Optional[Dict[str, Iterable[Any]]] = None,
+        count_column: str = "Respondent",
+    ) -> pd.DataFrame:
+        """The number of respondents per answer of the column, largest first
+
+        Arguments:
+            column {str} -- The column
+
+        Keyword Arguments:
+            top {Optional[int]} -- The number of answers to return. If None all (default: {None})
+            filters {Optional[Dict[str, Iterable[Any]]]} -- Only respondents that answered any
+                of the values for all the columns (default: {None})
+            count_column {str} -- The name of the count column (default: {"Respondent"})
+
+        Returns:
+            pd.DataFrame -- A DataFrame with the column and the count_column
+        """
+        where, parameters = _where(filters)
+        condition = f"{quote(column)} IS NOT NULL"
+        where = f"{where} AND {condition}" if where else f"WHERE {condition}"
+        sql = (
+            f"SELECT {quote(column)}, COUNT(*) AS {quote(count_column)} "
+            f"FROM {RESULTS_TABLE} {where} "
+            f"GROUP BY {quote(column)} ORDER BY {quote(count_column)} DESC"
+        )
+        if top is not None:
+            sql += f" LIMIT {int(top)}"
+        return self.query(sql, parameters)
+
+    def respondents_per_country(
+        self, top: int = 50, filters: Optional[Dict[str, Iterable[Any]]] = None
+    ) -> pd.DataFrame:
+        """The number of respondents of the top countries, sorted ascending like the bar charts
+        of the apps expect
+
+        Keyword Arguments:
+            top {int} -- The number of countries (default: {50})
+            filters {Optional[Dict[str, Iterable[Any]]]} -- Only respondents that answered any
+                of the values for all the columns (default: {None})
+
+        Returns:
+            pd.DataFrame -- A DataFrame with the columns Country and Respondent
+        """
+        distribution = self.value_counts("Country", top=top, filters=filters)
+        return distribution.iloc[::-1].reset_index(drop=True)
@@ -0,0 +1,202 @@
+"""This module provides a content addressed local mirror of remote files like the survey archives.
+
+A fetched file is stored as
+
+- blobs/<sha256>: The content, named by its sha256 hash.
+- refs/<sha256 of url>.json: The url, the sha256 of the content and the ETag of the response.
+
+Downloads go to partial/<sha256 of url>.part and are moved into place with an atomic rename, so a
+reader never sees a half written blob. An interrupted download is resumed with an HTTP Range
+request. A fetched file is revalidated with its ETag, so an unchanged file is not downloaded again.
+A lock per url makes concurrent workers download each file only once.
+"""
+import hashlib
+import http.client
+import json
+import os
+import pathlib
+import urllib.error
+import urllib.request
+from typing import Dict, Optional
+
+from awesome_analytics_apps.locking import FileLock
+
+CHUNK_SIZE = 1 << 16
+TIMEOUT = 60
+
+
+class IncompleteDownloadError(OSError):
+    """Raised when the connection is closed before the whole file is downloaded"""
+
+
+def _expected_size(response) -> Optional[int]:
+    content_range = response.headers.get("Content-Range")
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total != "*" else None
+    content_length = response.headers.get("Content-Length")
+    return int(content_length) if content_length else None
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _read_json(path: pathlib.Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def _write_json(path: pathlib.Path, data: Dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_file = path.with_name(path.name + ".tmp")
+    with open(temporary_file, "w") as file:
+        json.dump(data, file)
+    os.replace(temporary_file, path)
+
+
+def _hash_file(path: pathlib.Path) -> "hashlib._Hash":
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256
+
+
+def content_hash(path: pathlib.Path) -> str:
+    """The sha256 hash of the content of the file. It's the name of the file in a ContentStore
+
+    Arguments:
+        path {pathlib.Path} -- The path to the file
+
+    Returns:
+        str -- The hexadecimal sha256 hash
+    """
+    return _hash_file(pathlib.Path(path)).hexdigest()
+
+
+class ContentStore:
+    """A content addressed local mirror of remote files"""
+
+    def __init__(self, directory: pathlib.Path):
+        """A content addressed local mirror of remote files
+
+        Arguments:
+            directory {pathlib.Path} -- The directory of the store
+        """
+        self.directory = pathlib.Path(directory)
+
+    def blob_path(self, sha256: str) -> pathlib.Path:
+        """The path of the content with the sha256 hash"""
+        return self.directory / "blobs" / sha256
+
+    def _ref_path(self, url: str) -> pathlib.Path:
+        return self.directory / "refs" / f"{_url_key(url)}.json"
+
+    def _partial_path(self, url: str) -> pathlib.Path:
+        return self.directory / "partial" / f"{_url_key(url)}.part"
+
+    def _lock_path(self, url: str) -> pathlib.Path:
+        return self.directory / "locks" / f"{_url_key(url)}.lock"
+
+    def get(self, url: str) -> Optional[pathlib.Path]:
+        """The path of the previously fetched content of the url without revalidating it
+
+        Arguments:
+            url {str} -- The url
+
+        Returns:
+            Optional[pathlib.Path] -- The path or None if the url has not been fetched
+        """
+        ref = _read_json(self._ref_path(url))
+        if ref is None or not self.blob_path(ref["sha256"]).exists():
+            return None
+        return self.blob_path(ref["sha256"])
+
+    def fetch(self, url: str, revalidate: bool = True) -> pathlib.Path:
+        """The path of the content of the url. It's downloaded if needed
+
+        Arguments:
+            url {str} -- The url
+
+        Keyword Arguments:
+            revalidate {bool} -- If True a previously fetched file is revalidated with its ETag
+                and downloaded again if it has changed. If the server cannot be reached the
+                previously fetched file is used (default: {True})
+
+        Returns:
+            pathlib.Path -- The path of the content
+        """
+        with FileLock(self._lock_path(url)):
+            path = self.get(url)
+            if path is not None and not revalidate:
+                return path
+            ref = _read_json(self._ref_path(url)) if path else None
+            try:
+                return self._download(url, etag=ref.get("etag") if ref else None)
+            except (urllib.error.URLError, http.client.HTTPException, OSError):
+                if path is None:
+                    raise
+                return path
+
+    def _request(self, url: str, headers: Dict[str, str]):
+        request = urllib.request.Request(url, headers=headers)
+        return urllib.request.urlopen(request, timeout=TIMEOUT)  # nosec
+
+    def _download(self, url: str, etag: Optional[str]) -> pathlib.Path:
+        partial_path = self._partial_path(url)
+        partial_ref_path = partial_path.with_suffix(".json")
+        partial_ref = _read_json(partial_ref_path) or {}
+        partial_path.parent.mkdir(parents=True, exist_ok=True)
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        offset = partial_path.stat().st_size if partial_path.exists() else 0
+        if offset and partial_ref.get("etag"):
+            # If-Range makes the server send the whole file if it has changed since
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = partial_ref["etag"]
+        try:
+            response = self._request(url, headers)
+        except urllib.error.HTTPError as error:
+            if error.code == 304:
+                return self.get(url)  # type: ignore
+            if error.code == 416:
+                # The partial file is not a prefix of the current file. We start over
+                partial_path.unlink()
+                return self._download(url, etag)
+            raise
+
+        with response:
+            response_etag = response.headers.get("ETag")
+            if response.status == 206:
+                sha256 = _hash_file(partial_path)
+                mode = "ab"
+            else:
+                sha256 = hashlib.sha256()
+                mode = "wb"
+            _write_json(partial_ref_path, {"url": url, "etag": response_etag})
+            with open(partial_path, mode) as file:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    file.write(chunk)
+                    sha256.update(chunk)
+            expected_size = _expected_size(response)
+
+        if expected_size is not None and partial_path.stat().st_size != expected_size:
+            # We keep the partial file so the download can be resumed
+            raise IncompleteDownloadError(
+                f"Downloaded {partial_path.stat().st_size} of {expected_size} bytes from {url}"
+            )
+
+        blob_path = self.blob_path(sha256.hexdigest())
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partial_path, blob_path)
+        _write_json(
+            self._ref_path(url),
+            {"url": url, "sha256": sha256.hexdigest(), "etag": response_etag},
+        )
+        partial_ref_path.unlink()
+        return blob_path
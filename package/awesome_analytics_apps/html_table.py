@@ -0,0 +1,105 @@
+"""This module renders DataFrames as bounded HTML tables.
+
+A DataFrame of free text answers rendered with unlimited display options can produce megabytes of
+HTML that the kernel sends to the browser. Here a table is one page of rows and at most
+MAX_COLUMNS columns, long texts are cut at MAX_CHARS characters and rows are dropped from the page
+until the HTML fits in MAX_BYTES. A caption tells what was left out.
+
+Example:
+
+    html = to_html(results, page=2)
+"""
+import html as html_escape
+import math
+from typing import Optional
+
+import pandas as pd
+
+ROWS_PER_PAGE = 50
+MAX_COLUMNS = 30
+MAX_CHARS = 100
+MAX_BYTES = 200_000
+ELLIPSIS = "…"
+
+
+def truncate_text(series: pd.Series, max_chars: int = MAX_CHARS) -> pd.Series:
+    """The series with texts longer than max_chars characters cut and ended by an ellipsis.
+
+    Other values are returned unchanged
+
+    Arguments:
+        series {pd.Series} -- The values
+
+    Keyword Arguments:
+        max_chars {int} -- The maximum number of characters (default: {MAX_CHARS})
+
+    Returns:
+        pd.Series -- The truncated values
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    long = series.map(lambda value: isinstance(value, str) and len(value) > max_chars)
+    if not long.any():
+        return series
+    series = series.astype(object)
+    series[long] = series[long].str.slice(0, max_chars - 1) + ELLIPSIS
+    return series
+
+
+def pages(frame: pd.DataFrame, rows_per_page: int = ROWS_PER_PAGE) -> int:
+    """The number of pages of the frame. An empty frame has one page"""
+    return max(1, math.ceil(len(frame) / rows_per_page))
+
+
+def _caption(frame: pd.DataFrame, start: int, stop: int, columns: int) -> str:
+    caption = f"Rows {start + 1 if stop > start else 0} to {stop} of {len(frame)}"
+    hidden = len(frame.columns) - columns
+    if hidden:
+        caption += f". {hidden} more columns not shown"
+    return caption
+
+
+def to_html(  # pylint: disable=too-many-arguments
+    frame: pd.DataFrame,
+    page: int = 0,
+    rows_per_page: int = ROWS_PER_PAGE,
+    max_columns: int = MAX_COLUMNS,
+    max_chars: int = MAX_CHARS,
+    max_bytes: Optional[int] = MAX_BYTES,
+) -> str:
+    """One page of the frame as an HTML table of bounded size
+
+    Arguments:
+        frame {pd.DataFrame} -- The frame
+
+    Keyword Arguments:
+        page {int} -- The page starting from 0 (default: {0})
+        rows_per_page {int} -- The number of rows per page (default: {ROWS_PER_PAGE})
+        max_columns {int} -- The maximum number of columns. The first ones are shown
+            (default: {MAX_COLUMNS})
+        max_chars {int} -- The maximum number of characters of a cell (default: {MAX_CHARS})
+        max_bytes {Optional[int]} -- The maximum size of the UTF-8 encoded HTML. Rows are left
+            out of the page until it fits. If None the size is not bounded
+            (default: {MAX_BYTES})
+
+    Returns:
+        str -- The HTML
+    """
+    page = max(0, min(page, pages(frame, rows_per_page) - 1))
+    start = page * rows_per_page
+    columns = frame.columns[:max_columns]
+    rows = rows_per_page
+    while True:
+        stop = min(start + rows, len(frame))
+        shown = frame.iloc[start:stop][columns].apply(
+            truncate_text, max_chars=max_chars
+        )
+        html = (
+            f"<div><small>{html_escape.escape(_caption(frame, start, stop, len(columns)))}"
+            f"</small>{shown.to_html(escape=True, notebook=False)}</div>"
+        )
+        size = len(html.encode("utf-8"))
+        if max_bytes is None or size <= max_bytes or rows <= 1:
+            return html
+        # The size is about proportional to the number of rows
+        rows = max(1, min(rows - 1, rows * max_bytes // size))
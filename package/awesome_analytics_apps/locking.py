@@ -0,0 +1,64 @@
+"""This module provides an exclusive file lock for coordinating work between processes"""
+import os
+import pathlib
+from typing import IO, Optional, Union
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """An exclusive lock on a lock file. Works across threads and processes on the same host.
+
+    Example:
+
+        with FileLock("data.lock"):
+            ...
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        """An exclusive lock on a lock file
+
+        Arguments:
+            path {Union[str, pathlib.Path]} -- The path to the lock file. It's created if it does
+                not exist
+        """
+        self.path = pathlib.Path(path)
+        self._file: Optional[IO] = None
+
+    def acquire(self):
+        """Waits for and acquires the lock"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+")
+        if os.name == "nt":
+            self._file.seek(0)
+            # LK_LOCK retries for 10 seconds, so we keep trying
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+    def release(self):
+        """Releases the lock"""
+        if self._file is None:
+            return
+        if os.name == "nt":
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
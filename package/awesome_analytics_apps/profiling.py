@@ -0,0 +1,215 @@
+"""This module provides a low overhead sampling profiler that can be switched on per session.
+
+A background thread records the Python stack of the profiled thread every INTERVAL seconds. The
+profiled code is not instrumented, so it runs at almost full speed and the profiler can be used
+on a production server. The samples are written as
+
+- a speedscope file, which you can open on https://www.speedscope.app and
+- collapsed stacks, which flamegraph.pl and most other flame graph tools read.
+
+Example:
+
+    with profile("respondents_per_country", enabled=True) as profiler:
+        ...
+    print(profiler.paths)
+"""
+import contextlib
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+INTERVAL = 0.005
+PROFILE_DIRECTORY = pathlib.Path("profiles")
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# A frame is (function, file, line) and a stack is ordered from the root to the leaf
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+
+def _stack(frame) -> Stack:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+class SamplingProfiler:
+    """Samples the stack of a thread in a background thread
+
+    Example:
+
+        with SamplingProfiler() as profiler:
+            ...
+        profiler.write("profiles", "app")
+    """
+
+    def __init__(self, interval: float = INTERVAL, thread_id: Optional[int] = None):
+        """Samples the stack of a thread in a background thread
+
+        Keyword Arguments:
+            interval {float} -- The seconds between samples (default: {INTERVAL})
+            thread_id {Optional[int]} -- The id of the thread to profile. If None the thread
+                starting the profiler (default: {None})
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: List[Stack] = []
+        self.weights: List[float] = []
+        self.paths: List[pathlib.Path] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Starts sampling"""
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(  # pylint: disable=protected-access
+                self.thread_id
+            )
+            now = time.perf_counter()
+            if frame is not None:
+                self.samples.append(_stack(frame))
+                # The time since the last sample, which is longer than the interval under load
+                self.weights.append(now - last)
+            last = now
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def duration(self) -> float:
+        """The sampled seconds"""
+        return sum(self.weights)
+
+    def collapsed(self) -> str:
+        """The samples as collapsed stacks, i.e. one line 'root;...;leaf count' per stack"""
+        counts = Counter(
+            ";".join(
+                f"{name} ({pathlib.Path(file).name}:{line})"
+                for name, file, line in stack
+            )
+            for stack in self.samples
+        )
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def to_speedscope(self, name: str) -> dict:
+        """The samples in the sampled profile format of speedscope
+
+        Arguments:
+            name {str} -- The name of the profile
+
+        Returns:
+            dict -- A JSON serializable speedscope file
+        """
+        frame_indices: Dict[Frame, int] = {}
+        samples = [
+            [frame_indices.setdefault(frame, len(frame_indices)) for frame in stack]
+            for stack in self.samples
+        ]
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "awesome_analytics_apps.profiling",
+            "shared": {
+                "frames": [
+                    {"name": function, "file": file, "line": line}
+                    for function, file, line in frame_indices
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+    def write(
+        self, directory: Union[str, pathlib.Path], name: str
+    ) -> List[pathlib.Path]:
+        """Writes the speedscope file and the collapsed stacks to the directory
+
+        Arguments:
+            directory {Union[str, pathlib.Path]} -- The directory. It's created if it does not
+                exist
+            name {str} -- The name of the profile. The files are named by it and the time
+
+        Returns:
+            List[pathlib.Path] -- The paths to the speedscope and the collapsed stacks files
+        """
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.thread_id}"
+        speedscope_path = directory / f"{stem}.speedscope.json"
+        with open(speedscope_path, "w") as file:
+            json.dump(self.to_speedscope(name), file)
+        collapsed_path = directory / f"{stem}.collapsed.txt"
+        collapsed_path.write_text(self.collapsed())
+        self.paths = [speedscope_path, collapsed_path]
+        return self.paths
+
+
+@contextlib.contextmanager
+def profile(
+    name: str,
+    enabled: bool = True,
+    directory: Union[str, pathlib.Path] = PROFILE_DIRECTORY,
+    interval: float = INTERVAL,
+) -> Iterator[Optional[SamplingProfiler]]:
+    """Profiles the block of the current thread and writes the files when it exits.
+
+    Does nothing if not enabled, so it can wrap the code of an app and be switched on per session
+
+    Arguments:
+        name {str} -- The name of the profile
+
+    Keyword Arguments:
+        enabled {bool} -- If False the block is not profiled (default: {True})
+        directory {Union[str, pathlib.Path]} -- The directory of the files
+            (default: {PROFILE_DIRECTORY})
+        interval {float} -- The seconds between samples (default: {INTERVAL})
+
+    Yields:
+        Iterator[Optional[SamplingProfiler]] -- The profiler or None if not enabled. Its paths
+            are set when the block exits
+    """
+    if not enabled:
+        yield None
+        return
+    profiler = SamplingProfiler(interval=interval)
+    try:
+        with profiler:
+            yield profiler
+    finally:
+        profiler.write(directory, name)
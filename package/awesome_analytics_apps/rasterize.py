@@ -0,0 +1,206 @@
+"""This module provides scatter plots of large point sets that are rasterized server side.
+
+Below POINT_THRESHOLD points a normal Plotly WebGL scatter plot is returned. Above it the points
+are aggregated into a WIDTH x HEIGHT grid of counts, which is shown as a heatmap. So the payload
+sent to the browser stays constant no matter how many rows the survey has.
+
+The aggregation uses Datashader if it is installed and NumPy otherwise. When the user zooms, the
+figure should be re-aggregated for the new ranges. rasterized_figure_widget does that for
+ipywidgets based apps like the Voila app.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly import express as px
+
+POINT_THRESHOLD = 20_000
+WIDTH = 300
+HEIGHT = 200
+
+Range = Tuple[float, float]
+
+
+def _range(values: pd.Series) -> Range:
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        return low - 0.5, high + 0.5
+    return low, high
+
+
+def _aggregate_datashader(
+    points: pd.DataFrame, x_range: Range, y_range: Range, width: int, height: int
+) -> np.ndarray:
+    import datashader  # pylint: disable=import-outside-toplevel
+
+    canvas = datashader.Canvas(
+        plot_width=width, plot_height=height, x_range=x_range, y_range=y_range
+    )
+    x, y = points.columns
+    return canvas.points(points, x, y, agg=datashader.count()).values
+
+
+def _aggregate_numpy(
+    points: pd.DataFrame, x_range: Range, y_range: Range, width: int, height: int
+) -> np.ndarray:
+    x, y = points.columns
+    counts, _, _ = np.histogram2d(
+        points[y].values,
+        points[x].values,
+        bins=[height, width],
+        range=[y_range, x_range],
+    )
+    return counts
+
+
+def aggregate_points(
+    points: pd.DataFrame,
+    x_range: Range,
+    y_range: Range,
+    width: int = WIDTH,
+    height: int = HEIGHT,
+) -> np.ndarray:
+    """The number of points per pixel
+
+    Arguments:
+        points {pd.DataFrame} -- A DataFrame with an x and a y column without missing values
+        x_range {Range} -- The (min, max) of the x axis
+        y_range {Range} -- The (min, max) of the y axis
+
+    Keyword Arguments:
+        width {int} -- The number of pixels along the x axis (default: {WIDTH})
+        height {int} -- The number of pixels along the y axis (default: {HEIGHT})
+
+    Returns:
+        np.ndarray -- A height x width array of counts. Row 0 is the lowest y
+    """
+    try:
+        return _aggregate_datashader(points, x_range, y_range, width, height)
+    except ImportError:
+        return _aggregate_numpy(points, x_range, y_range, width, height)
+
+
+def _points(
+    results: pd.DataFrame,
+    x: str,
+    y: str,
+    x_range: Optional[Range],
+    y_range: Optional[Range],
+) -> Tuple[pd.DataFrame, Range, Range]:
+    points = results[[x, y]].dropna()
+    if x_range is None:
+        x_range = _range(points[x]) if len(points) else (0.0, 1.0)
+    if y_range is None:
+        y_range = _range(points[y]) if len(points) else (0.0, 1.0)
+    visible = points[x].between(*x_range) & points[y].between(*y_range)
+    return points[visible], x_range, y_range
+
+
+def _heatmap(
+    points: pd.DataFrame,
+    x_range: Range,
+    y_range: Range,
+    width: int,
+    height: int,
+) -> go.Heatmap:
+    counts = aggregate_points(points, x_range, y_range, width, height).astype(np.int64)
+    # Empty pixels are transparent. Integers and nulls keep the JSON payload small
+    counts = np.where(counts == 0, None, counts).tolist()
+    x_step = (x_range[1] - x_range[0]) / width
+    y_step = (y_range[1] - y_range[0]) / height
+    return go.Heatmap(
+        z=counts,
+        x0=x_range[0] + x_step / 2,
+        dx=x_step,
+        y0=y_range[0] + y_step / 2,
+        dy=y_step,
+        colorscale="Viridis",
+        colorbar={"title": "Respondents"},
+        hovertemplate="x: %{x}<br>y: %{y}<br>Respondents: %{z}<extra></extra>",
+    )
+
+
+def scatter_figure(
+    results: pd.DataFrame,
+    x: str,
+    y: str,
+    x_range: Optional[Range] = None,
+    y_range: Optional[Range] = None,
+    threshold: int = POINT_THRESHOLD,
+    width: int = WIDTH,
+    height: int = HEIGHT,
+) -> go.Figure:
+    """A scatter plot of the y column against the x column.
+
+    If there are more than threshold points in the ranges they are rasterized server side into a
+    heatmap of width x height counts. Otherwise a WebGL scatter plot is returned.
+
+    Arguments:
+        results {pd.DataFrame} -- A DataFrame of the Results
+        x {str} -- The numeric column of the x axis, for example 'Age'
+        y {str} -- The numeric column of the y axis, for example 'ConvertedComp'
+
+    Keyword Arguments:
+        x_range {Optional[Range]} -- The (min, max) of the x axis. If None the range of the data
+            (default: {None})
+        y_range {Optional[Range]} -- The (min, max) of the y axis. If None the range of the data
+            (default: {None})
+        threshold {int} -- The maximum number of points to send to the browser
+            (default: {POINT_THRESHOLD})
+        width {int} -- The number of pixels along the x axis of a rasterized plot
+            (default: {WIDTH})
+        height {int} -- The number of pixels along the y axis of a rasterized plot
+            (default: {HEIGHT})
+
+    Returns:
+        go.Figure -- The figure
+    """
+    points, x_range, y_range = _points(results, x, y, x_range, y_range)
+    if len(points) <= threshold:
+        fig = px.scatter(points, x=x, y=y, render_mode="webgl")
+    else:
+        fig = go.Figure(_heatmap(points, x_range, y_range, width, height))
+    fig.update_layout(
+        title=f"{y} vs {x} ({len(points):,} respondents)",
+        xaxis={"title": x, "range": list(x_range)},
+        yaxis={"title": y, "range": list(y_range)},
+    )
+    return fig
+
+
+def rasterized_figure_widget(
+    results: pd.DataFrame, x: str, y: str, threshold: int = POINT_THRESHOLD
+) -> go.FigureWidget:
+    """A FigureWidget of the scatter_figure that is re-aggregated when the user zooms
+
+    Arguments:
+        results {pd.DataFrame} -- A DataFrame of the Results
+        x {str} -- The numeric column of the x axis, for example 'Age'
+        y {str} -- The numeric column of the y axis, for example 'ConvertedComp'
+
+    Keyword Arguments:
+        threshold {int} -- The maximum number of points to send to the browser
+            (default: {POINT_THRESHOLD})
+
+    Returns:
+        go.FigureWidget -- The figure widget
+    """
+    widget = go.FigureWidget(scatter_figure(results, x, y, threshold=threshold))
+
+    def update(layout, x_range, y_range):  # pylint: disable=unused-argument
+        fig = scatter_figure(
+            results,
+            x,
+            y,
+            x_range=tuple(x_range),
+            y_range=tuple(y_range),
+            threshold=threshold,
+        )
+        with widget.batch_update():
+            widget.data = []
+            widget.add_traces(fig.data)
+            widget.layout.title = fig.layout.title
+
+    widget.layout.on_change(update, "xaxis.range", "yaxis.range")
+    return widget
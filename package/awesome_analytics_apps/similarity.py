@@ -0,0 +1,237 @@
+"""This module provides a nearest neighbour index of respondents over their categorical answers.
+
+Each respondent is encoded as a bit vector with one bit per answer option, i.e. per distinct value
+of a single choice column and per option of a multi-select column like 'DevType'. The vectors are
+stored as NumPy packed bits, one row of bytes per respondent. The distance between two respondents
+is the Hamming distance, i.e. the number of answer options selected by only one of them. It's
+computed for all respondents at once with a bitwise XOR and a popcount of the bytes.
+
+Example:
+
+    index = SimilarityIndex.build(results, columns=["Country", "DevType", "LanguageWorkedWith"])
+    positions, distances = index.similar_to(0, k=10)
+    positions, distances = index.nearest(index.encode({"Country": "Denmark"}), k=10)
+"""
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from awesome_analytics_apps.bitmap_index import (
+    MAX_CARDINALITY,
+    MULTI_SELECT_SEPARATOR,
+    _is_multi_select,
+)
+
+# The number of respondents compared per step. It bounds the memory of the temporary arrays
+CHUNK_ROWS = 1 << 16
+# Number of set bits in each possible byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+Answer = Union[Hashable, Iterable[Hashable]]
+
+
+def _popcount(bits: np.ndarray) -> np.ndarray:
+    """The number of set bits per row of a 2d array of bytes"""
+    if hasattr(np, "bitwise_count"):
+        # NumPy 2 counts the bits of 8 bytes per instruction
+        padding = -bits.shape[1] % 8
+        if padding:
+            bits = np.pad(bits, ((0, 0), (0, padding)))
+        words = np.ascontiguousarray(bits).view(np.uint64)
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT[bits].sum(axis=1, dtype=np.int64)
+
+
+class SimilarityIndex:
+    """Bit vectors of the categorical answers of the respondents for nearest neighbour search.
+
+    Build it once with SimilarityIndex.build(results) and keep it alongside the DataFrame. The
+    positions returned are the row positions in the DataFrame it was built from.
+    """
+
+    def __init__(
+        self,
+        bits: np.ndarray,
+        features: List[Tuple[str, Hashable]],
+        multi_select_columns: Optional[List[str]] = None,
+    ):
+        """Bit vectors of the categorical answers of the respondents
+
+        Arguments:
+            bits {np.ndarray} -- The packed bits. One row of bytes per respondent
+            features {List[Tuple[str, Hashable]]} -- The (column, answer) of each bit
+
+        Keyword Arguments:
+            multi_select_columns {Optional[List[str]]} -- The columns encoded per answer
+                option instead of per value (default: {None})
+        """
+        self.bits = bits
+        self.features = features
+        self.multi_select_columns = multi_select_columns or []
+        self._feature_positions = {
+            feature: position for position, feature in enumerate(features)
+        }
+
+    @classmethod
+    def build(
+        cls,
+        results: pd.DataFrame,
+        columns: Optional[List[str]] = None,
+        separator: str = MULTI_SELECT_SEPARATOR,
+        max_cardinality: int = MAX_CARDINALITY,
+    ) -> "SimilarityIndex":
+        """Builds a SimilarityIndex of the categorical columns of the results
+
+        Arguments:
+            results {pd.DataFrame} -- A DataFrame like the one returned by
+                stack_overflow.read_results()
+
+        Keyword Arguments:
+            columns {Optional[List[str]]} -- The columns to encode. If None all text columns
+                with at most max_cardinality distinct values are encoded (default: {None})
+            separator {str} -- The separator of multi-select answers (default: {";"})
+            max_cardinality {int} -- The maximum number of distinct values of an
+                automatically selected column (default: {MAX_CARDINALITY})
+
+        Returns:
+            SimilarityIndex -- The index
+        """
+        size = len(results)
+        automatic = columns is None
+        if columns is None:
+            columns = [
+                column
+                for column in results.columns
+                if not pd.api.types.is_numeric_dtype(results[column])
+            ]
+
+        features: List[Tuple[str, Hashable]] = []
+        multi_select_columns = []
+        rows_and_features = []
+        for column in columns:
+            series = pd.Series(results[column].values, index=np.arange(size))
+            multi_select = _is_multi_select(series, separator)
+            if multi_select:
+                series = series.str.split(separator).explode()
+            series = series.dropna()
+            codes, uniques = pd.factorize(series)
+            if automatic and len(uniques) > max_cardinality:
+                continue
+            if multi_select:
+                multi_select_columns.append(column)
+            rows_and_features.append((series.index.values, codes + len(features)))
+            features.extend((column, value) for value in uniques)
+
+        bits = np.zeros((size, (len(features) + 7) // 8), dtype=np.uint8)
+        for rows, codes in rows_and_features:
+            # np.packbits is big endian, so feature 0 is the highest bit of byte 0
+            masks = (0x80 >> (codes % 8)).astype(np.uint8)
+            np.bitwise_or.at(bits, (rows, codes // 8), masks)
+        return cls(bits, features, multi_select_columns)
+
+    @property
+    def size(self) -> int:
+        """The number of respondents"""
+        return len(self.bits)
+
+    @property
+    def columns(self) -> List[str]:
+        """The encoded columns"""
+        return list(dict.fromkeys(column for column, _ in self.features))
+
+    def encode(self, profile: Mapping[str, Answer]) -> np.ndarray:
+        """The bit vector of a hypothetical respondent
+
+        Arguments:
+            profile {Mapping[str, Answer]} -- The answer per column, or a list of answers for a
+                multi-select column. Answers that are not in the index are ignored
+
+        Returns:
+            np.ndarray -- The packed bits of the profile
+        """
+        mask = np.zeros(len(self.features), dtype=bool)
+        for column, answers in profile.items():
+            if isinstance(answers, str) or not isinstance(answers, Iterable):
+                answers = [answers]
+            for answer in answers:
+                position = self._feature_positions.get((column, answer))
+                if position is not None:
+                    mask[position] = True
+        return np.packbits(mask)
+
+    def decode(self, position: int) -> Dict[str, List[Hashable]]:
+        """The answers of the respondent at the row position
+
+        Arguments:
+            position {int} -- A row position
+
+        Returns:
+            Dict[str, List[Hashable]] -- The answers per answered column
+        """
+        mask = np.unpackbits(self.bits[position])[: len(self.features)]
+        answers: Dict[str, List[Hashable]] = {}
+        for feature in np.flatnonzero(mask):
+            column, answer = self.features[feature]
+            answers.setdefault(column, []).append(answer)
+        return answers
+
+    def distances(self, vector: np.ndarray) -> np.ndarray:
+        """The Hamming distances of all respondents to the bit vector
+
+        Arguments:
+            vector {np.ndarray} -- Packed bits like the ones returned by encode
+
+        Returns:
+            np.ndarray -- The distance per row position
+        """
+        distances = np.empty(self.size, dtype=np.int64)
+        for start in range(0, self.size, CHUNK_ROWS):
+            stop = start + CHUNK_ROWS
+            distances[start:stop] = _popcount(
+                np.bitwise_xor(self.bits[start:stop], vector)
+            )
+        return distances
+
+    def nearest(
+        self, vector: np.ndarray, k: int = 10, exclude: Iterable[int] = ()
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The respondents nearest to the bit vector
+
+        Arguments:
+            vector {np.ndarray} -- Packed bits like the ones returned by encode
+
+        Keyword Arguments:
+            k {int} -- The number of respondents (default: {10})
+            exclude {Iterable[int]} -- Row positions to leave out (default: {()})
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray] -- The row positions and distances sorted by
+                distance and then by position
+        """
+        distances = self.distances(vector)
+        exclude = np.asarray(list(exclude), dtype=np.int64)
+        if len(exclude):
+            distances[exclude] = np.iinfo(np.int64).max
+        k = max(0, min(k, self.size - len(np.unique(exclude))))
+        if k == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        # Only the k nearest are sorted
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.lexsort((candidates, distances[candidates]))]
+        return candidates, distances[candidates]
+
+    def similar_to(self, position: int, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """The respondents most similar to the respondent at the row position
+
+        Arguments:
+            position {int} -- A row position
+
+        Keyword Arguments:
+            k {int} -- The number of respondents (default: {10})
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray] -- The row positions and distances sorted by
+                distance. The respondent itself is left out
+        """
+        return self.nearest(self.bits[position], k=k, exclude=[position])
@@ -0,0 +1,477 @@
+"""This module provides sketches, i.e. small summaries of large columns with bounded error.
+
+- KllSketch: Approximate quantiles of a numeric column like 'ConvertedComp'.
+- CountMinSketch: Approximate counts of any answer of a categorical column.
+- SpaceSavingSketch: The approximate top answers of a categorical column like 'Country'.
+
+A sketch is built in one pass over chunks of the data with update and uses constant memory no
+matter how many rows there are. Sketches of different chunks or processes are combined with
+merge, and they are serialized with to_dict and from_dict.
+
+Example:
+
+    sketch = KllSketch()
+    for chunk in stack_overflow.iter_results():
+        sketch.update(chunk["ConvertedComp"])
+    sketch.quantiles([0.5, 0.9, 0.99])
+"""
+import hashlib
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+KLL_K = 200
+KLL_MIN_CAPACITY = 8
+KLL_DECAY = 2 / 3
+COUNT_MIN_WIDTH = 2048
+COUNT_MIN_DEPTH = 5
+SPACE_SAVING_CAPACITY = 200
+MULTI_SELECT_SEPARATOR = ";"
+
+
+class KllSketch:
+    """A KLL sketch of the quantiles of a numeric column.
+
+    Items are kept in levels. An item in level h represents 2**h items of the column. When a level
+    is full, it's sorted and every other item is promoted to the next level. With the default
+    k=200 the rank error is about 1% and the sketch holds a few hundred items.
+    """
+
+    def __init__(self, k: int = KLL_K, seed: Optional[int] = None):
+        """A KLL sketch of the quantiles of a numeric column
+
+        Keyword Arguments:
+            k {int} -- The capacity of the top level. A larger k is more accurate
+                (default: {KLL_K})
+            seed {Optional[int]} -- Seed of the random compactions (default: {None})
+        """
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._random = np.random.RandomState(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(KLL_MIN_CAPACITY, int(np.ceil(self.k * KLL_DECAY**depth)))
+
+    def _compact(self, level: int):
+        if level + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        items = np.sort(self.levels[level])
+        # An odd item stays in the level, so the total weight is preserved
+        odd = len(items) % 2
+        self.levels[level] = items[len(items) - odd :]
+        items = items[: len(items) - odd]
+        offset = self._random.randint(2)
+        self.levels[level + 1] = np.concatenate(
+            [self.levels[level + 1], items[offset::2]]
+        )
+
+    def _compress(self):
+        while True:
+            full = [
+                level
+                for level, items in enumerate(self.levels)
+                if len(items) > self._capacity(level)
+            ]
+            if not full:
+                return
+            self._compact(full[0])
+
+    def update(self, values: Iterable[float]) -> "KllSketch":
+        """Adds the values. Missing values are ignored
+
+        Arguments:
+            values {Iterable[float]} -- The values, for example a chunk of a column
+
+        Returns:
+            KllSketch -- The sketch
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KllSketch") -> "KllSketch":
+        """Adds the values of the other sketch
+
+        Arguments:
+            other {KllSketch} -- A sketch of other values of the same column
+
+        Returns:
+            KllSketch -- The sketch
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(len(level_items), 2**level)
+                for level, level_items in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(items, kind="mergesort")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, fractions: Sequence[float]) -> List[float]:
+        """The approximate quantiles
+
+        Arguments:
+            fractions {Sequence[float]} -- The fractions between 0 and 1, for example [0.5, 0.9]
+
+        Returns:
+            List[float] -- The quantiles. NaN if the sketch is empty
+        """
+        if not self.count:
+            return [np.nan for _ in fractions]
+        items, cumulative_weights = self._weighted_items()
+        quantiles = []
+        for fraction in fractions:
+            if fraction <= 0:
+                quantiles.append(float(self.min))
+            elif fraction >= 1:
+                quantiles.append(float(self.max))
+            else:
+                position = np.searchsorted(
+                    cumulative_weights, fraction * cumulative_weights[-1]
+                )
+                quantiles.append(float(items[min(position, len(items) - 1)]))
+        return quantiles
+
+    def quantile(self, fraction: float) -> float:
+        """The approximate quantile, for example the median for 0.5"""
+        return self.quantiles([fraction])[0]
+
+    def rank(self, value: float) -> float:
+        """The approximate fraction of the values less than or equal to the value"""
+        if not self.count:
+            return np.nan
+        items, cumulative_weights = self._weighted_items()
+        position = np.searchsorted(items, value, side="right")
+        if position == 0:
+            return 0.0
+        return float(cumulative_weights[position - 1] / cumulative_weights[-1])
+
+    def to_dict(self) -> dict:
+        """The sketch as a JSON serializable dictionary"""
+        return {
+            "type": "kll",
+            "k": self.k,
+            "count": self.count,
+            "min": float(self.min) if self.count else None,
+            "max": float(self.max) if self.count else None,
+            "levels": [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KllSketch":
+        """The sketch from a dictionary created by to_dict"""
+        sketch = cls(k=data["k"])
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        sketch.levels = [np.asarray(items, dtype=float) for items in data["levels"]]
+        return sketch
+
+
+def _answers(values: Iterable, separator: Optional[str]) -> pd.Series:
+    series = pd.Series(values).dropna()
+    if separator and not pd.api.types.is_numeric_dtype(series):
+        series = series.astype(str).str.split(separator).explode()
+    return series.astype(str).value_counts()
+
+
+class CountMinSketch:
+    """A count-min sketch of the number of times each answer occurs.
+
+    The estimates are never too low. With probability 1 - exp(-depth) an estimate is at most
+    e / width * total too high.
+    """
+
+    def __init__(
+        self,
+        width: int = COUNT_MIN_WIDTH,
+        depth: int = COUNT_MIN_DEPTH,
+        separator: Optional[str] = MULTI_SELECT_SEPARATOR,
+    ):
+        """A count-min sketch of the number of times each answer occurs
+
+        Keyword Arguments:
+            width {int} -- The number of counters per row (default: {COUNT_MIN_WIDTH})
+            depth {int} -- The number of rows (default: {COUNT_MIN_DEPTH})
+            separator {Optional[str]} -- The separator of multi-select answers. Each answer
+                option is counted. If None the values are counted as is
+                (default: {MULTI_SELECT_SEPARATOR})
+        """
+        self.width = width
+        self.depth = depth
+        self.separator = separator
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _columns(self, answer: Hashable) -> np.ndarray:
+        # A stable hash, so sketches of different processes can be merged
+        digest = hashlib.blake2b(str(answer).encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return np.array(
+            [(first + row * second) % self.width for row in range(self.depth)]
+        )
+
+    def update(self, values: Iterable) -> "CountMinSketch":
+        """Counts the answers. Missing values are ignored
+
+        Arguments:
+            values {Iterable} -- The answers, for example a chunk of a column
+
+        Returns:
+            CountMinSketch -- The sketch
+        """
+        rows = np.arange(self.depth)
+        for answer, count in _answers(values, self.separator).items():
+            self.table[rows, self._columns(answer)] += count
+            self.total += count
+        return self
+
+    def estimate(self, answer: Hashable) -> int:
+        """The approximate number of times the answer occurs. Never too low"""
+        return int(self.table[np.arange(self.depth), self._columns(answer)].min())
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """Adds the counts of the other sketch
+
+        Arguments:
+            other {CountMinSketch} -- A sketch with the same width and depth
+
+        Returns:
+            CountMinSketch -- The sketch
+        """
+        if self.table.shape != other.table.shape:
+            raise ValueError(
+                f"Cannot merge a sketch of shape {other.table.shape} into {self.table.shape}"
+            )
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def to_dict(self) -> dict:
+        """The sketch as a JSON serializable dictionary"""
+        return {
+            "type": "count_min",
+            "width": self.width,
+            "depth": self.depth,
+            "separator": self.separator,
+            "total": self.total,
+            "table": self.table.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CountMinSketch":
+        """The sketch from a dictionary created by to_dict"""
+        sketch = cls(data["width"], data["depth"], data["separator"])
+        sketch.total = data["total"]
+        sketch.table = np.asarray(data["table"], dtype=np.int64)
+        return sketch
+
+
+class SpaceSavingSketch:
+    """A space-saving sketch of the most common answers.
+
+    At most capacity answers are counted. A new answer replaces the answer with the lowest count
+    and inherits its count as error. Counts are never too low and an answer occurring more than
+    total / capacity times is always kept.
+    """
+
+    def __init__(
+        self,
+        capacity: int = SPACE_SAVING_CAPACITY,
+        separator: Optional[str] = MULTI_SELECT_SEPARATOR,
+    ):
+        """A space-saving sketch of the most common answers
+
+        Keyword Arguments:
+            capacity {int} -- The number of answers counted (default: {SPACE_SAVING_CAPACITY})
+            separator {Optional[str]} -- The separator of multi-select answers. Each answer
+                option is counted. If None the values are counted as is
+                (default: {MULTI_SELECT_SEPARATOR})
+        """
+        self.capacity = capacity
+        self.separator = separator
+        # The count and the maximum overestimate of the count per answer
+        self.counters: Dict[str, List[int]] = {}
+        self.total = 0
+
+    def _minimum(self) -> int:
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+
+    def _add(self, answer: str, count: int):
+        if answer in self.counters:
+            self.counters[answer][0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[answer] = [count, 0]
+        else:
+            smallest = min(self.counters, key=lambda key: self.counters[key][0])
+            minimum = self.counters.pop(smallest)[0]
+            self.counters[answer] = [minimum + count, minimum]
+
+    def update(self, values: Iterable) -> "SpaceSavingSketch":
+        """Counts the answers. Missing values are ignored
+
+        Arguments:
+            values {Iterable} -- The answers, for example a chunk of a column
+
+        Returns:
+            SpaceSavingSketch -- The sketch
+        """
+        for answer, count in _answers(values, self.separator).items():
+            self._add(answer, int(count))
+            self.total += int(count)
+        return self
+
+    def merge(self, other: "SpaceSavingSketch") -> "SpaceSavingSketch":
+        """Adds the counts of the other sketch.
+
+        An answer missing from a full sketch may have occurred up to its minimum count times, so
+        the minimum is added to the count and the error
+
+        Arguments:
+            other {SpaceSavingSketch} -- A sketch of other values of the same column
+
+        Returns:
+            SpaceSavingSketch -- The sketch
+        """
+        minimum, other_minimum = self._minimum(), other._minimum()
+        counters = {}
+        for answer in set(self.counters) | set(other.counters):
+            count, error = self.counters.get(answer, [minimum, minimum])
+            other_count, other_error = other.counters.get(
+                answer, [other_minimum, other_minimum]
+            )
+            counters[answer] = [count + other_count, error + other_error]
+        largest = sorted(counters, key=lambda key: counters[key][0], reverse=True)
+        self.counters = {
+            answer: counters[answer] for answer in largest[: self.capacity]
+        }
+        self.total += other.total
+        return self
+
+    def top(self, n: int = 10) -> pd.Series:
+        """The n most common answers
+
+        Arguments:
+            n {int} -- The number of answers (default: {10})
+
+        Returns:
+            pd.Series -- The approximate counts, largest first. Never too low
+        """
+        counts = pd.Series(
+            {answer: count for answer, (count, _) in self.counters.items()},
+            dtype="int64",
+        )
+        return counts.sort_values(ascending=False, kind="mergesort").head(n)
+
+    def error(self, answer: str) -> int:
+        """The maximum overestimate of the count of the answer"""
+        return self.counters[answer][1]
+
+    def to_dict(self) -> dict:
+        """The sketch as a JSON serializable dictionary"""
+        return {
+            "type": "space_saving",
+            "capacity": self.capacity,
+            "separator": self.separator,
+            "total": self.total,
+            "counters": [
+                [answer, count, error]
+                for answer, (count, error) in self.counters.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpaceSavingSketch":
+        """The sketch from a dictionary created by to_dict"""
+        sketch = cls(data["capacity"], data["separator"])
+        sketch.total = data["total"]
+        sketch.counters = {
+            answer: [count, error] for answer, count, error in data["counters"]
+        }
+        return sketch
+
+
+Sketch = Union[KllSketch, CountMinSketch, SpaceSavingSketch]
+SKETCH_TYPES = {
+    "kll": KllSketch,
+    "count_min": CountMinSketch,
+    "space_saving": SpaceSavingSketch,
+}
+
+
+def from_dict(data: dict) -> Sketch:
+    """The sketch from a dictionary created by the to_dict method of any sketch"""
+    return SKETCH_TYPES[data["type"]].from_dict(data)
+
+
+def summarize(
+    frame: pd.DataFrame,
+    quantile_columns: Sequence[str] = (),
+    frequency_columns: Sequence[str] = (),
+) -> Dict[str, Sketch]:
+    """Sketches of a chunk of the results
+
+    Arguments:
+        frame {pd.DataFrame} -- A chunk of the results
+
+    Keyword Arguments:
+        quantile_columns {Sequence[str]} -- The numeric columns to sketch with a KllSketch
+            (default: {()})
+        frequency_columns {Sequence[str]} -- The categorical columns to sketch with a
+            SpaceSavingSketch (default: {()})
+
+    Returns:
+        Dict[str, Sketch] -- A sketch per column
+    """
+    summary: Dict[str, Sketch] = {}
+    for column in quantile_columns:
+        summary[column] = KllSketch().update(frame[column])
+    for column in frequency_columns:
+        summary[column] = SpaceSavingSketch().update(frame[column])
+    return summary
+
+
+def merge_summaries(summaries: Iterable[Dict[str, Sketch]]) -> Dict[str, Sketch]:
+    """The summaries of several chunks merged column by column
+
+    Arguments:
+        summaries {Iterable[Dict[str, Sketch]]} -- The summaries returned by summarize
+
+    Returns:
+        Dict[str, Sketch] -- A sketch per column
+    """
+    merged: Dict[str, Sketch] = {}
+    for summary in summaries:
+        for column, sketch in summary.items():
+            if column in merged:
+                merged[column].merge(sketch)  # type: ignore
+            else:
+                merged[column] = sketch
+    return merged
@@ -1,9 +1,39 @@
 """This module provides general functionality to work with the Stack Overflow Developer Surveys"""
+import functools
+import importlib.util
+import io
+import json
+import os
 import pathlib
+import shutil
+import tempfile
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+import numpy as np
 import pandas as pd
 
+from awesome_analytics_apps import aggregation, block_store, sketches, zone_maps
+from awesome_analytics_apps.bitmap_index import BitmapIndex
+from awesome_analytics_apps.similarity import SimilarityIndex
+from awesome_analytics_apps.column_store import MANIFEST_FILE, ColumnStore
+from awesome_analytics_apps.disk_cache import DiskCache
+from awesome_analytics_apps.fetch import ContentStore, content_hash
+from awesome_analytics_apps.locking import FileLock
+
 LOCAL_ROOT = pathlib.Path(__file__).parent.parent.parent
 GITHUB_ROOT = (
     "https://raw.githubusercontent.com/MarcSkovMadsen/awesome-analytics-apps/master/"
@@ -15,20 +45,987 @@ SCHEMA_2019 = "survey_results_schema.csv"
 IMAGE_2019_URL = "https://github.com/MarcSkovMadsen/awesome-analytics-apps/blob/master/assets/images/stack_overflow_survey_2019.png?raw=true"  # pylint: disable=line-too-long
 SURVEY_2019_URL = "https://insights.stackoverflow.com/survey/2019"
 DATA_URL = "https://insights.stackoverflow.com/survey"
+CACHE = "cache/"
+BLOCK_STORE_2019 = "results_2019_blocks"
+CONTENT_STORE = "store"
+PARQUET_2019 = "results_2019"
+DISK_CACHE_2019 = "results_2019_cache.sqlite"
+COLUMN_STORE_2019 = "results_2019_columns"
+# The numeric columns of the results. The other columns are text
+COLUMN_TYPES_2019 = {
+    "Respondent": "int64",
+    "CompTotal": "float64",
+    "ConvertedComp": "float64",
+    "WorkWeekHrs": "float64",
+    "CodeRevHrs": "float64",
+    "Age": "float64",
+}
+ARROW_BLOCK_SIZE = 1 << 20
+DASK_PARTITION_ROWS = 500_000
+BACKENDS = ["pandas", "dask"]
+CHUNK_ROWS = 100_000
+TOP_ANSWERS = 10
+QUANTILE_COLUMNS = ["ConvertedComp", "WorkWeekHrs", "CodeRevHrs", "Age"]
+FREQUENCY_COLUMNS = ["Country", "DevType", "LanguageWorkedWith"]
+# The ordinal answers given as numbers in text. The answers that are not numbers are mapped to
+# the number of years below. Missing and unknown answers are NaN
+ORDINAL_NUMBERS_2019 = {
+    "YearsCode": {"Less than 1 year": 0.5, "More than 50 years": 51.0},
+    "YearsCodePro": {"Less than 1 year": 0.5, "More than 50 years": 51.0},
+    "Age1stCode": {"Younger than 5 years": 4.0, "Older than 85": 86.0},
+}
+# The ordinal answers given as text in ascending order
+ORDINAL_CATEGORIES_2019 = {
+    "OrgSize": [
+        "Just me - I am a freelancer, sole proprietor, etc.",
+        "2-9 employees",
+        "10 to 19 employees",
+        "20 to 99 employees",
+        "100 to 499 employees",
+        "500 to 999 employees",
+        "1,000 to 4,999 employees",
+        "5,000 to 9,999 employees",
+        "10,000 or more employees",
+    ],
+    "CompFreq": ["Weekly", "Monthly", "Yearly"],
+}
+ORDINAL_COLUMNS = list(ORDINAL_NUMBERS_2019) + list(ORDINAL_CATEGORIES_2019)
+# The categorical and multi-select answers compared when finding similar respondents
+SIMILARITY_COLUMNS_2019 = [
+    "MainBranch",
+    "Hobbyist",
+    "Employment",
+    "Country",
+    "EdLevel",
+    "UndergradMajor",
+    "DevType",
+    "YearsCode",
+    "OrgSize",
+    "LanguageWorkedWith",
+    "DatabaseWorkedWith",
+    "PlatformWorkedWith",
+    "WebFrameWorkedWith",
+    "MiscTechWorkedWith",
+    "DevEnviron",
+    "OpSys",
+]
+# The columns of the bitmap index the apps filter the respondents by
+FILTER_COLUMNS_2019 = ["Country", "DevType", "YearsCode"]
+
+
+def fetch_data(file_name: str, revalidate: bool = False) -> pathlib.Path:
+    """Fetches a data file from GITHUB_ROOT into the local content addressed store
+
+    Concurrent workers download the file only once and an interrupted download is resumed
+
+    Arguments:
+        file_name {str} -- The name of the file in DATA_STACK_OVERFLOW, for example ZIP_FILE_2019
+
+    Keyword Arguments:
+        revalidate {bool} -- If True a previously fetched file is downloaded again if it has
+            changed on GitHub (default: {False})
+
+    Returns:
+        pathlib.Path -- The local path to the file
+    """
+    store = ContentStore(LOCAL_ROOT / DATA_STACK_OVERFLOW / CACHE / CONTENT_STORE)
+    return store.fetch(
+        GITHUB_ROOT + DATA_STACK_OVERFLOW + file_name, revalidate=revalidate
+    )
+
+
+def _get_zip_path() -> pathlib.Path:
+    path = LOCAL_ROOT / DATA_STACK_OVERFLOW / ZIP_FILE_2019
+    if path.exists():
+        return path
+    return fetch_data(ZIP_FILE_2019)
 
 
 def _get_zip_file() -> zipfile.ZipFile:
-    return zipfile.ZipFile(LOCAL_ROOT / DATA_STACK_OVERFLOW / ZIP_FILE_2019)
+    return zipfile.ZipFile(_get_zip_path())
+
+
+def _get_block_store_path() -> pathlib.Path:
+    return LOCAL_ROOT / DATA_STACK_OVERFLOW / CACHE / BLOCK_STORE_2019
+
+
+@functools.lru_cache(maxsize=8)
+def _hash_zip_file(path: pathlib.Path, size: int, mtime_ns: int) -> str:
+    # A blob of the ContentStore is named by its hash
+    if path.parent.name == "blobs":
+        return path.name
+    hash_file = path.parent / CACHE / f"{path.name}.sha256.json"
+    if hash_file.exists():
+        with open(hash_file) as file:
+            stored = json.load(file)
+        if stored["size"] == size and stored["mtime_ns"] == mtime_ns:
+            return stored["sha256"]
+    sha256 = content_hash(path)
+    hash_file.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=hash_file.parent, suffix=".tmp", delete=False
+    ) as file:
+        json.dump({"size": size, "mtime_ns": mtime_ns, "sha256": sha256}, file)
+    os.replace(file.name, hash_file)
+    return sha256
+
+
+def _get_zip_fingerprint() -> str:
+    # The content hash, so the artifacts precomputed from a copy of the zip file, for example in
+    # the data stage of the Docker images, stay valid when only its modification time differs.
+    # The hash is only computed again when the size or modification time changes
+    path = _get_zip_path()
+    stat = path.stat()
+    return _hash_zip_file(path, stat.st_size, stat.st_mtime_ns)
+
+
+def _get_appended_index() -> Optional[block_store.BlockIndex]:
+    # The index of the block store if rows were appended to the store of the current zip file
+    index = block_store.read_index(_get_block_store_path())
+    if index is None or not index.batches or index.source != _get_zip_fingerprint():
+        return None
+    return index
+
+
+def dataset_fingerprint() -> str:
+    """A fingerprint of the survey data. It's the sha256 hash of the content of the zip file and
+    changes when the content changes or a batch of rows is appended by append_results
+
+    Returns:
+        str -- The fingerprint
+    """
+    fingerprint = _get_zip_fingerprint()
+    index = _get_appended_index()
+    if index is not None:
+        fingerprint += f"+{index.batches}"
+    return fingerprint
+
+
+def get_disk_cache() -> DiskCache:
+    """A cache on local disk of values derived from the results. It's shared by all processes
+    and survives restarts. The values are invalidated when the zip file changes or rows are
+    appended
+
+    Returns:
+        DiskCache -- The cache
+    """
+    return DiskCache(
+        LOCAL_ROOT / DATA_STACK_OVERFLOW / CACHE / DISK_CACHE_2019,
+        version=dataset_fingerprint,
+    )
+
+
+def _get_block_store_lock() -> FileLock:
+    # Serializes the writers of the block store across processes
+    return FileLock(_get_block_store_path().parent / f"{BLOCK_STORE_2019}.lock")
+
+
+def get_block_index() -> block_store.BlockIndex:
+    """The index of the block store of the results. The store is built the first time and
+    rebuilt if the zip file has changed. Rows appended by append_results are then lost.
+
+    Concurrent processes build it only once
+
+    Returns:
+        block_store.BlockIndex -- The index of the block store
+    """
+    fingerprint = _get_zip_fingerprint()
+    index = block_store.read_index(_get_block_store_path())
+    if index is not None and index.source == fingerprint:
+        return index
+    with _get_block_store_lock():
+        index = block_store.read_index(_get_block_store_path())
+        if index is None or index.source != fingerprint:
+            with _get_zip_file().open(RESULTS_2019) as file:
+                index = block_store.build(
+                    file, _get_block_store_path(), source=fingerprint
+                )
+    return index
+
+
+def get_zone_map() -> zone_maps.ZoneMap:
+    """The zone map of the block store of the results, i.e. the statistics per column of each
+    block. It's built the first time and rebuilt if the zip file has changed. When rows have been
+    appended only the statistics of the new blocks are computed.
+
+    Concurrent processes build it only once
+
+    Returns:
+        zone_maps.ZoneMap -- The zone map
+    """
+    index = get_block_index()
+    zone_map = zone_maps.read_zone_map(_get_block_store_path())
+    if (
+        zone_map is not None
+        and zone_map.source == index.source
+        and len(zone_map.blocks) == len(index.blocks)
+    ):
+        return zone_map
+    with _get_block_store_lock():
+        # Rows might have been appended or the zone map built while we waited
+        index = block_store.read_index(_get_block_store_path())
+        zone_map = zone_maps.read_zone_map(_get_block_store_path())
+        if zone_map is None or zone_map.source != index.source:
+            zone_map = zone_maps.build(
+                _get_block_store_path(), index, dtype=_get_dtypes(index)
+            )
+        elif len(zone_map.blocks) < len(index.blocks):
+            zone_map = zone_maps.update(
+                _get_block_store_path(), index, zone_map, dtype=_get_dtypes(index)
+            )
+    return zone_map
+
+
+def uninformative_questions() -> List[str]:
+    """The questions without answers or with the same answer from all respondents
+
+    Returns:
+        List[str] -- The questions
+    """
+    return get_zone_map().uninformative_columns()
+
+
+def _parse_pandas(buffer: bytes) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(buffer))
+
+
+def _parse_pyarrow(buffer: bytes) -> pd.DataFrame:
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    from pyarrow import csv  # pylint: disable=import-outside-toplevel
+
+    # We type all columns explicitly. Otherwise the type is inferred from the first block
+    # and a text column without answers in the first block fails to convert later on
+    columns = pd.read_csv(io.BytesIO(buffer), nrows=0).columns
+    column_types = {
+        column: pa.type_for_alias(COLUMN_TYPES_2019.get(column, "string"))
+        for column in columns
+    }
+    # The csv is parsed in blocks of ARROW_BLOCK_SIZE bytes in parallel
+    # by pyarrow.cpu_count() threads. The free text answers can contain quoted line breaks, so
+    # the blocks must not be split at every line break
+    table = csv.read_csv(
+        pa.py_buffer(buffer),
+        read_options=csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE),
+        parse_options=csv.ParseOptions(newlines_in_values=True),
+        convert_options=csv.ConvertOptions(
+            column_types=column_types, strings_can_be_null=True
+        ),
+    )
+    return table.to_pandas()
+
+
+PARSE_ENGINES: Dict[str, Callable[[bytes], pd.DataFrame]] = {
+    "pandas": _parse_pandas,
+    "pyarrow": _parse_pyarrow,
+}
+
+
+def _get_parse_engine(engine: str) -> Callable[[bytes], pd.DataFrame]:
+    if engine == "auto":
+        engine = "pyarrow" if importlib.util.find_spec("pyarrow") else "pandas"
+    if engine not in PARSE_ENGINES:
+        raise ValueError(
+            f"Unknown engine '{engine}'. Choose 'auto' or one of {list(PARSE_ENGINES)}"
+        )
+    return PARSE_ENGINES[engine]
 
 
-def read_results() -> pd.DataFrame:
+def _get_dtypes(index: block_store.BlockIndex) -> Dict[str, str]:
+    columns = pd.read_csv(io.StringIO(index.header), nrows=0).columns
+    # "str" is the type pandas infers for text, so the blocks are typed like a full read
+    return {column: COLUMN_TYPES_2019.get(column, "str") for column in columns}
+
+
+def _read_results_dask():
+    """The results as a lazy Dask DataFrame with one partition per DASK_PARTITION_ROWS rows of the
+    block store. The partitions are read and parsed in parallel when computed."""
+    # pylint: disable=import-outside-toplevel
+    import dask
+    import dask.dataframe as dd
+
+    directory = _get_block_store_path()
+    index = get_block_index()
+    # All partitions must have the same types, so we do not let pandas infer them per partition
+    dtype = _get_dtypes(index)
+    partitions = block_store.partition_blocks(index, DASK_PARTITION_ROWS)
+    if not partitions:
+        return dd.from_pandas(
+            block_store.read_blocks(directory, index, [], dtype=dtype), npartitions=1
+        )
+    # The index is the row number, so the divisions of the partitions are known
+    divisions = [blocks[0].first_row for blocks in partitions]
+    divisions.append(partitions[-1][-1].stop_row - 1)
+    return dd.from_delayed(
+        [
+            dask.delayed(block_store.read_blocks)(directory, index, blocks, dtype)
+            for blocks in partitions
+        ],
+        meta=block_store.read_blocks(directory, index, [], dtype=dtype),
+        divisions=divisions,
+    )
+
+
+def read_results(
+    rows: Optional[slice] = None, engine: str = "auto", backend: str = "pandas"
+) -> pd.DataFrame:
     """The Stack Overflow Developer Survey Results
 
+    Keyword Arguments:
+        rows {Optional[slice]} -- The rows to read, for example slice(1000, 2000). If not None
+            only the blocks of the block store containing the rows are decompressed
+            (default: {None})
+        engine {str} -- The engine used to parse the csv file. One of the PARSE_ENGINES.
+            'auto' reads the Parquet copy of get_parquet_path if it has been precomputed for
+            the current dataset. Otherwise it uses the multi-threaded 'pyarrow' engine if
+            pyarrow is installed and else 'pandas' (default: {"auto"})
+        backend {str} -- One of the BACKENDS. 'dask' returns a lazy dask.dataframe.DataFrame
+            partitioned by the block store for surveys larger than memory. Use
+            respondents_per_country and preview_answers to compute on both backends
+            (default: {"pandas"})
+
     Returns:
         pd.DataFrame -- A DataFrame containing the Stack Overflow Developer Survey Results
     """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Choose one of {BACKENDS}")
+    if backend == "dask":
+        if rows is not None:
+            raise ValueError(
+                "The 'dask' backend does not support rows. Use .loc instead"
+            )
+        return _read_results_dask()
+    if rows is not None:
+        index = get_block_index()
+        return block_store.read_rows(
+            _get_block_store_path(), index, rows, dtype=_get_dtypes(index)
+        )
+    if engine == "auto" and _get_parquet_file().exists():
+        # Reading the columnar copy precomputed at build time is much faster than parsing
+        try:
+            return pd.read_parquet(_get_parquet_file())
+        except ImportError:
+            pass
+    index = _get_appended_index()
+    if index is not None:
+        # The appended rows are only in the block store
+        return block_store.read_blocks(
+            _get_block_store_path(), index, index.blocks, dtype=_get_dtypes(index)
+        )
+    parse = _get_parse_engine(engine)
+    # We decompress the zip member once into memory so the parser can work on a buffer
     with _get_zip_file().open(RESULTS_2019) as file:
-        return pd.read_csv(file)
+        buffer = file.read()
+    return parse(buffer)
+
+
+def filter_results(
+    filters: Optional[Mapping[str, Iterable]] = None,
+    ranges: Optional[Mapping[str, Tuple[float, float]]] = None,
+) -> pd.DataFrame:
+    """The results matching all the filters and ranges.
+
+    Only the blocks of the block store that the zone map cannot rule out are read
+
+    Keyword Arguments:
+        filters {Optional[Mapping[str, Iterable]]} -- The answers a column must be one of, for
+            example {"Country": ["Denmark"]}. Columns without answers are ignored
+            (default: {None})
+        ranges {Optional[Mapping[str, Tuple[float, float]]]} -- The (low, high) bounds a
+            numeric column must be between, for example {"Age": (20, 30)} (default: {None})
+
+    Returns:
+        pd.DataFrame -- The matching results. The index is the row number
+    """
+    index = get_block_index()
+    blocks = get_zone_map().blocks_matching(index, filters, ranges)
+    results = block_store.read_blocks(
+        _get_block_store_path(), index, blocks, dtype=_get_dtypes(index)
+    )
+    mask = pd.Series(True, index=results.index)
+    for column, values in (filters or {}).items():
+        values = list(values)
+        if values:
+            mask &= results[column].isin(values)
+    for column, (low, high) in (ranges or {}).items():
+        mask &= results[column].between(low, high)
+    return results[mask]
+
+
+def iter_results(
+    chunk_rows: int = CHUNK_ROWS, columns: Optional[Sequence[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """The results in chunks of about chunk_rows rows read from the block store.
+
+    Only one chunk is in memory at a time
+
+    Keyword Arguments:
+        chunk_rows {int} -- The number of rows per chunk (default: {CHUNK_ROWS})
+        columns {Optional[Sequence[str]]} -- The columns to return. If None all
+            (default: {None})
+
+    Yields:
+        Iterator[pd.DataFrame] -- The chunks in row order. The index is the row number
+    """
+    directory = _get_block_store_path()
+    index = get_block_index()
+    dtype = _get_dtypes(index)
+    for blocks in block_store.partition_blocks(index, chunk_rows):
+        chunk = block_store.read_blocks(directory, index, blocks, dtype=dtype)
+        yield chunk if columns is None else chunk[list(columns)]
+
+
+def _sketch_blocks(  # pylint: disable=too-many-arguments
+    directory: pathlib.Path,
+    index: block_store.BlockIndex,
+    blocks: List[block_store.Block],
+    dtype: Dict[str, str],
+    quantile_columns: Sequence[str],
+    frequency_columns: Sequence[str],
+) -> Dict[str, dict]:
+    chunk = block_store.read_blocks(directory, index, blocks, dtype=dtype)
+    summary = sketches.summarize(chunk, quantile_columns, frequency_columns)
+    return {column: sketch.to_dict() for column, sketch in summary.items()}
+
+
+def sketch_results(
+    quantile_columns: Sequence[str] = tuple(QUANTILE_COLUMNS),
+    frequency_columns: Sequence[str] = tuple(FREQUENCY_COLUMNS),
+    chunk_rows: int = CHUNK_ROWS,
+    processes: Optional[int] = None,
+) -> Dict[str, sketches.Sketch]:
+    """Sketches of the quantiles and top answers of the results built in one pass.
+
+    The chunks of the block store are sketched in a pool of processes and the sketches are
+    merged, so the memory used does not grow with the number of rows
+
+    Keyword Arguments:
+        quantile_columns {Sequence[str]} -- The numeric columns to sketch with a KllSketch
+            (default: {QUANTILE_COLUMNS})
+        frequency_columns {Sequence[str]} -- The categorical columns to sketch with a
+            SpaceSavingSketch (default: {FREQUENCY_COLUMNS})
+        chunk_rows {int} -- The number of rows per chunk (default: {CHUNK_ROWS})
+        processes {Optional[int]} -- The number of processes. If None the number of cores is
+            used. If 1 the chunks are sketched in this process (default: {None})
+
+    Returns:
+        Dict[str, sketches.Sketch] -- A sketch per column
+    """
+    directory = _get_block_store_path()
+    index = get_block_index()
+    dtype = _get_dtypes(index)
+    arguments = [
+        (directory, index, blocks, dtype, quantile_columns, frequency_columns)
+        for blocks in block_store.partition_blocks(index, chunk_rows)
+    ]
+    if processes == 1 or len(arguments) <= 1:
+        summaries = [_sketch_blocks(*argument) for argument in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+            summaries = list(executor.map(_sketch_blocks, *zip(*arguments)))
+    return sketches.merge_summaries(
+        {column: sketches.from_dict(data) for column, data in summary.items()}
+        for summary in summaries
+    )
+
+
+def _ordinal_numbers(answers: pd.Series, numbers: Mapping[str, float]) -> pd.Series:
+    # Only the distinct answers are parsed. The rows are mapped by their codes in one lookup
+    codes, distinct = pd.factorize(answers)
+    distinct = pd.Series(distinct, dtype=object)
+    lookup = pd.to_numeric(distinct, errors="coerce").fillna(distinct.map(numbers))
+    # The last element is NaN, so the code -1 of a missing answer maps to NaN
+    lookup = np.append(lookup.to_numpy(dtype="float64"), np.nan)
+    return pd.Series(lookup[codes], index=answers.index, name=answers.name)
+
+
+def normalize_ordinals(results: pd.DataFrame) -> pd.DataFrame:
+    """The ordinal answers of the results as numbers and ordered categoricals.
+
+    The columns of ORDINAL_NUMBERS_2019 become float64 numbers of years and the columns of
+    ORDINAL_CATEGORIES_2019 become ordered categoricals, whose codes can be binned and sorted
+    with NumPy. Only the distinct answers are parsed, so it's fast for many rows
+
+    Arguments:
+        results {pd.DataFrame} -- A DataFrame of the Results
+
+    Returns:
+        pd.DataFrame -- A DataFrame of the ORDINAL_COLUMNS with the index of the results
+    """
+    columns = {
+        column: _ordinal_numbers(results[column], numbers)
+        for column, numbers in ORDINAL_NUMBERS_2019.items()
+    }
+    for column, categories in ORDINAL_CATEGORIES_2019.items():
+        # Unknown answers are missing
+        answers = results[column].where(results[column].isin(categories))
+        columns[column] = pd.Series(
+            pd.Categorical(answers, categories=categories, ordered=True),
+            index=results.index,
+            name=column,
+        )
+    return pd.DataFrame(columns, index=results.index)
+
+
+@dataclass
+class Aggregate:
+    """An aggregate of the results that is computed chunk by chunk. The aggregate of a batch of
+    new rows is merged into it, so it's maintained in O(batch) when rows are appended"""
+
+    # The columns the aggregate is computed from. None means all
+    columns: Optional[List[str]]
+    compute: Callable[[pd.DataFrame], Any]
+    merge: Callable[[Any, Any], Any]
+
+
+def _count_countries(results: pd.DataFrame) -> pd.Series:
+    return results.groupby("Country")["Respondent"].count()
+
+
+def _count_answers(results: pd.DataFrame) -> pd.Series:
+    return results.count()
+
+
+def _add_counts(first: pd.Series, second: pd.Series) -> pd.Series:
+    return first.add(second, fill_value=0).astype("int64")
+
+
+def _concat(first: pd.DataFrame, second: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([first, second])
+
+
+def _build_bitmap_index(results: pd.DataFrame) -> BitmapIndex:
+    return BitmapIndex.build(results, columns=FILTER_COLUMNS_2019)
+
+
+def _extend_bitmap_index(first: BitmapIndex, second: BitmapIndex) -> BitmapIndex:
+    return first.extend(second)
+
+
+AGGREGATES: Dict[str, Aggregate] = {
+    "respondents_per_country": Aggregate(
+        ["Country", "Respondent"], _count_countries, _add_counts
+    ),
+    "answer_counts": Aggregate(None, _count_answers, _add_counts),
+    "ordinals": Aggregate(ORDINAL_COLUMNS, normalize_ordinals, _concat),
+    "bitmap_index": Aggregate(
+        FILTER_COLUMNS_2019, _build_bitmap_index, _extend_bitmap_index
+    ),
+}
+
+
+def get_aggregate(name: str) -> Any:
+    """The aggregate of all results. It's computed once per dataset chunk by chunk, stored in
+    the disk cache and updated by append_results
+
+    Arguments:
+        name {str} -- One of the AGGREGATES
+
+    Returns:
+        Any -- The aggregate
+    """
+    aggregate = AGGREGATES[name]
+
+    def compute() -> Any:
+        values = [
+            aggregate.compute(chunk)
+            for chunk in iter_results(columns=aggregate.columns)
+        ]
+        if not values:
+            index = get_block_index()
+            empty = block_store.read_blocks(
+                _get_block_store_path(), index, [], dtype=_get_dtypes(index)
+            )
+            return aggregate.compute(empty[aggregate.columns or empty.columns])
+        return functools.reduce(aggregate.merge, values)
+
+    return get_disk_cache().get_or_set(f"aggregate:{name}", compute)
+
+
+def read_ordinals() -> pd.DataFrame:
+    """The ordinal answers of all results normalized by normalize_ordinals.
+
+    They are computed once per dataset from the block store and stored in the disk cache
+
+    Returns:
+        pd.DataFrame -- A DataFrame of the ORDINAL_COLUMNS. The index is the row number
+    """
+    return get_aggregate("ordinals")
+
+
+def get_bitmap_index() -> BitmapIndex:
+    """A BitmapIndex of the FILTER_COLUMNS_2019 of all results for filtering the respondents
+
+    Returns:
+        BitmapIndex -- The index
+    """
+    return get_aggregate("bitmap_index")
+
+
+def get_answer_counts() -> pd.Series:
+    """The number of answers to each question of all results
+
+    Returns:
+        pd.Series -- The number of answers indexed by question
+    """
+    return get_aggregate("answer_counts")
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """A SimilarityIndex of the SIMILARITY_COLUMNS_2019 of all results for finding similar
+    respondents. The row positions are the row numbers of read_results().
+
+    It's built once per dataset and stored in the disk cache
+
+    Returns:
+        SimilarityIndex -- The index
+    """
+
+    def compute() -> SimilarityIndex:
+        header = pd.read_csv(io.StringIO(get_block_index().header), nrows=0).columns
+        columns = [column for column in SIMILARITY_COLUMNS_2019 if column in header]
+        chunks = list(iter_results(columns=columns))
+        results = pd.concat(chunks) if chunks else pd.DataFrame(columns=columns)
+        return SimilarityIndex.build(results, columns=columns)
+
+    return get_disk_cache().get_or_set("similarity_index", compute)
+
+
+def _compute(frame):
+    # A Dask collection is computed. A pandas object is returned as is
+    return frame.compute() if hasattr(frame, "compute") else frame
+
+
+def respondents_per_country(results, top: int = 50) -> pd.DataFrame:
+    """The number of respondents of the top countries sorted ascending for a bar chart.
+
+    Works on the results of both the 'pandas' and the 'dask' backend
+
+    Arguments:
+        results {[type]} -- A DataFrame of the Results
+
+    Keyword Arguments:
+        top {int} -- The number of countries (default: {50})
+
+    Returns:
+        pd.DataFrame -- A DataFrame with the columns Country and Respondent
+    """
+    distribution = _compute(
+        results[["Country", "Respondent"]].groupby("Country").count()
+    )
+    return distribution.reset_index().sort_values("Respondent").tail(top)
+
+
+def get_respondents_per_country() -> pd.DataFrame:
+    """The number of respondents of all countries sorted ascending, like
+    respondents_per_country(read_results(), top=...) but without reading all the results.
+
+    The counts are aggregated once per dataset chunk by chunk and stored in the disk cache
+
+    Returns:
+        pd.DataFrame -- A DataFrame with the columns Country and Respondent
+    """
+    counts = get_aggregate("respondents_per_country")
+    distribution = counts.rename_axis("Country").rename("Respondent")
+    return distribution.reset_index().sort_values("Respondent")
+
+
+def preview_answers(
+    results, questions: Optional[List[str]] = None, rows: int = 10
+) -> pd.DataFrame:
+    """The first rows of the answers to the questions.
+
+    Works on the results of both the 'pandas' and the 'dask' backend. For the 'dask' backend only
+    the partitions needed are read
+
+    Arguments:
+        results {[type]} -- A DataFrame of the Results
+
+    Keyword Arguments:
+        questions {Optional[List[str]]} -- The questions (columns) to show. If None or empty all
+            (default: {None})
+        rows {int} -- The number of rows (default: {10})
+
+    Returns:
+        pd.DataFrame -- The answers
+    """
+    if questions:
+        results = results[questions]
+    if not hasattr(results, "partitions"):
+        return results.head(rows)
+
+    parts: List[pd.DataFrame] = []
+    remaining = rows
+    for partition in results.partitions:
+        if remaining <= 0:
+            break
+        part = partition.head(remaining, compute=True)
+        parts.append(part)
+        remaining -= len(part)
+    if not parts:
+        return results._meta  # pylint: disable=protected-access
+    return pd.concat(parts)
+
+
+def _get_parquet_file() -> pathlib.Path:
+    return (
+        LOCAL_ROOT
+        / DATA_STACK_OVERFLOW
+        / CACHE
+        / f"{PARQUET_2019}-{dataset_fingerprint()}.parquet"
+    )
+
+
+def get_parquet_path() -> pathlib.Path:
+    """The path to a Parquet copy of the results for columnar and out of core readers.
+
+    The file is written the first time and rewritten if the dataset has changed. Once it exists
+    read_results reads it instead of parsing the csv file. Requires pyarrow.
+
+    Returns:
+        pathlib.Path -- The path to the Parquet file
+    """
+    path = _get_parquet_file()
+    directory = path.parent
+    if path.exists():
+        return path
+
+    directory.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=directory, suffix=".tmp", delete=False
+    ) as file:
+        temporary_path = file.name
+    read_results().to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, path)
+    for stale_path in directory.glob(f"{PARQUET_2019}-*.parquet"):
+        if stale_path != path:
+            stale_path.unlink()
+    return path
+
+
+def get_column_store() -> ColumnStore:
+    """A ColumnStore of the results. The codes of the columns can be memory mapped and shared by
+    processes.
+
+    The store is written the first time and rewritten if the dataset has changed. Concurrent
+    processes write it only once
+
+    Returns:
+        ColumnStore -- The ColumnStore
+    """
+    directory = LOCAL_ROOT / DATA_STACK_OVERFLOW / CACHE
+    path = directory / f"{COLUMN_STORE_2019}-{dataset_fingerprint()}"
+    if (path / MANIFEST_FILE).exists():
+        return ColumnStore(path)
+
+    with _get_block_store_lock():
+        # The dataset might have changed or the store been written while we waited
+        path = directory / f"{COLUMN_STORE_2019}-{dataset_fingerprint()}"
+        if (path / MANIFEST_FILE).exists():
+            return ColumnStore(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = pathlib.Path(tempfile.mkdtemp(dir=directory, suffix=".tmp"))
+        ColumnStore.write(read_results(), temporary_path)
+        os.replace(temporary_path, path)
+        for stale_path in directory.glob(f"{COLUMN_STORE_2019}-*"):
+            if stale_path != path:
+                shutil.rmtree(stale_path)
+    return ColumnStore(path)
+
+
+def get_answers_per_question() -> Dict[str, pd.Series]:
+    """The number of respondents per answer option of every question of the results.
+
+    The questions are counted from the column store in a pool of processes, one per core, which
+    memory map the codes instead of receiving a copy of the results. The counts are computed
+    once per dataset and stored in the disk cache
+
+    Returns:
+        Dict[str, pd.Series] -- The number of respondents per answer option, largest first,
+            indexed by question
+    """
+
+    def compute() -> Dict[str, pd.Series]:
+        return aggregation.aggregate_columns(
+            get_column_store(), aggregation="answer_counts", processes=None
+        )
+
+    return get_disk_cache().get_or_set("answers_per_question", compute)
+
+
+def top_answers(questions: Sequence[str], top: int = TOP_ANSWERS) -> pd.DataFrame:
+    """The most frequent answers of all respondents to the questions.
+
+    The answers are looked up in get_answers_per_question, so no text is parsed. The options of
+    multi-select answers are counted separately
+
+    Arguments:
+        questions {Sequence[str]} -- The questions, i.e. columns of the results
+
+    Keyword Arguments:
+        top {int} -- The number of answers per question (default: {TOP_ANSWERS})
+
+    Returns:
+        pd.DataFrame -- A DataFrame with the columns Question, Answer and Respondents
+    """
+    counts = get_answers_per_question()
+    frame = pd.DataFrame(
+        [
+            (question, answer, respondents)
+            for question in questions
+            for answer, respondents in counts[question].head(top).items()
+        ],
+        columns=["Question", "Answer", "Respondents"],
+    )
+    return frame.astype({"Respondents": "int64"})
+
+
+# The steps deriving data from the zip file. They can run at build time, for example in the
+# data stage of the Docker image pipeline, so the apps do not derive the data at runtime
+PRECOMPUTE_STEPS: Dict[str, Callable] = {
+    "block store": get_block_index,
+    "zone map": get_zone_map,
+    "parquet": get_parquet_path,
+    "column store": get_column_store,
+    "answers per question": get_answers_per_question,
+    "ordinals": read_ordinals,
+    "answer counts": get_answer_counts,
+    "bitmap index": get_bitmap_index,
+    "similarity index": get_similarity_index,
+    "respondents per country": get_respondents_per_country,
+}
+
+
+def _to_result_types(
+    batch: pd.DataFrame, index: block_store.BlockIndex
+) -> pd.DataFrame:
+    # The batch with the columns and types of the results. Raises a ValueError if it cannot be
+    # converted, so a bad batch is rejected before anything is written
+    dtypes = _get_dtypes(index)
+    unknown = [column for column in batch.columns if column not in dtypes]
+    if unknown:
+        raise ValueError(f"The columns {unknown} are not in the results")
+    batch = batch.reindex(columns=list(dtypes))
+    for column, dtype in dtypes.items():
+        if dtype == "str":
+            # Text is written as is. Missing values stay missing
+            continue
+        try:
+            batch[column] = batch[column].astype(dtype)
+        except (TypeError, ValueError) as error:
+            raise ValueError(
+                f"The column '{column}' of the batch cannot be converted to {dtype}: {error}"
+            ) from error
+    return batch
+
+
+def append_results(batch: pd.DataFrame) -> str:
+    """Appends a batch of new responses to the results.
+
+    The batch is compressed into new blocks at the end of the block store. The zone map and the
+    AGGREGATES, including the bitmap index, are updated from the batch alone, so the cost is
+    O(batch) and not O(results). The fingerprint of the dataset changes, so caches keyed by it
+    pick up the new version. Other values of the disk cache, for example the similarity index,
+    are recomputed on their next use. Concurrent appends are serialized by a file lock
+
+    Arguments:
+        batch {pd.DataFrame} -- The new responses. Missing text and float columns are empty.
+            Integer columns like Respondent are required
+
+    Raises:
+        ValueError -- If the batch has columns that are not in the results or values that
+            cannot be converted to the types of the results. Nothing is written then
+
+    Returns:
+        str -- The new fingerprint of the dataset
+    """
+    directory = _get_block_store_path()
+    batch = _to_result_types(batch, get_block_index())
+    while True:
+        # The zone map and aggregates of the current version are read before the version
+        # changes. They are computed outside the lock, as get_block_index takes it to build
+        version = dataset_fingerprint()
+        index = get_block_index()
+        zone_map = get_zone_map()
+        aggregates = {name: get_aggregate(name) for name in AGGREGATES}
+        with _get_block_store_lock():
+            if dataset_fingerprint() != version:
+                # Another process appended rows in the meantime
+                continue
+            data = batch.to_csv(index=False, header=False)
+            new_index = block_store.append_blocks(
+                io.BytesIO(data.encode("utf-8")), directory, index
+            )
+            dtype = _get_dtypes(new_index)
+            # The batch is read back like the rest of the results, so the types are the same.
+            # The index is only written once the new blocks parse
+            new_results = block_store.read_blocks(
+                directory, new_index, new_index.blocks[len(index.blocks) :], dtype=dtype
+            )
+            if len(new_results) != len(batch):
+                raise ValueError(
+                    f"The batch of {len(batch)} rows was read back as {len(new_results)}"
+                )
+            block_store.write_index(directory, new_index)
+            zone_maps.update(directory, new_index, zone_map, dtype=dtype)
+
+            cache = get_disk_cache()
+            for name, aggregate in AGGREGATES.items():
+                value = aggregate.compute(
+                    new_results[aggregate.columns or new_results.columns]
+                )
+                cache.set(f"aggregate:{name}", aggregate.merge(aggregates[name], value))
+            return dataset_fingerprint()
+
+
+def refresh_results(results: pd.DataFrame, version: str) -> pd.DataFrame:
+    """The results with the rows appended since they were read.
+
+    Only the blocks of the new rows are read. If the zip file has changed all results are read
+
+    Arguments:
+        results {pd.DataFrame} -- The results as returned by read_results
+        version {str} -- The dataset_fingerprint when the results were read
+
+    Returns:
+        pd.DataFrame -- The results of the current version
+    """
+    index = get_block_index()
+    start = len(results)
+    if not version.startswith(index.source) or start > index.rows:
+        return read_results()
+    if start == index.rows:
+        return results
+    new_results = block_store.read_blocks(
+        _get_block_store_path(),
+        index,
+        index.blocks_for(start, index.rows),
+        dtype=_get_dtypes(index),
+    )
+    return pd.concat([results, new_results.loc[start:]])
+
+
+def sample_results(n: int, random_state: Optional[int] = None) -> pd.DataFrame:
+    """A random sample of the Stack Overflow Developer Survey Results for previews
+
+    Only the blocks of the block store containing the sample are decompressed
+
+    Arguments:
+        n {int} -- The number of rows
+
+    Keyword Arguments:
+        random_state {Optional[int]} -- Seed for reproducible samples (default: {None})
+
+    Returns:
+        pd.DataFrame -- A DataFrame containing a sample of the Results
+    """
+    index = get_block_index()
+    return block_store.sample_rows(
+        _get_block_store_path(),
+        index,
+        n,
+        random_state=random_state,
+        dtype=_get_dtypes(index),
+    )
 
 
 def read_schema() -> pd.DataFrame:
@@ -0,0 +1,283 @@
+"""This module provides zone maps, i.e. statistics per column of each block of a block store.
+
+For each block and column we keep the number of rows and missing values, the min and max of a
+numeric column and the distinct values if there are at most MAX_DISTINCT of them. A filter can
+then skip the blocks that cannot contain a match without reading them, and the statistics of the
+whole dataset tell which columns are empty or constant.
+
+The zone map is stored as zone_map.json next to the index of the block store. When rows are
+appended to the store, only the statistics of the new blocks are computed by update.
+"""
+import json
+import numbers
+import os
+import pathlib
+import tempfile
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from awesome_analytics_apps import block_store
+
+ZONE_MAP_FILE = "zone_map.json"
+MAX_DISTINCT = 256
+
+
+@dataclass
+class ColumnStatistics:
+    """The statistics of a column in a block or in the whole dataset"""
+
+    rows: int
+    nulls: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    # The distinct values or None if there are more than MAX_DISTINCT
+    distinct: Optional[List] = None
+
+    @classmethod
+    def of(cls, series: pd.Series) -> "ColumnStatistics":
+        """The statistics of the series"""
+        values = series.dropna()
+        statistics = cls(rows=len(series), nulls=len(series) - len(values))
+        if len(values) and pd.api.types.is_numeric_dtype(values):
+            statistics.min, statistics.max = float(values.min()), float(values.max())
+        distinct = values.unique()
+        if len(distinct) <= MAX_DISTINCT:
+            statistics.distinct = sorted(
+                (
+                    value.item() if isinstance(value, np.generic) else value
+                    for value in distinct
+                ),
+                key=str,
+            )
+        return statistics
+
+    @property
+    def is_empty(self) -> bool:
+        """True if all values are missing"""
+        return self.nulls == self.rows
+
+    @property
+    def is_constant(self) -> bool:
+        """True if all values are the same. Missing values are ignored"""
+        return self.distinct is not None and len(self.distinct) == 1
+
+    def merge(self, other: "ColumnStatistics") -> "ColumnStatistics":
+        """The statistics of the rows of both"""
+        distinct = None
+        if self.distinct is not None and other.distinct is not None:
+            union = set(self.distinct) | set(other.distinct)
+            distinct = sorted(union, key=str) if len(union) <= MAX_DISTINCT else None
+        return ColumnStatistics(
+            rows=self.rows + other.rows,
+            nulls=self.nulls + other.nulls,
+            min=_combine(min, self.min, other.min),
+            max=_combine(max, self.max, other.max),
+            distinct=distinct,
+        )
+
+    def might_contain(self, values: Iterable) -> bool:
+        """False if none of the values can be in the rows
+
+        Arguments:
+            values {Iterable} -- The values
+
+        Returns:
+            bool -- False if the block can be skipped
+        """
+        values = list(values)
+        if self.is_empty:
+            return False
+        if self.distinct is not None:
+            return bool(set(values) & set(self.distinct))
+        if self.min is not None:
+            return any(
+                isinstance(value, numbers.Real) and self.min <= value <= self.max
+                for value in values
+            )
+        return True
+
+    def might_overlap(self, low: float, high: float) -> bool:
+        """False if no value can be between low and high
+
+        Arguments:
+            low {float} -- The lower bound, inclusive
+            high {float} -- The upper bound, inclusive
+
+        Returns:
+            bool -- False if the block can be skipped
+        """
+        if self.is_empty:
+            return False
+        if self.min is None:
+            return True
+        return self.min <= high and low <= self.max
+
+
+def _combine(function, first: Optional[float], second: Optional[float]):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return function(first, second)
+
+
+@dataclass
+class ZoneMap:
+    """The statistics per column of each block of a block store"""
+
+    source: str
+    blocks: List[Dict[str, ColumnStatistics]] = field(default_factory=list)
+
+    def columns(self) -> Dict[str, ColumnStatistics]:
+        """The statistics per column of the whole dataset"""
+        statistics: Dict[str, ColumnStatistics] = {}
+        for block in self.blocks:
+            for column, block_statistics in block.items():
+                if column in statistics:
+                    statistics[column] = statistics[column].merge(block_statistics)
+                else:
+                    statistics[column] = block_statistics
+        return statistics
+
+    def uninformative_columns(self) -> List[str]:
+        """The columns that are empty or have the same answer in all rows"""
+        return [
+            column
+            for column, statistics in self.columns().items()
+            if statistics.is_empty or statistics.is_constant
+        ]
+
+    def blocks_matching(
+        self,
+        index: block_store.BlockIndex,
+        filters: Optional[Mapping[str, Iterable]] = None,
+        ranges: Optional[Mapping[str, Tuple[float, float]]] = None,
+    ) -> List[block_store.Block]:
+        """The blocks that might contain rows matching all the filters and ranges
+
+        Arguments:
+            index {block_store.BlockIndex} -- The index of the block store
+
+        Keyword Arguments:
+            filters {Optional[Mapping[str, Iterable]]} -- The values a column must be one of.
+                Columns without values are ignored (default: {None})
+            ranges {Optional[Mapping[str, Tuple[float, float]]]} -- The (low, high) bounds a
+                column must be between (default: {None})
+
+        Returns:
+            List[block_store.Block] -- The blocks in row order
+        """
+        filters = {
+            column: list(values)
+            for column, values in (filters or {}).items()
+            if list(values)
+        }
+        ranges = ranges or {}
+        return [
+            block
+            for block, statistics in zip(index.blocks, self.blocks)
+            if all(
+                statistics[column].might_contain(values)
+                for column, values in filters.items()
+            )
+            and all(
+                statistics[column].might_overlap(low, high)
+                for column, (low, high) in ranges.items()
+            )
+        ]
+
+    def to_dict(self) -> dict:
+        """The zone map as a JSON serializable dictionary"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ZoneMap":
+        """The zone map from a dictionary created by to_dict"""
+        return cls(
+            source=data["source"],
+            blocks=[
+                {
+                    column: ColumnStatistics(**statistics)
+                    for column, statistics in block.items()
+                }
+                for block in data["blocks"]
+            ],
+        )
+
+
+def build(
+    directory: pathlib.Path,
+    index: block_store.BlockIndex,
+    dtype: Optional[Dict[str, str]] = None,
+) -> ZoneMap:
+    """Builds the zone map of the block store. One block is read at a time
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+        index {block_store.BlockIndex} -- The index of the store
+
+    Keyword Arguments:
+        dtype {Optional[Dict[str, str]]} -- The types of the columns. If None they are inferred
+            per block (default: {None})
+
+    Returns:
+        ZoneMap -- The zone map. It's also written to the directory
+    """
+    return update(directory, index, ZoneMap(source=index.source), dtype=dtype)
+
+
+def update(
+    directory: pathlib.Path,
+    index: block_store.BlockIndex,
+    zone_map: ZoneMap,
+    dtype: Optional[Dict[str, str]] = None,
+) -> ZoneMap:
+    """Adds the statistics of the blocks appended to the block store since the zone map was
+    built. One block is read at a time
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+        index {block_store.BlockIndex} -- The index of the store
+        zone_map {ZoneMap} -- The zone map of the first blocks of the store
+
+    Keyword Arguments:
+        dtype {Optional[Dict[str, str]]} -- The types of the columns. If None they are inferred
+            per block (default: {None})
+
+    Returns:
+        ZoneMap -- The zone map of all blocks. It's also written to the directory
+    """
+    directory = pathlib.Path(directory)
+    zone_map = ZoneMap(source=zone_map.source, blocks=list(zone_map.blocks))
+    for block in index.blocks[len(zone_map.blocks) :]:
+        frame = block_store.read_blocks(directory, index, [block], dtype=dtype)
+        zone_map.blocks.append(
+            {column: ColumnStatistics.of(frame[column]) for column in frame.columns}
+        )
+
+    # A unique temporary file, so a concurrent writer cannot replace a half written one
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".tmp", delete=False
+    ) as file:
+        json.dump(zone_map.to_dict(), file)
+    os.replace(file.name, directory / ZONE_MAP_FILE)
+    return zone_map
+
+
+def read_zone_map(directory: pathlib.Path) -> Optional[ZoneMap]:
+    """The zone map of the block store in the directory
+
+    Arguments:
+        directory {pathlib.Path} -- The directory of the store
+
+    Returns:
+        Optional[ZoneMap] -- The zone map or None if it has not been built
+    """
+    path = pathlib.Path(directory) / ZONE_MAP_FILE
+    if not path.exists():
+        return None
+    with open(path) as file:
+        return ZoneMap.from_dict(json.load(file))
@@ -0,0 +1,23 @@
+"""Fixtures shared by the tests"""
+import zipfile
+
+import pytest
+
+from awesome_analytics_apps import stack_overflow
+
+# A small survey with answers spanning several lines
+RESULTS_CSV = "Respondent,Country,Comment\n" + "".join(
+    f'{row},Country {row % 7},"Line 1 of {row}\nLine 2 with ""quotes"""\n'
+    for row in range(1, 101)
+)
+
+
+@pytest.fixture
+def local_root(tmp_path, monkeypatch):
+    """A LOCAL_ROOT with a small survey zip file"""
+    data = tmp_path / stack_overflow.DATA_STACK_OVERFLOW
+    data.mkdir(parents=True)
+    with zipfile.ZipFile(data / stack_overflow.ZIP_FILE_2019, "w") as file:
+        file.writestr(stack_overflow.RESULTS_2019, RESULTS_CSV)
+    monkeypatch.setattr(stack_overflow, "LOCAL_ROOT", tmp_path)
+    return tmp_path
@@ -0,0 +1,61 @@
+"""Tests of the aggregation module"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from awesome_analytics_apps import aggregation
+from awesome_analytics_apps.column_store import ColumnStore
+
+RESULTS = pd.DataFrame(
+    {
+        "Country": ["Denmark", "Germany", np.nan, "Denmark", "Germany", "Denmark"],
+        "DevType": ["Data;Web", "Web", "Data", np.nan, "Web;Mobile", "Web"],
+        "Unanswered": [np.nan] * 6,
+    }
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A ColumnStore of the RESULTS"""
+    return ColumnStore.write(RESULTS, tmp_path)
+
+
+def test_aggregate_columns(store):  # pylint: disable=redefined-outer-name
+    """We test that the aggregates equal the pandas value counts"""
+    distributions = aggregation.aggregate_columns(store)
+
+    assert (
+        distributions["Country"].to_dict()
+        == RESULTS["Country"].value_counts().to_dict()
+    )
+    assert distributions["Unanswered"].empty
+
+
+def test_answer_counts(store):  # pylint: disable=redefined-outer-name
+    """We test that multi-select answers are counted per option and that a column without
+    answers has no counts"""
+    counts = aggregation.aggregate_columns(
+        store, ["DevType", "Unanswered"], aggregation="answer_counts"
+    )
+
+    assert counts["DevType"].to_dict() == {"Web": 4, "Data": 2, "Mobile": 1}
+    assert counts["Unanswered"].empty
+
+
+def test_crosstab_columns(store):  # pylint: disable=redefined-outer-name
+    """We test that the crosstab equals the pandas crosstab"""
+    crosstabs = aggregation.crosstab_columns(store, [("Country", "DevType")])
+
+    expected = pd.crosstab(RESULTS["Country"], RESULTS["DevType"])
+    actual = crosstabs[("Country", "DevType")].loc[expected.index, expected.columns]
+    np.testing.assert_array_equal(actual.to_numpy(), expected.to_numpy())
+
+
+def test_aggregate_columns_processes(store):  # pylint: disable=redefined-outer-name
+    """We test that a pool of processes gives the same aggregates"""
+    expected = aggregation.aggregate_columns(store, ["Country", "DevType"])
+    actual = aggregation.aggregate_columns(store, ["Country", "DevType"], processes=2)
+
+    for column, counts in expected.items():
+        pd.testing.assert_series_equal(actual[column], counts)
@@ -0,0 +1,95 @@
+"""Tests of the bitmap_index module"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from awesome_analytics_apps.bitmap_index import Bitmap, BitmapIndex
+
+
+@pytest.fixture
+def results():
+    """A small DataFrame like the Stack Overflow Developer Survey Results"""
+    return pd.DataFrame(
+        {
+            "Respondent": [1, 2, 3, 4, 5, 6, 7, 8, 9],
+            "Country": [
+                "Denmark",
+                "Sweden",
+                "Denmark",
+                None,
+                "Norway",
+                "Sweden",
+                "Denmark",
+                "Norway",
+                "Denmark",
+            ],
+            "DevType": [
+                "Student",
+                "Data scientist;Developer, back-end",
+                "Developer, back-end",
+                "Student;Data scientist",
+                None,
+                "Developer, back-end",
+                "Data scientist",
+                "Student",
+                "Developer, front-end;Developer, back-end",
+            ],
+        }
+    )
+
+
+def test_bitmap_operations():
+    """We test that the bitwise operations equal the boolean mask operations"""
+    left_mask = np.array(
+        [True, False, True, True, False, False, True, False, True, True]
+    )
+    right_mask = np.array(
+        [False, False, True, False, True, False, True, True, True, False]
+    )
+    left, right = Bitmap.from_mask(left_mask), Bitmap.from_mask(right_mask)
+
+    assert np.array_equal((left & right).to_mask(), left_mask & right_mask)
+    assert np.array_equal((left | right).to_mask(), left_mask | right_mask)
+    assert np.array_equal((left ^ right).to_mask(), left_mask ^ right_mask)
+    assert np.array_equal((~left).to_mask(), ~left_mask)
+    assert len(~left) == (~left_mask).sum()
+    assert len(Bitmap.full(10)) == 10
+
+
+def test_bitmap_index(results):
+    """We test that filters on the index equal the filters on the DataFrame"""
+    index = BitmapIndex.build(results)
+
+    assert index.multi_select_columns == ["DevType"]
+    assert list(index.eq("Country", "Denmark").to_positions()) == [0, 2, 6, 8]
+    assert list(index.eq("DevType", "Data scientist").to_positions()) == [1, 3, 6]
+    assert list(index.isnull("Country").to_positions()) == [3]
+    assert len(index.eq("Country", "Finland")) == 0
+
+    selected = index.match(
+        {"Country": ["Denmark", "Sweden"], "DevType": ["Developer, back-end"]}
+    )
+    expected = results["Country"].isin(["Denmark", "Sweden"]) & results[
+        "DevType"
+    ].str.contains("Developer, back-end", regex=False).fillna(False).astype(bool)
+    assert np.array_equal(selected.to_mask(), expected.values)
+    assert list(index.select(results, selected)["Respondent"]) == [2, 3, 6, 9]
+
+
+def test_extend(results):  # pylint: disable=redefined-outer-name
+    """We test that extending the index of the first rows with the index of the last rows equals
+    the index of all rows, also when only the last rows have multi-select answers"""
+    columns = ["Country", "DevType"]
+    expected = BitmapIndex.build(results, columns=columns)
+
+    for split in [1, 3, 8]:
+        first = BitmapIndex.build(results.iloc[:split], columns=columns)
+        last = BitmapIndex.build(results.iloc[split:], columns=columns)
+        index = first.extend(last)
+
+        assert index.size == expected.size
+        assert index.multi_select_columns == expected.multi_select_columns
+        for column in columns:
+            assert set(index.values(column)) == set(expected.values(column))
+            for value in expected.values(column):
+                assert index.eq(column, value) == expected.eq(column, value)
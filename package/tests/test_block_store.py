@@ -0,0 +1,90 @@
+"""Tests of the block_store module and the block based reading of the results"""
+import io
+
+import pandas as pd
+
+from awesome_analytics_apps import block_store, stack_overflow, zone_maps
+from .conftest import RESULTS_CSV
+
+
+def test_read_rows(tmp_path):
+    """We test that the rows read from the blocks equal the rows of the whole file"""
+    expected = pd.read_csv(io.StringIO(RESULTS_CSV))
+    index = block_store.build(io.BytesIO(RESULTS_CSV.encode()), tmp_path, block_rows=15)
+
+    assert index.rows == 100
+    assert len(index.blocks) == 7
+    assert len(index.blocks_for(20, 40)) == 2
+    for rows in [
+        slice(20, 40),
+        slice(95, None),
+        slice(None, None, 3),
+        slice(50, 10, -4),
+    ]:
+        pd.testing.assert_frame_equal(
+            block_store.read_rows(tmp_path, index, rows), expected.iloc[rows]
+        )
+
+    sample = block_store.sample_rows(tmp_path, index, 10, random_state=42)
+    pd.testing.assert_frame_equal(sample, expected.loc[sample.index])
+
+
+def test_read_results_rows(
+    local_root,
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """We test that read_results(rows=...) equals slicing the full results"""
+    expected = stack_overflow.read_results()
+
+    pd.testing.assert_frame_equal(
+        stack_overflow.read_results(rows=slice(10, 20)), expected.iloc[10:20]
+    )
+    assert (
+        stack_overflow.get_block_index().source == stack_overflow.dataset_fingerprint()
+    )
+    assert len(stack_overflow.sample_results(5, random_state=1)) == 5
+
+
+def test_append(tmp_path):
+    """We test that appended rows are read like built ones and only new blocks get zone maps"""
+    lines = RESULTS_CSV.encode().split(b"\n1,", 1)
+    index = block_store.build(io.BytesIO(lines[0] + b"\n"), tmp_path, block_rows=15)
+    assert index.rows == 0
+
+    csv = RESULTS_CSV.split("\n", 1)[1]
+    first, second = csv[: csv.index("51,Country")], csv[csv.index("51,Country") :]
+    index = block_store.append(io.BytesIO(first.encode()), tmp_path, index, 15)
+    zone_map = zone_maps.build(tmp_path, index)
+    index = block_store.append(io.BytesIO(second.encode()), tmp_path, index, 15)
+    zone_map = zone_maps.update(tmp_path, index, zone_map)
+
+    assert index.rows == 100
+    assert index.batches == 2
+    assert len(zone_map.blocks) == len(index.blocks)
+    pd.testing.assert_frame_equal(
+        block_store.read_rows(tmp_path, index, slice(None)),
+        pd.read_csv(io.StringIO(RESULTS_CSV)),
+    )
+
+
+def test_read_rows_types(tmp_path):
+    """We test that the types of the columns do not depend on the rows read"""
+    csv = "Respondent,Answer\n1,\n2,\n3,1.5\n4,Text\n"
+    index = block_store.build(io.BytesIO(csv.encode()), tmp_path, block_rows=2)
+    dtype = {"Respondent": "int64", "Answer": "object"}
+
+    first = block_store.read_rows(tmp_path, index, slice(0, 2), dtype=dtype)
+    second = block_store.read_rows(tmp_path, index, slice(2, 4), dtype=dtype)
+    sample = block_store.sample_rows(tmp_path, index, 2, random_state=0, dtype=dtype)
+
+    assert first["Answer"].dtype == second["Answer"].dtype == sample["Answer"].dtype
+
+
+def test_append_without_trailing_newline(tmp_path):
+    """We test that rows appended to a csv without a trailing newline start a new record"""
+    index = block_store.build(io.BytesIO(b"Respondent,Country\n1,A"), tmp_path)
+    index = block_store.append(io.BytesIO(b"2,B\n"), tmp_path, index)
+
+    results = block_store.read_rows(tmp_path, index, slice(None))
+
+    assert list(results["Respondent"]) == [1, 2]
+    assert list(results["Country"]) == ["A", "B"]
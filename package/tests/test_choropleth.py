@@ -0,0 +1,21 @@
+"""Tests of the choropleth module"""
+import pandas as pd
+
+from awesome_analytics_apps import choropleth
+
+
+def test_choropleth_figure():
+    """We test that the country names are mapped to Plotly names and that answers which are not
+    countries are left out"""
+    distribution = pd.DataFrame(
+        {
+            "Country": ["Nomadic", "Hong Kong (S.A.R.)", "Denmark"],
+            "Respondent": [5, 10, 20],
+        }
+    )
+
+    fig = choropleth.choropleth_figure(distribution)
+
+    assert list(fig.data[0].locations) == ["Hong Kong", "Denmark"]
+    assert list(fig.data[0].z) == [10, 20]
+    assert fig.layout.title.text == "Respondents per Country (30)"
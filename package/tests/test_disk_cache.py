@@ -0,0 +1,84 @@
+"""Tests of the disk_cache module"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from awesome_analytics_apps.disk_cache import DiskCache
+
+
+def test_values_are_shared_and_versioned(tmp_path):
+    """We test that a value stored by one cache is read by another until the version changes"""
+    path = tmp_path / "cache.sqlite"
+    frame = pd.DataFrame({"Country": ["Denmark", "India"], "Respondent": [1, 2]})
+    DiskCache(path, version="v1").set("frame", frame)
+
+    pd.testing.assert_frame_equal(DiskCache(path, version="v1").get("frame"), frame)
+    cache = DiskCache(path, version="v2")
+    assert "frame" not in cache
+    assert cache.get("frame", "missing") == "missing"
+    cache.set("other", 1)
+    assert len(cache) == 1
+
+
+def test_least_recently_used_values_are_evicted(tmp_path):
+    """We test that the cache stays below max_bytes"""
+    cache = DiskCache(tmp_path / "cache.sqlite", max_bytes=3000)
+    for key in ["a", "b", "c"]:
+        cache.set(key, b"x" * 900)
+    cache.get("a")
+    cache.set("d", b"x" * 900)
+
+    assert cache.size <= 3000
+    assert "a" in cache and "b" not in cache and "d" in cache
+
+
+def test_value_is_computed_once(tmp_path):
+    """We test that concurrent users of the cache compute a missing value only once"""
+    calls = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            calls.append(1)
+        return sum(range(1000))
+
+    def get(_):
+        return DiskCache(tmp_path / "cache.sqlite").get_or_set("sum", compute)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = set(executor.map(get, range(8)))
+
+    assert values == {499500}
+    assert len(calls) == 1
+
+
+def test_memoize(tmp_path):
+    """We test that the values are cached by the arguments"""
+    cache = DiskCache(tmp_path / "cache.sqlite")
+    calls = []
+
+    @cache.memoize
+    def square(value):
+        calls.append(value)
+        return value * value
+
+    assert [square(2), square(3), square(2), square(value=2)] == [4, 9, 4, 4]
+    assert calls == [2, 3, 2]
+
+
+def test_value_is_stored_under_the_version_it_was_computed_from(tmp_path):
+    """We test that a value is not stored under a version that changed while computing it"""
+    path = tmp_path / "cache.sqlite"
+    versions = ["v1"]
+    cache = DiskCache(path, version=lambda: versions[-1])
+    DiskCache(path, version="v2").set("other", 2)
+
+    def compute():
+        versions.append("v2")
+        return 1
+
+    assert cache.get_or_set("value", compute) == 1
+    assert DiskCache(path, version="v1").get("value") == 1
+    assert "value" not in cache
+    assert cache.get("other") == 2
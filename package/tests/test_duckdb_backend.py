@@ -0,0 +1,77 @@
+"""Tests of the duckdb_backend module"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from awesome_analytics_apps import stack_overflow
+from awesome_analytics_apps.duckdb_backend import SurveyDatabase
+
+pytest.importorskip("duckdb")
+
+RESULTS = pd.DataFrame(
+    {
+        "Respondent": range(1, 9),
+        "Country": ["Denmark", "Germany", np.nan, "Denmark", "Iran", "Denmark"]
+        + ["Germany", "India"],
+        "OpenSourcer": ["Never", "Often", "Never", "Often"] * 2,
+        'Odd "Column"': ["a", "b"] * 4,
+    }
+)
+
+
+@pytest.fixture
+def database():
+    """A database of the RESULTS"""
+    database = SurveyDatabase(threads=1)
+    database.register_frame(RESULTS)
+    return database
+
+
+@pytest.fixture
+def parquet_database(tmp_path):
+    """A database of the RESULTS registered as a Parquet file"""
+    path = tmp_path / "results.parquet"
+    RESULTS.to_parquet(path, index=False)
+    database = SurveyDatabase(threads=1)
+    database.register_parquet(path)
+    return database
+
+
+def test_value_counts(database):  # pylint: disable=redefined-outer-name
+    """We test that the counts equal the pandas counts"""
+    counts = database.value_counts("Country")
+
+    assert dict(zip(counts["Country"], counts["Respondent"])) == (
+        RESULTS["Country"].value_counts().to_dict()
+    )
+    assert list(counts["Respondent"]) == sorted(counts["Respondent"], reverse=True)
+    assert len(database.value_counts("Country", top=2)) == 2
+
+
+def test_filters(parquet_database):  # pylint: disable=redefined-outer-name
+    """We test that the filters select the same respondents as pandas"""
+    filters = {"OpenSourcer": ["Often"], "Country": ["Denmark", "Germany"]}
+    expected = RESULTS[
+        RESULTS["OpenSourcer"].isin(["Often"])
+        & RESULTS["Country"].isin(["Denmark", "Germany"])
+    ]
+
+    answers = parquet_database.answers(
+        ["Respondent", 'Odd "Column"'], limit=None, filters=filters
+    )
+    counts = parquet_database.value_counts("Country", filters=filters)
+
+    assert sorted(answers["Respondent"]) == list(expected["Respondent"])
+    assert dict(zip(counts["Country"], counts["Respondent"])) == (
+        expected["Country"].value_counts().to_dict()
+    )
+
+
+def test_respondents_per_country(database):  # pylint: disable=redefined-outer-name
+    """We test that the distribution equals the one of the stack_overflow module"""
+    distribution = database.respondents_per_country(top=3)
+    expected = stack_overflow.respondents_per_country(RESULTS, top=3)
+
+    assert list(distribution.columns) == ["Country", "Respondent"]
+    assert list(distribution["Respondent"]) == list(expected["Respondent"])
+    assert distribution["Country"].iloc[-1] == "Denmark"
@@ -0,0 +1,102 @@
+"""Tests of the fetch module against a local HTTP stand-in server"""
+import hashlib
+import http.client
+import http.server
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from awesome_analytics_apps.fetch import ContentStore, IncompleteDownloadError
+
+CONTENT = bytes(range(256)) * 1000
+ETAG = '"v1"'
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Serves CONTENT with support for ETag revalidation and Range requests"""
+
+    requests = []  # type: list
+    # If set, the connection is closed after this number of bytes of the body
+    truncate_at = None
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Handles a GET request"""
+        self.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == ETAG:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}"
+            )
+        else:
+            self.send_response(200)
+        body = CONTENT[start:]
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.truncate_at is not None:
+            body = body[: self.truncate_at]
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+@pytest.fixture
+def url():
+    """The url of a file on a local HTTP stand-in server"""
+    StandInHandler.requests = []
+    StandInHandler.truncate_at = None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/developer_survey_2019.zip"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_and_revalidate(tmp_path, url):  # pylint: disable=redefined-outer-name
+    """We test that the file is stored by its hash and revalidated with its ETag"""
+    store = ContentStore(tmp_path)
+
+    path = store.fetch(url)
+    assert path.name == hashlib.sha256(CONTENT).hexdigest()
+    assert path.read_bytes() == CONTENT
+
+    assert store.fetch(url) == path
+    assert StandInHandler.requests[-1]["If-None-Match"] == ETAG
+    assert store.fetch(url, revalidate=False) == path
+    assert len(StandInHandler.requests) == 2
+
+
+def test_fetch_resumes(tmp_path, url):  # pylint: disable=redefined-outer-name
+    """We test that an interrupted download is resumed with a Range request"""
+    store = ContentStore(tmp_path)
+    StandInHandler.truncate_at = 100_000
+    with pytest.raises((IncompleteDownloadError, http.client.IncompleteRead)):
+        store.fetch(url)
+
+    StandInHandler.truncate_at = None
+    path = store.fetch(url)
+    assert path.read_bytes() == CONTENT
+    assert StandInHandler.requests[-1]["Range"] == "bytes=100000-"
+
+
+def test_fetch_concurrently(tmp_path, url):  # pylint: disable=redefined-outer-name
+    """We test that concurrent workers download the file only once"""
+    store = ContentStore(tmp_path)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paths = set(
+            executor.map(lambda _: store.fetch(url, revalidate=False), range(8))
+        )
+
+    assert len(paths) == 1
+    assert len(StandInHandler.requests) == 1
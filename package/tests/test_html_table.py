@@ -0,0 +1,27 @@
+"""Tests of the html_table module"""
+import pandas as pd
+
+from awesome_analytics_apps import html_table
+
+
+def test_html_is_bounded():
+    """We test that long texts are cut, that a page has a bounded number of rows and columns and
+    that rows are left out until the HTML fits in the byte budget"""
+    frame = pd.DataFrame(
+        {f"Question{column}": ["x" * 1000] * 500 for column in range(40)}
+    ).assign(Age=range(500))
+
+    truncated = html_table.truncate_text(frame["Question0"], max_chars=10)
+    assert truncated[0] == "x" * 9 + html_table.ELLIPSIS
+    assert html_table.truncate_text(frame["Age"]).equals(frame["Age"])
+    assert html_table.pages(frame, rows_per_page=50) == 10
+
+    html = html_table.to_html(frame, page=1, max_bytes=None)
+    assert "Rows 51 to 100 of 500. 11 more columns not shown" in html
+    assert "x" * 100 not in html
+
+    html = html_table.to_html(frame, max_bytes=20_000)
+    assert len(html.encode("utf-8")) <= 20_000
+    assert "Rows 1 to " in html
+
+    assert "Rows 0 to 0 of 0" in html_table.to_html(pd.DataFrame({"Age": []}))
@@ -0,0 +1,33 @@
+"""Tests of the profiling module"""
+import json
+import time
+
+from awesome_analytics_apps import profiling
+
+
+def busy_function(seconds: float):
+    """Keeps the thread busy"""
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        pass
+
+
+def test_profile_writes_speedscope_and_collapsed_stacks(tmp_path):
+    """We test that the samples contain the busy function and that the files are written"""
+    with profiling.profile("test", directory=tmp_path, interval=0.001) as profiler:
+        busy_function(0.1)
+
+    assert profiler.samples
+    assert any(
+        frame[0] == "busy_function" for stack in profiler.samples for frame in stack
+    )
+    speedscope_path, collapsed_path = profiler.paths
+    speedscope = json.loads(speedscope_path.read_text())
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    assert len(speedscope["profiles"][0]["samples"]) == len(profiler.samples)
+    assert "busy_function" in collapsed_path.read_text()
+
+    with profiling.profile("disabled", enabled=False, directory=tmp_path) as profiler:
+        busy_function(0.01)
+    assert profiler is None
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,53 @@
+"""Tests of the rasterize module"""
+import numpy as np
+import pandas as pd
+
+from awesome_analytics_apps import rasterize
+
+
+def _results(rows: int) -> pd.DataFrame:
+    random = np.random.RandomState(0)
+    results = pd.DataFrame(
+        {
+            "Age": random.uniform(18, 70, rows),
+            "WorkWeekHrs": random.uniform(0, 80, rows),
+        }
+    )
+    results.loc[::10, "Age"] = np.nan
+    return results
+
+
+def test_aggregate_points():
+    """We test that the counts of the pixels add up to the number of points"""
+    points = _results(1000).dropna()
+
+    counts = rasterize.aggregate_points(
+        points, (18.0, 70.0), (0.0, 80.0), width=30, height=20
+    )
+    numpy_counts = rasterize._aggregate_numpy(  # pylint: disable=protected-access
+        points, (18.0, 70.0), (0.0, 80.0), 30, 20
+    )
+
+    assert counts.shape == (20, 30)
+    assert counts.sum() == len(points)
+    assert numpy_counts.sum() == len(points)
+
+
+def test_scatter_figure():
+    """We test that small point sets are scattered and large ones rasterized into counts that
+    add up to the number of respondents with both answers"""
+    results = _results(2000)
+    answered = len(results.dropna())
+
+    scatter = rasterize.scatter_figure(results, "Age", "WorkWeekHrs", threshold=5000)
+    heatmap = rasterize.scatter_figure(results, "Age", "WorkWeekHrs", threshold=100)
+    zoomed = rasterize.scatter_figure(
+        results, "Age", "WorkWeekHrs", x_range=(18.0, 40.0), threshold=100
+    )
+
+    assert scatter.data[0].type == "scattergl"
+    assert len(scatter.data[0].x) == answered
+    assert heatmap.data[0].type == "heatmap"
+    assert sum(count or 0 for row in heatmap.data[0].z for count in row) == answered
+    in_range = results.dropna()["Age"].between(18.0, 40.0).sum()
+    assert sum(count or 0 for row in zoomed.data[0].z for count in row) == in_range
@@ -0,0 +1,41 @@
+"""Tests of the similarity module"""
+import numpy as np
+import pandas as pd
+
+from awesome_analytics_apps.similarity import SimilarityIndex
+
+
+def test_nearest_respondents():
+    """We test that the respondents are ranked by the number of answer options they differ on,
+    also for a hypothetical profile"""
+    results = pd.DataFrame(
+        {
+            "Respondent": [1, 2, 3, 4, 5],
+            "Country": ["Denmark", "Denmark", "Sweden", None, "Denmark"],
+            "DevType": [
+                "Student;Data scientist",
+                "Student",
+                "Student;Data scientist",
+                "Developer, back-end",
+                "Student;Data scientist",
+            ],
+        }
+    )
+    index = SimilarityIndex.build(results)
+
+    assert index.columns == ["Country", "DevType"]
+    assert index.multi_select_columns == ["DevType"]
+    assert index.decode(0) == {
+        "Country": ["Denmark"],
+        "DevType": ["Student", "Data scientist"],
+    }
+    np.testing.assert_array_equal(index.distances(index.bits[0]), [0, 1, 2, 4, 0])
+
+    positions, distances = index.similar_to(0, k=3)
+    np.testing.assert_array_equal(positions, [4, 1, 2])
+    np.testing.assert_array_equal(distances, [0, 1, 2])
+
+    profile = index.encode({"Country": "Sweden", "DevType": ["Student"], "Age": 30})
+    positions, distances = index.nearest(profile, k=10)
+    np.testing.assert_array_equal(positions, [2, 1, 0, 3, 4])
+    np.testing.assert_array_equal(distances, [1, 2, 3, 3, 3])
@@ -0,0 +1,67 @@
+"""Tests of the sketches module"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from awesome_analytics_apps import sketches
+from awesome_analytics_apps.sketches import CountMinSketch, KllSketch, SpaceSavingSketch
+
+
+def test_kll_quantiles_of_merged_chunks():
+    """We test that the quantiles of merged sketches of chunks are close to the exact ones"""
+    values = np.random.RandomState(0).lognormal(11, 1, size=200_000)
+    values[::10] = np.nan
+    sketch = KllSketch(seed=0)
+    for chunk in np.array_split(values, 7):
+        sketch.merge(KllSketch(seed=1).update(chunk))
+
+    fractions = [0.1, 0.5, 0.9, 0.99]
+    for fraction, quantile in zip(fractions, sketch.quantiles(fractions)):
+        assert abs(sketch.rank(quantile) - fraction) < 0.02
+        assert abs(np.mean(values[~np.isnan(values)] <= quantile) - fraction) < 0.02
+    assert sketch.count == 180_000
+    assert sum(len(items) for items in sketch.levels) < 1000
+    assert sketch.quantile(0) == np.nanmin(values)
+
+
+def test_frequency_sketches():
+    """We test that the heavy hitters are found and counts are never too low"""
+    random = np.random.RandomState(0)
+    countries = pd.Series(random.zipf(1.5, size=50_000) % 1000).map(
+        lambda number: f"Country {number}"
+    )
+    exact = countries.value_counts()
+    space_saving = SpaceSavingSketch(capacity=50)
+    count_min = CountMinSketch(width=256)
+    for chunk in np.array_split(countries, 5):
+        space_saving.merge(SpaceSavingSketch(capacity=50).update(chunk))
+        count_min.merge(CountMinSketch(width=256).update(chunk))
+
+    assert list(space_saving.top(5).index) == list(exact.head(5).index)
+    for country, count in exact.head(50).items():
+        assert count_min.estimate(country) >= count
+    assert count_min.estimate(exact.index[0]) <= exact.iloc[0] + 0.02 * len(countries)
+
+
+def test_multi_select_answers_are_counted_per_option():
+    """We test that 'a;b' counts both a and b"""
+    sketch = SpaceSavingSketch().update(["Python;SQL", "Python", None])
+    assert sketch.top().to_dict() == {"Python": 2, "SQL": 1}
+
+
+def test_serialization():
+    """We test that a sketch survives a JSON round trip"""
+    frame = pd.DataFrame(
+        {"Age": [20.0, 30.0, None, 40.0], "Country": ["A", "B", "A", None]}
+    )
+    summary = sketches.summarize(frame, ["Age"], ["Country"])
+    summary["Count"] = CountMinSketch().update(frame["Country"])
+
+    restored = {
+        column: sketches.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        for column, sketch in summary.items()
+    }
+    assert restored["Age"].quantiles([0, 0.5, 1]) == [20.0, 30.0, 40.0]
+    assert restored["Country"].top().to_dict() == {"A": 2, "B": 1}
+    assert restored["Count"].estimate("A") == 2
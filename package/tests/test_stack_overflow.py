@@ -0,0 +1,260 @@
+"""Tests of the stack_overflow module"""
+import dataclasses
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from awesome_analytics_apps import block_store, fetch, stack_overflow
+from awesome_analytics_apps.bitmap_index import BitmapIndex
+
+
+def test_normalize_ordinals():
+    """We test that the ordinal answers are mapped to numbers and ordered categoricals and that
+    missing and unknown answers are missing"""
+    results = pd.DataFrame(
+        {
+            "YearsCode": ["Less than 1 year", "12", np.nan, "More than 50 years"],
+            "YearsCodePro": ["3", "Less than 1 year", "Unknown", np.nan],
+            "Age1stCode": ["Younger than 5 years", "14", "Older than 85", "9"],
+            "OrgSize": [
+                "10,000 or more employees",
+                "2-9 employees",
+                np.nan,
+                "Just me - I am a freelancer, sole proprietor, etc.",
+            ],
+            "CompFreq": ["Yearly", "Weekly", "Monthly", "Sometimes"],
+        },
+        index=[10, 11, 12, 13],
+    )
+
+    ordinals = stack_overflow.normalize_ordinals(results)
+
+    assert list(ordinals.columns) == stack_overflow.ORDINAL_COLUMNS
+    assert list(ordinals.index) == [10, 11, 12, 13]
+    np.testing.assert_array_equal(ordinals["YearsCode"], [0.5, 12.0, np.nan, 51.0])
+    np.testing.assert_array_equal(ordinals["YearsCodePro"], [3.0, 0.5, np.nan, np.nan])
+    np.testing.assert_array_equal(ordinals["Age1stCode"], [4.0, 14.0, 86.0, 9.0])
+    assert ordinals["OrgSize"].cat.ordered
+    assert list(ordinals["OrgSize"].cat.codes) == [8, 1, -1, 0]
+    assert list(ordinals["CompFreq"].cat.codes) == [2, 0, 1, -1]
+    assert ordinals["OrgSize"].max() == "10,000 or more employees"
+
+
+def test_parse_engines_multiline_answers():
+    """We test that the engines agree on a csv larger than one pyarrow block with answers
+    spanning several lines"""
+    csv = "Respondent,Country,Comment\n" + "".join(
+        f'{row},Country {row % 7},"Line 1 of {row}\nLine 2 of {row}, ""quoted"""\n'
+        for row in range(1, 40_001)
+    )
+    buffer = csv.encode("utf-8")
+    assert len(buffer) > stack_overflow.ARROW_BLOCK_SIZE
+
+    expected = stack_overflow.PARSE_ENGINES["pandas"](buffer)
+    results = stack_overflow.PARSE_ENGINES["pyarrow"](buffer)
+
+    assert len(results) == 40_000
+    assert list(results["Respondent"]) == list(expected["Respondent"])
+    assert list(results["Comment"]) == list(expected["Comment"])
+
+
+def test_dask_backend(
+    local_root,
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """We test that the functions working on both backends give the same answers for the 'dask'
+    backend as for the 'pandas' backend, also across several partitions"""
+    dask = pytest.importorskip("dask")
+    dd = pytest.importorskip("dask.dataframe")
+    expected = stack_overflow.read_results()
+    lazy_results = stack_overflow.read_results(backend="dask")
+    # Dask would convert the text columns to its own string type
+    with dask.config.set({"dataframe.convert-string": False}):
+        partitioned_results = dd.from_pandas(expected, npartitions=4)
+
+    pd.testing.assert_frame_equal(lazy_results.compute(), expected)
+    for results in [lazy_results, partitioned_results]:
+        pd.testing.assert_frame_equal(
+            stack_overflow.preview_answers(results, ["Country"], rows=30),
+            expected[["Country"]].head(30),
+        )
+        pd.testing.assert_frame_equal(
+            stack_overflow.respondents_per_country(results, top=5).reset_index(
+                drop=True
+            ),
+            stack_overflow.respondents_per_country(expected, top=5).reset_index(
+                drop=True
+            ),
+        )
+    assert stack_overflow.preview_answers(partitioned_results, rows=0).empty
+
+
+def test_read_results_parquet(
+    local_root, monkeypatch
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """We test that the precomputed Parquet copy is read instead of the zip file"""
+    pytest.importorskip("pyarrow")
+    expected = stack_overflow.read_results()
+    stack_overflow.get_parquet_path()
+
+    def fail():
+        raise AssertionError("The zip file was read")
+
+    monkeypatch.setattr(stack_overflow, "_get_zip_file", fail)
+
+    pd.testing.assert_frame_equal(stack_overflow.read_results(), expected)
+
+
+def test_append_results(
+    local_root, monkeypatch
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """We test that append_results updates the aggregates, the version and the results"""
+    # The small results have no ordinal columns and only Country to filter by
+    monkeypatch.delitem(stack_overflow.AGGREGATES, "ordinals")
+    monkeypatch.setattr(stack_overflow, "FILTER_COLUMNS_2019", ["Country"])
+    monkeypatch.setitem(
+        stack_overflow.AGGREGATES,
+        "bitmap_index",
+        dataclasses.replace(
+            stack_overflow.AGGREGATES["bitmap_index"], columns=["Country"]
+        ),
+    )
+    results = stack_overflow.read_results()
+    version = stack_overflow.dataset_fingerprint()
+    counts = stack_overflow.get_answer_counts()
+
+    batch = pd.DataFrame({"Respondent": [101, 102], "Country": ["Country 1", None]})
+    new_version = stack_overflow.append_results(batch)
+
+    assert new_version != version
+    assert new_version == stack_overflow.dataset_fingerprint()
+    new_results = stack_overflow.refresh_results(results, version)
+    pd.testing.assert_frame_equal(new_results, stack_overflow.read_results())
+    assert len(new_results) == 102
+    assert new_results["Respondent"].iloc[-1] == 102
+    answer_counts = stack_overflow.get_answer_counts()
+    assert answer_counts["Respondent"] == counts["Respondent"] + 2
+    assert answer_counts["Comment"] == counts["Comment"]
+    distribution = stack_overflow.get_respondents_per_country().set_index("Country")
+    assert distribution.loc["Country 1", "Respondent"] == 16
+    bitmap_index = stack_overflow.get_bitmap_index()
+    expected_index = BitmapIndex.build(new_results, columns=["Country"])
+    assert bitmap_index.size == 102
+    for country in expected_index.values("Country"):
+        assert bitmap_index.eq("Country", country) == expected_index.eq(
+            "Country", country
+        )
+
+
+@pytest.mark.parametrize(
+    "batch",
+    [
+        pd.DataFrame({"Unknown": [1]}),
+        pd.DataFrame({"Country": ["Country 1"]}),
+        pd.DataFrame({"Respondent": ["One"], "Country": ["Country 1"]}),
+    ],
+)
+def test_append_results_rejects_bad_batches(
+    local_root, batch
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """We test that a batch that does not fit the results is rejected and nothing is written"""
+    results = stack_overflow.read_results()
+    version = stack_overflow.dataset_fingerprint()
+
+    with pytest.raises(ValueError):
+        stack_overflow.append_results(batch)
+
+    assert stack_overflow.dataset_fingerprint() == version
+    assert stack_overflow.get_block_index().rows == len(results)
+    pd.testing.assert_frame_equal(stack_overflow.read_results(), results)
+
+
+def test_filter_results(
+    local_root, monkeypatch
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """We test that filter_results only reads the blocks the zone map cannot rule out and returns
+    the rows of a plain pandas filter"""
+    monkeypatch.setattr(
+        block_store, "build", functools.partial(block_store.build, block_rows=15)
+    )
+    results = stack_overflow.read_results()
+    blocks_read = []
+    read_blocks = block_store.read_blocks
+
+    def read_blocks_spy(directory, index, blocks, dtype=None):
+        blocks_read.append(len(blocks))
+        return read_blocks(directory, index, blocks, dtype=dtype)
+
+    stack_overflow.get_zone_map()
+    monkeypatch.setattr(block_store, "read_blocks", read_blocks_spy)
+
+    filtered = stack_overflow.filter_results(
+        filters={"Country": ["Country 1", "Country 3"]}, ranges={"Respondent": (20, 35)}
+    )
+
+    assert len(stack_overflow.get_block_index().blocks) == 7
+    assert blocks_read == [2]
+    expected = results[
+        results["Country"].isin(["Country 1", "Country 3"])
+        & results["Respondent"].between(20, 35)
+    ]
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(filtered, expected)
+    assert stack_overflow.filter_results(filters={"Country": ["Country 9"]}).empty
+    assert blocks_read[-1] == 0
+
+
+def test_dataset_fingerprint_is_content_hash(
+    local_root,
+):  # pylint: disable=redefined-outer-name
+    """We test that the fingerprint is the hash of the zip file, so precomputed artifacts stay
+    valid for a copy of the file with another modification time"""
+    zip_path = (
+        local_root / stack_overflow.DATA_STACK_OVERFLOW / stack_overflow.ZIP_FILE_2019
+    )
+    fingerprint = stack_overflow.dataset_fingerprint()
+    stack_overflow.get_block_index()
+
+    stat = zip_path.stat()
+    os.utime(zip_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert fingerprint == fetch.content_hash(zip_path)
+    assert stack_overflow.dataset_fingerprint() == fingerprint
+    assert stack_overflow.get_block_index().source == fingerprint
+
+
+def test_sketch_results(
+    local_root, monkeypatch
+):  # pylint: disable=redefined-outer-name,unused-argument
+    """We test that the sketches of chunks merged from a pool of processes agree with the exact
+    quantiles and answer counts of the results"""
+    monkeypatch.setattr(
+        block_store, "build", functools.partial(block_store.build, block_rows=15)
+    )
+    results = stack_overflow.read_results()
+
+    summary = stack_overflow.sketch_results(
+        quantile_columns=["Respondent"],
+        frequency_columns=["Country"],
+        chunk_rows=30,
+        processes=2,
+    )
+
+    assert (
+        len(list(block_store.partition_blocks(stack_overflow.get_block_index(), 30)))
+        > 1
+    )
+    quantiles = summary["Respondent"]
+    assert quantiles.count == len(results)
+    assert quantiles.quantile(0) == results["Respondent"].min()
+    assert quantiles.quantile(1) == results["Respondent"].max()
+    for fraction, quantile in zip(
+        [0.1, 0.5, 0.9], quantiles.quantiles([0.1, 0.5, 0.9])
+    ):
+        assert abs(np.mean(results["Respondent"] <= quantile) - fraction) <= 0.01
+    # Country has 7 answers, so the top 10 are all exact counts
+    assert summary["Country"].top(10).to_dict() == (
+        results["Country"].value_counts().to_dict()
+    )
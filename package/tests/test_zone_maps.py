@@ -0,0 +1,42 @@
+"""Tests of the zone_maps module"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from awesome_analytics_apps import block_store, zone_maps
+
+
+def test_blocks_are_skipped(tmp_path):
+    """We test that only the blocks that might match are read and that the statistics of the
+    whole dataset are correct"""
+    results = pd.DataFrame(
+        {
+            "Respondent": np.arange(100),
+            "Country": ["Denmark"] * 50 + ["India"] * 50,
+            "Age": np.arange(100) / 2.0,
+            "Constant": ["Yes"] * 100,
+            "Empty": [np.nan] * 100,
+        }
+    )
+    index = block_store.build(
+        io.BytesIO(results.to_csv(index=False).encode("utf-8")), tmp_path, block_rows=10
+    )
+    zone_maps.build(tmp_path, index)
+    zone_map = zone_maps.read_zone_map(tmp_path)
+
+    blocks = zone_map.blocks_matching(index, filters={"Country": ["India"]})
+    assert [block.first_row for block in blocks] == [50, 60, 70, 80, 90]
+    blocks = zone_map.blocks_matching(
+        index,
+        filters={"Country": ["Denmark"], "Respondent": []},
+        ranges={"Age": (12, 20)},
+    )
+    assert [block.first_row for block in blocks] == [20, 30, 40]
+    assert not zone_map.blocks_matching(index, filters={"Respondent": [1000]})
+
+    columns = zone_map.columns()
+    assert columns["Age"].min == 0 and columns["Age"].max == 49.5
+    assert columns["Country"].distinct == ["Denmark", "India"]
+    assert columns["Respondent"].rows == 100
+    assert zone_map.uninformative_columns() == ["Constant", "Empty"]
@@ -1,12 +1,15 @@
 """Here we import the different task submodules/ collections"""
 from invoke import Collection, task
 
-from tasks import docker, sphinx, package, test
+from tasks import benchmark, data, docker, load_test, sphinx, package, test
 
 # pylint: disable=invalid-name
 # as invoke only recognizes lower case
 namespace = Collection()
 namespace.add_collection(test)
+namespace.add_collection(benchmark)
+namespace.add_collection(data)
+namespace.add_collection(load_test)
 namespace.add_collection(docker)
 namespace.add_collection(package)
 namespace.add_collection(sphinx)
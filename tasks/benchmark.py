@@ -0,0 +1,119 @@
+"""Module of Invoke tasks for benchmarking the apps. To be invoked from the command line. Try
+
+invoke --list
+
+from the command line for a list of all available commands.
+"""
+import os
+import statistics
+import timeit
+
+from invoke import task
+
+from tasks.streamlit_harness import (
+    STREAMLIT_APP,
+    STREAMLIT_INTERACTIONS,
+    Rerun,
+    StreamlitHarness,
+    format_reruns,
+)
+
+
+@task
+def streamlit(
+    command, app=str(STREAMLIT_APP), repeat=3
+):  # pylint: disable=unused-argument
+    """Benchmarks the rerun latency and payload of the Streamlit app without a server or browser
+
+    The app is run against a stub Streamlit runtime while simulating a user selecting questions
+    and changing the number of rows to show. The first repetition includes filling the cache.
+
+    Arguments:
+        command {[type]} -- Invoke command object
+
+    Keyword Arguments:
+        app {str} -- The path to the Streamlit app (default: {STREAMLIT_APP})
+        repeat {int} -- The number of times to repeat the interactions (default: {3})
+    """
+    print(
+        """
+Benchmarking the Streamlit app
+==============================
+"""
+    )
+    harness = StreamlitHarness(app)
+    repetitions = [harness.run(STREAMLIT_INTERACTIONS) for _ in range(int(repeat))]
+
+    print("First repetition (cold cache)")
+    print(format_reruns(repetitions[0]))
+    if len(repetitions) > 1:
+        print("\nMedian of the following repetitions (warm cache)")
+        medians = [
+            Rerun(
+                reruns[0].name,
+                statistics.median(rerun.latency for rerun in reruns),
+                reruns[0].elements,
+                reruns[0].bytes,
+            )
+            for reruns in zip(*repetitions[1:])
+        ]
+        print(format_reruns(medians))
+
+
+def _cpu_counts():
+    counts = {1, os.cpu_count() or 1}
+    count = 2
+    while count < (os.cpu_count() or 1):
+        counts.add(count)
+        count *= 2
+    return sorted(counts)
+
+
+@task
+def read_results(command, repeat=3):  # pylint: disable=unused-argument
+    """Benchmarks parsing the Stack Overflow results with the pandas and pyarrow engines
+
+    The zip member is decompressed once up front, so only the parsing is timed. The pyarrow
+    engine is timed for 1, 2, 4, ... up to the number of cores.
+
+    Arguments:
+        command {[type]} -- Invoke command object
+
+    Keyword Arguments:
+        repeat {int} -- The number of times to repeat each timing. The best is reported
+            (default: {3})
+    """
+    # pylint: disable=import-outside-toplevel
+    import pyarrow
+
+    from awesome_analytics_apps import stack_overflow
+
+    print(
+        """
+Benchmarking the parse engines of read_results
+==============================================
+"""
+    )
+    with stack_overflow._get_zip_file().open(  # pylint: disable=protected-access
+        stack_overflow.RESULTS_2019
+    ) as file:
+        buffer = file.read()
+
+    def best_of(engine: str) -> float:
+        parse = stack_overflow.PARSE_ENGINES[engine]
+        return min(timeit.repeat(lambda: parse(buffer), number=1, repeat=int(repeat)))
+
+    pandas_time = best_of("pandas")
+    print(f"{'Engine':<10}{'Threads':>10}{'Seconds':>10}{'Speedup':>10}")
+    print(f"{'pandas':<10}{1:>10}{pandas_time:>10.2f}{1:>10.1f}")
+    original_cpu_count = pyarrow.cpu_count()
+    try:
+        for cpu_count in _cpu_counts():
+            pyarrow.set_cpu_count(cpu_count)
+            pyarrow_time = best_of("pyarrow")
+            print(
+                f"{'pyarrow':<10}{cpu_count:>10}{pyarrow_time:>10.2f}"
+                f"{pandas_time / pyarrow_time:>10.1f}"
+            )
+    finally:
+        pyarrow.set_cpu_count(original_cpu_count)
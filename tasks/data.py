@@ -0,0 +1,35 @@
+"""Module of Invoke tasks for preparing the data of the apps. To be invoked from the command
+line. Try
+
+invoke --list
+
+from the command line for a list of all available commands.
+"""
+import time
+
+from invoke import task
+
+
+@task
+def precompute(command):  # pylint: disable=unused-argument
+    """Fetches the Stack Overflow data and runs the conversion and precomputation steps
+
+    The results are written to the cache folder of the data and used by the apps instead of
+    deriving them at runtime. Steps that are up to date are skipped.
+
+    Arguments:
+        command {[type]} -- Invoke command object
+    """
+    # pylint: disable=import-outside-toplevel
+    from awesome_analytics_apps import stack_overflow
+
+    print(
+        """
+Precomputing the Stack Overflow data
+====================================
+"""
+    )
+    for name, step in stack_overflow.PRECOMPUTE_STEPS.items():
+        start = time.perf_counter()
+        step()
+        print(f"{name:<20}{time.perf_counter() - start:>10.2f} seconds")
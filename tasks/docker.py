@@ -73,11 +73,20 @@ IMAGES = {
         dependencies=[],
         registry=DOCKER_REGISTRY,
     ),
+    # The data stage runs the precomputation steps of the package at build time. The prod image
+    # copies the data from it, so a container starts without deriving the data
+    "data": Image(
+        docker_file="devops/docker/Dockerfile.data",
+        name="awesome-analytics-apps_data",
+        context=".",
+        dependencies=["base"],
+        registry=DOCKER_REGISTRY,
+    ),
     "prod": Image(
         docker_file="devops/docker/Dockerfile.prod",
         name="awesome-streamlit",
         context=".",
-        dependencies=["base"],
+        dependencies=["data"],
         registry=DOCKER_REGISTRY,
     ),
 }
@@ -0,0 +1,627 @@
+"""Module of Invoke tasks for load testing the apps with concurrent users. To be invoked from the
+command line. Try
+
+invoke --list
+
+from the command line for a list of all available commands.
+
+The tasks start the app server and connect to it like browsers do:
+
+- A Streamlit session is a websocket to the server. The session sends the widget values of the
+  STREAMLIT_INTERACTIONS as rerun requests and the latency of a rerun is the time until the server
+  reports that the script has finished.
+- A Voila session loads the page, which executes the app in a new kernel, and connects to the
+  kernel websocket. It then sends the widget messages of the VOILA_INTERACTIONS and the latency
+  of a message is the time until the kernel is idle again.
+
+For each app we report the p50, p95 and p99 latency of the requests, the throughput in requests
+per second and the peak RSS per session, i.e. the growth of the resident memory of the server
+process and its children, for example the Voila kernels, over the baseline divided by the number
+of sessions.
+"""
+import asyncio
+import contextlib
+import json
+import re
+import struct
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from invoke import task
+
+from tasks.streamlit_harness import (
+    ROOT,
+    STREAMLIT_APP,
+    STREAMLIT_INTERACTIONS,
+    Interaction,
+)
+
+STREAMLIT_PORT = 8501
+VOILA_APP = ROOT / "apps/voila_apps/app.ipynb"
+VOILA_PORT = 8866
+STARTUP_TIMEOUT = 120
+SAMPLE_INTERVAL = 0.1
+MAX_MESSAGE_SIZE = 1 << 30
+# The protobuf field of the widget value of each widget of the Streamlit app. Newer versions of
+# Streamlit send the selected options as strings instead of indices
+STREAMLIT_WIDGETS = ["multiselect", "selectbox", "radio", "number_input"]
+# The version of the protocol of the ipywidgets comm that sends the states of all widgets
+WIDGET_CONTROL_VERSION = "1.0.0"
+# The id of the kernel of a Voila page, in the page config of newer and the body of older Voila
+KERNEL_ID = re.compile(r"kernel[-_]?id\W+([0-9a-f]{8}-[0-9a-f-]{27})", re.IGNORECASE)
+
+
+@dataclass
+class WidgetMessage:
+    """A message the browser sends to a widget of the Voila app when the user interacts with it.
+
+    The model ids of the widgets differ per kernel, so the widget is found by its state"""
+
+    name: str
+    widget: Callable[[Dict[str, Any]], bool]
+    content: Dict[str, Any]
+
+
+def _is_questions_grid(state: Dict[str, Any]) -> bool:
+    return state.get("_model_name") == "QgridModel" and "QuestionText" in state.get(
+        "_columns", {}
+    )
+
+
+def _is_results_grid(state: Dict[str, Any]) -> bool:
+    return state.get("_model_name") == "QgridModel" and not _is_questions_grid(state)
+
+
+# The interactions of a user exploring the Voila app. The grids are qgrid widgets. The browser
+# sends them the selected rows and the rows scrolled into view as custom messages
+VOILA_INTERACTIONS = [
+    WidgetMessage(
+        "select 1 question",
+        _is_questions_grid,
+        {"type": "change_selection", "rows": [3]},
+    ),
+    WidgetMessage(
+        "select 3 questions",
+        _is_questions_grid,
+        {"type": "change_selection", "rows": [3, 4, 5]},
+    ),
+    WidgetMessage(
+        "show 500 answers",
+        _is_results_grid,
+        {"type": "change_viewport", "top": 0, "bottom": 500},
+    ),
+    WidgetMessage(
+        "show 5000 answers",
+        _is_results_grid,
+        {"type": "change_viewport", "top": 0, "bottom": 5000},
+    ),
+    WidgetMessage(
+        "deselect questions",
+        _is_questions_grid,
+        {"type": "change_selection", "rows": []},
+    ),
+]
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """The nearest rank percentile of the values
+
+    Arguments:
+        values {List[float]} -- The values
+        percent {float} -- The percent, for example 95
+
+    Returns:
+        float -- The percentile
+    """
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class LoadTestResult:
+    """The measurements of a load test"""
+
+    name: str
+    sessions: int
+    latencies: List[float] = field(default_factory=list)
+    seconds: float = 0.0
+    baseline_rss: int = 0
+    peak_rss: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """The number of requests per second"""
+        return len(self.latencies) / self.seconds if self.seconds else 0.0
+
+    @property
+    def rss_per_session(self) -> float:
+        """The growth of the peak RSS over the baseline per session in bytes"""
+        return max(0, self.peak_rss - self.baseline_rss) / self.sessions
+
+
+def format_results(results: List[LoadTestResult]) -> str:
+    """The results formatted as a table"""
+    lines = [
+        f"{'Test':<25}{'Sessions':>10}{'Requests':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+        f"{'p99 (ms)':>10}{'Req/s':>10}{'MB/session':>12}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.name:<25}{result.sessions:>10}{len(result.latencies):>10}"
+            f"{percentile(result.latencies, 50) * 1000:>10.0f}"
+            f"{percentile(result.latencies, 95) * 1000:>10.0f}"
+            f"{percentile(result.latencies, 99) * 1000:>10.0f}"
+            f"{result.throughput:>10.1f}{result.rss_per_session / 2 ** 20:>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+class RssSampler:
+    """Samples the RSS of a process and its children in a background thread
+
+    Example:
+
+        with RssSampler(pid) as sampler:
+            ...
+        print(sampler.baseline, sampler.peak)
+    """
+
+    def __init__(self, pid: int, interval: float = SAMPLE_INTERVAL):
+        """Samples the RSS of a process and its children in a background thread
+
+        Arguments:
+            pid {int} -- The id of the process
+
+        Keyword Arguments:
+            interval {float} -- The seconds between samples (default: {SAMPLE_INTERVAL})
+        """
+        import psutil  # pylint: disable=import-outside-toplevel
+
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def rss(self) -> int:
+        """The current RSS of the process and its children in bytes"""
+        import psutil  # pylint: disable=import-outside-toplevel
+
+        rss = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return rss
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.rss())
+
+    def __enter__(self) -> "RssSampler":
+        self.baseline = self.peak = self.rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+@contextlib.contextmanager
+def _server(command: List[str], url: str) -> Iterator[subprocess.Popen]:
+    # Starts the server and waits until it responds on the url
+    process = subprocess.Popen(  # nosec
+        command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_for(url, process)
+        yield process
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _get(url: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=STARTUP_TIMEOUT) as response:  # nosec
+        response.read()
+    return time.perf_counter() - start
+
+
+def _wait_for(url: str, process: subprocess.Popen):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with code {process.returncode}")
+        try:
+            _get(url)
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise TimeoutError(f"The server did not respond on {url}")
+
+
+def _set_widget_state(state, widget_type: str, widget, value: Any):
+    # Sets the WidgetState of the widget to the value like the Streamlit frontend does
+    state.id = widget.id
+    if widget_type == "number_input":
+        state.double_value = value
+        return
+    options = list(widget.options)
+    if callable(value):
+        value = value(options)
+    if widget_type == "multiselect":
+        selected = [str(option) for option in value]
+        if "raw_values" in widget.DESCRIPTOR.fields_by_name:
+            state.string_array_value.SetInParent()
+            state.string_array_value.data.extend(selected)
+        else:
+            state.int_array_value.SetInParent()
+            state.int_array_value.data.extend(
+                options.index(option) for option in selected
+            )
+    elif "raw_value" in widget.DESCRIPTOR.fields_by_name:
+        state.string_value = str(value)
+    else:
+        state.int_value = options.index(str(value))
+
+
+async def _streamlit_session(url: str, interactions: List[Interaction]) -> List[float]:
+    """Runs the interactions in a session of the Streamlit server
+
+    Arguments:
+        url {str} -- The url of the websocket of the server
+        interactions {List[Interaction]} -- The interactions. The widget values accumulate
+
+    Returns:
+        List[float] -- The latency of each rerun in seconds
+    """
+    # pylint: disable=import-outside-toplevel
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.websocket import websocket_connect
+
+    connection = await websocket_connect(url, max_message_size=MAX_MESSAGE_SIZE)
+    # The widgets by label and the values set by the interactions so far
+    widgets: Dict[str, Tuple[str, Any]] = {}
+    values: Dict[str, Any] = {}
+    page_script_hash = ""
+    latencies = []
+    try:
+        for interaction in interactions:
+            values.update(interaction.widgets)
+            message = BackMsg()
+            message.rerun_script.page_script_hash = page_script_hash
+            for label, value in values.items():
+                if label in widgets:
+                    _set_widget_state(
+                        message.rerun_script.widget_states.widgets.add(),
+                        *widgets[label],
+                        value,
+                    )
+            start = time.perf_counter()
+            await connection.write_message(message.SerializeToString(), binary=True)
+            while True:
+                data = await connection.read_message()
+                if data is None:
+                    raise ConnectionError("The Streamlit server closed the connection")
+                forward_message = ForwardMsg()
+                forward_message.ParseFromString(data)
+                message_type = forward_message.WhichOneof("type")
+                if message_type == "script_finished":
+                    break
+                if message_type == "new_session":
+                    page_script_hash = forward_message.new_session.page_script_hash
+                elif (
+                    message_type == "delta"
+                    and forward_message.delta.WhichOneof("type") == "new_element"
+                ):
+                    element = forward_message.delta.new_element
+                    widget_type = element.WhichOneof("type")
+                    if widget_type == "exception":
+                        raise RuntimeError(
+                            f"The rerun '{interaction.name}' failed: "
+                            f"{element.exception.message}"
+                        )
+                    if widget_type in STREAMLIT_WIDGETS:
+                        widget = getattr(element, widget_type)
+                        widgets[widget.label] = (widget_type, widget)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+    return latencies
+
+
+async def _streamlit_sessions(
+    url: str, interactions: List[Interaction], sessions: int
+) -> List[List[float]]:
+    return await asyncio.gather(
+        *[_streamlit_session(url, interactions) for _ in range(sessions)]
+    )
+
+
+def _streamlit_stream_url(port: int) -> str:
+    # Streamlit 1.18 moved the websocket from stream to _stcore/stream
+    try:
+        _get(f"http://127.0.0.1:{port}/_stcore/health")
+        return f"ws://127.0.0.1:{port}/_stcore/stream"
+    except urllib.error.HTTPError:
+        return f"ws://127.0.0.1:{port}/stream"
+
+
+def run_streamlit(app: str, sessions: int, port: int) -> LoadTestResult:
+    """Load tests the Streamlit app by starting a Streamlit server and running the
+    STREAMLIT_INTERACTIONS in concurrent sessions.
+
+    One session is run up front to fill the cache like the first user of a server does
+
+    Arguments:
+        app {str} -- The path to the Streamlit app
+        sessions {int} -- The number of concurrent sessions
+        port {int} -- The port of the Streamlit server
+
+    Returns:
+        LoadTestResult -- The measurements
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "streamlit",
+        "run",
+        str(app),
+        "--server.headless=true",
+        f"--server.port={port}",
+        "--server.address=127.0.0.1",
+        "--browser.gatherUsageStats=false",
+    ]
+    with _server(command, f"http://127.0.0.1:{port}/") as process:
+        url = _streamlit_stream_url(port)
+        asyncio.run(_streamlit_sessions(url, STREAMLIT_INTERACTIONS, 1))
+
+        result = LoadTestResult("streamlit", sessions)
+        with RssSampler(process.pid) as sampler:
+            start = time.perf_counter()
+            latencies = asyncio.run(
+                _streamlit_sessions(url, STREAMLIT_INTERACTIONS, sessions)
+            )
+            result.seconds = time.perf_counter() - start
+        result.latencies = [latency for session in latencies for latency in session]
+        result.baseline_rss, result.peak_rss = sampler.baseline, sampler.peak
+        return result
+
+
+def _kernel_message(
+    session: str, message_type: str, content: Dict, metadata: Optional[Dict] = None
+) -> Dict:
+    return {
+        "header": {
+            "msg_id": uuid.uuid4().hex,
+            "username": "",
+            "session": session,
+            "msg_type": message_type,
+            "version": "5.3",
+        },
+        "parent_header": {},
+        "metadata": metadata or {},
+        "content": content,
+        "channel": "shell",
+        "buffers": [],
+    }
+
+
+def _decode_kernel_message(data) -> Dict:
+    # A message with buffers is sent as binary. It starts with the number of parts and their
+    # offsets. The first part is the message
+    if isinstance(data, str):
+        return json.loads(data)
+    parts = struct.unpack("!I", data[:4])[0]
+    offsets = struct.unpack(f"!{parts}I", data[4 : 4 * (parts + 1)])
+    end = offsets[1] if parts > 1 else len(data)
+    return json.loads(data[offsets[0] : end].decode("utf-8"))
+
+
+async def _wait_for_kernel(connection, condition: Callable[[Dict], bool]) -> Dict:
+    # Reads the messages of the kernel until one meets the condition
+    while True:
+        data = await connection.read_message()
+        if data is None:
+            raise ConnectionError("The Voila server closed the kernel connection")
+        message = _decode_kernel_message(data)
+        if condition(message):
+            return message
+
+
+async def _voila_session(url: str, interactions: List[WidgetMessage]) -> List[float]:
+    """Loads the Voila page and sends the widget messages of the interactions to its kernel
+
+    Arguments:
+        url {str} -- The url of the page
+        interactions {List[WidgetMessage]} -- The interactions
+
+    Returns:
+        List[float] -- The latency of the page load and of each interaction in seconds
+    """
+    # pylint: disable=import-outside-toplevel
+    from tornado.httpclient import AsyncHTTPClient
+    from tornado.websocket import websocket_connect
+
+    start = time.perf_counter()
+    response = await AsyncHTTPClient().fetch(url, request_timeout=STARTUP_TIMEOUT)
+    latencies = [time.perf_counter() - start]
+    match = KERNEL_ID.search(response.body.decode("utf-8"))
+    if match is None:
+        raise ValueError(f"The page {url} has no kernel")
+
+    session = uuid.uuid4().hex
+    connection = await websocket_connect(
+        f"{url.replace('http', 'ws', 1)}api/kernels/{match.group(1)}/channels"
+        f"?session_id={session}",
+        max_message_size=MAX_MESSAGE_SIZE,
+    )
+    try:
+        # Like the browser we request the states of the widgets on the widget control comm
+        control_id = uuid.uuid4().hex
+        for message in [
+            _kernel_message(
+                session,
+                "comm_open",
+                {
+                    "comm_id": control_id,
+                    "target_name": "jupyter.widget.control",
+                    "data": {},
+                },
+                metadata={"version": WIDGET_CONTROL_VERSION},
+            ),
+            _kernel_message(
+                session,
+                "comm_msg",
+                {"comm_id": control_id, "data": {"method": "request_states"}},
+            ),
+        ]:
+            await connection.write_message(json.dumps(message))
+        reply = await _wait_for_kernel(
+            connection,
+            lambda message: message["msg_type"] == "comm_msg"
+            and message["content"]["data"].get("method") == "update_states",
+        )
+        states = {
+            model_id: model["state"]
+            for model_id, model in reply["content"]["data"]["states"].items()
+        }
+
+        for interaction in interactions:
+            model_id = next(
+                (
+                    model_id
+                    for model_id, state in states.items()
+                    if interaction.widget(state)
+                ),
+                None,
+            )
+            if model_id is None:
+                raise ValueError(f"The app has no widget for '{interaction.name}'")
+            message = _kernel_message(
+                session,
+                "comm_msg",
+                {
+                    "comm_id": model_id,
+                    "data": {"method": "custom", "content": interaction.content},
+                },
+            )
+            start = time.perf_counter()
+            await connection.write_message(json.dumps(message))
+            await _wait_for_kernel(
+                connection,
+                lambda reply, message_id=message["header"]["msg_id"]: reply["msg_type"]
+                == "status"
+                and reply["parent_header"].get("msg_id") == message_id
+                and reply["content"]["execution_state"] == "idle",
+            )
+            latencies.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+    return latencies
+
+
+async def _voila_sessions(
+    url: str, interactions: List[WidgetMessage], sessions: int
+) -> List[List[float]]:
+    return await asyncio.gather(
+        *[_voila_session(url, interactions) for _ in range(sessions)]
+    )
+
+
+def run_voila(app: str, sessions: int, port: int) -> LoadTestResult:
+    """Load tests the Voila app by starting a Voila server and running the VOILA_INTERACTIONS in
+    concurrent sessions.
+
+    Every session loads the page, which executes the app in a new kernel. The RSS includes the
+    kernels. One session is run up front to fill the cache like the first user of a server does
+
+    Arguments:
+        app {str} -- The path to the Voila notebook
+        sessions {int} -- The number of concurrent sessions
+        port {int} -- The port of the Voila server
+
+    Returns:
+        LoadTestResult -- The measurements
+    """
+    url = f"http://127.0.0.1:{port}/"
+    command = [
+        sys.executable,
+        "-m",
+        "voila",
+        str(app),
+        "--no-browser",
+        f"--port={port}",
+        "--Voila.ip=127.0.0.1",
+    ]
+    with _server(command, url) as process:
+        asyncio.run(_voila_sessions(url, VOILA_INTERACTIONS, 1))
+
+        result = LoadTestResult("voila", sessions)
+        with RssSampler(process.pid) as sampler:
+            start = time.perf_counter()
+            latencies = asyncio.run(_voila_sessions(url, VOILA_INTERACTIONS, sessions))
+            result.seconds = time.perf_counter() - start
+        result.latencies = [latency for session in latencies for latency in session]
+        result.baseline_rss, result.peak_rss = sampler.baseline, sampler.peak
+        return result
+
+
+@task
+def streamlit(
+    command, sessions=10, app=str(STREAMLIT_APP), port=STREAMLIT_PORT
+):  # pylint: disable=unused-argument
+    """Load tests the Streamlit app with concurrent sessions selecting questions and rows
+
+    Arguments:
+        command {[type]} -- Invoke command object
+
+    Keyword Arguments:
+        sessions {int} -- The number of concurrent sessions (default: {10})
+        app {str} -- The path to the Streamlit app (default: {STREAMLIT_APP})
+        port {int} -- The port of the Streamlit server (default: {STREAMLIT_PORT})
+    """
+    print(
+        """
+Load testing the Streamlit app
+==============================
+"""
+    )
+    print(format_results([run_streamlit(app, int(sessions), int(port))]))
+
+
+@task
+def voila(
+    command, sessions=10, app=str(VOILA_APP), port=VOILA_PORT
+):  # pylint: disable=unused-argument
+    """Load tests the Voila app with concurrent sessions selecting questions and rows
+
+    Arguments:
+        command {[type]} -- Invoke command object
+
+    Keyword Arguments:
+        sessions {int} -- The number of concurrent sessions (default: {10})
+        app {str} -- The path to the Voila notebook (default: {VOILA_APP})
+        port {int} -- The port of the Voila server (default: {VOILA_PORT})
+    """
+    print(
+        """
+Load testing the Voila app
+==========================
+"""
+    )
+    print(format_results([run_voila(app, int(sessions), int(port))]))
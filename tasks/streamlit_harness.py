@@ -0,0 +1,283 @@
+"""A headless harness for running Streamlit apps without a Streamlit server or browser.
+
+The harness installs a stub 'streamlit' module, runs the app script like Streamlit does on every
+rerun and records the elements the app writes. Widgets return the values of a scripted
+interaction instead of values from a browser. For each rerun we measure
+
+- the latency, i.e. the time it takes to run the script and
+- the number of bytes the elements would emit to the frontend.
+
+The bytes are estimated from the JSON serialization of DataFrames and Plotly figures and the
+UTF-8 encoding of text. They are not exact, but they change when the payload of the app changes,
+which is what we need to compare caching and rendering changes.
+"""
+import contextlib
+import functools
+import json
+import pathlib
+import runpy
+import sys
+import threading
+import time
+import types
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+ROOT = pathlib.Path(__file__).parent.parent
+STREAMLIT_APP = ROOT / "apps/streamlit_apps/app.py"
+
+_SESSION = threading.local()
+
+
+def last_option(options: Sequence) -> Any:
+    """Widget value selecting the last option. Useful for options that depend on the data"""
+    return options[-1]
+
+
+@dataclass
+class Interaction:
+    """The widget values of one rerun. A value can be a function of the widget options"""
+
+    name: str
+    widgets: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Rerun:
+    """The measurements of one rerun"""
+
+    name: str
+    latency: float
+    elements: int
+    bytes: int
+
+
+# The interactions of a user exploring the Stack Overflow app.
+# The widget values accumulate like in the browser.
+STREAMLIT_INTERACTIONS = [
+    Interaction("initial load"),
+    Interaction("select 1 question", {"Select questions": ["Country"]}),
+    Interaction(
+        "select 3 questions",
+        {"Select questions": ["Country", "DevType", "LanguageWorkedWith"]},
+    ),
+    Interaction("show 500 answers", {"Select # Answers to show": 500}),
+    Interaction("show 5000 answers", {"Select # Answers to show": 5000}),
+    Interaction("show all answers", {"Select # Answers to show": last_option}),
+    Interaction(
+        "deselect questions",
+        {"Select questions": [], "Select # Answers to show": 10},
+    ),
+    Interaction("show all questions", {"Select # Questions to show?": last_option}),
+    Interaction("find similar respondents", {"Respondent": 2}),
+]
+
+
+def _payload_size(value: Any) -> int:
+    if hasattr(value, "to_plotly_json"):
+        value = value.to_json()
+    elif hasattr(value, "to_json"):
+        value = value.to_json(orient="split")
+    elif not isinstance(value, (str, bytes)):
+        value = json.dumps(value, default=str)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return len(value)
+
+
+class _Session:
+    """The state of one simulated browser session"""
+
+    def __init__(self):
+        self.widgets: Dict[str, Any] = {}
+        self.elements = 0
+        self.bytes = 0
+
+    def emit(self, *values: Any):
+        """Records an element written to the frontend"""
+        self.elements += 1
+        self.bytes += sum(_payload_size(value) for value in values)
+
+    def widget(
+        self, label: str, default: Any, options: Optional[Sequence] = None
+    ) -> Any:
+        """The scripted value of the widget with the given label"""
+        value = self.widgets.get(label, default)
+        if callable(value):
+            value = value(options)
+        self.emit(label, list(options) if options is not None else None, value)
+        return value
+
+
+def _session() -> _Session:
+    return _SESSION.session
+
+
+class _Container:
+    """Stub of the Streamlit main area, the sidebar and st.empty() placeholders"""
+
+    # pylint: disable=no-self-use,unused-argument
+    def multiselect(self, label, options, default=None, **kwargs):
+        """Stub of st.multiselect"""
+        return _session().widget(label, list(default or []), list(options))
+
+    def radio(self, label, options, index=0, **kwargs):
+        """Stub of st.radio"""
+        options = list(options)
+        return _session().widget(label, options[index], options)
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        """Stub of st.selectbox"""
+        options = list(options)
+        return _session().widget(label, options[index], options)
+
+    def checkbox(self, label, value=False, **kwargs):
+        """Stub of st.checkbox"""
+        return _session().widget(label, value)
+
+    def slider(self, label, min_value=0, max_value=100, value=None, **kwargs):
+        """Stub of st.slider"""
+        return _session().widget(label, min_value if value is None else value)
+
+    def number_input(self, label, min_value=None, max_value=None, value=None, **kwargs):
+        """Stub of st.number_input"""
+        return _session().widget(label, min_value if value is None else value)
+
+    def text_input(self, label, value="", **kwargs):
+        """Stub of st.text_input"""
+        return _session().widget(label, value)
+
+    def __getattr__(self, name: str) -> Callable:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        # All other elements like st.markdown, st.table and st.plotly_chart are recorded
+        def element(*args, **kwargs):
+            _session().emit(*args)
+            return _Container()
+
+        return element
+
+
+# pylint: disable=too-many-ancestors
+class _StreamlitStub(types.ModuleType, _Container):
+    """Stub of the streamlit module"""
+
+    def __init__(self):
+        super().__init__("streamlit")
+        self.sidebar = _Container()
+        self._cache: Dict[Any, Any] = {}
+        self._cache_lock = threading.Lock()
+
+    def empty(self):
+        """Stub of st.empty"""
+        return _Container()
+
+    @contextlib.contextmanager
+    def spinner(self, text=""):  # pylint: disable=unused-argument
+        """Stub of st.spinner"""
+        yield
+
+    @contextlib.contextmanager
+    def echo(self):
+        """Stub of st.echo"""
+        _session().emit("echo")
+        yield
+
+    def cache(self, func=None, **kwargs):  # pylint: disable=unused-argument
+        """Stub of st.cache. Like Streamlit the cache is shared by all sessions and survives
+        reruns"""
+        if func is None:
+            return self.cache
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__module__, func.__qualname__, repr(args), repr(kwargs))
+            with self._cache_lock:
+                if key in self._cache:
+                    return self._cache[key]
+            value = func(*args, **kwargs)
+            with self._cache_lock:
+                self._cache[key] = value
+            return value
+
+        return wrapper
+
+
+class StreamlitHarness:
+    """Runs a Streamlit app script against a stub Streamlit runtime
+
+    Example:
+
+        harness = StreamlitHarness()
+        for rerun in harness.run(STREAMLIT_INTERACTIONS):
+            print(rerun)
+    """
+
+    def __init__(self, app: pathlib.Path = STREAMLIT_APP):
+        """Runs a Streamlit app script against a stub Streamlit runtime
+
+        Keyword Arguments:
+            app {pathlib.Path} -- The path to the Streamlit app script (default: {STREAMLIT_APP})
+        """
+        self.app = pathlib.Path(app)
+        self.streamlit = _StreamlitStub()
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Context manager installing the stub streamlit module and the app folder on the path"""
+        original = sys.modules.get("streamlit")
+        sys.modules["streamlit"] = self.streamlit
+        sys.path.insert(0, str(self.app.parent))
+        try:
+            yield
+        finally:
+            sys.path.remove(str(self.app.parent))
+            if original is None:
+                del sys.modules["streamlit"]
+            else:
+                sys.modules["streamlit"] = original
+
+    def rerun(self, session: _Session, interaction: Interaction) -> Rerun:
+        """Runs the app script once with the widget values of the interaction
+
+        The stub streamlit module must be installed
+
+        Arguments:
+            session {_Session} -- The session to run in
+            interaction {Interaction} -- The widget values
+
+        Returns:
+            Rerun -- The measurements
+        """
+        session.widgets.update(interaction.widgets)
+        session.elements = session.bytes = 0
+        _SESSION.session = session
+        start = time.perf_counter()
+        runpy.run_path(str(self.app), run_name="__main__")
+        latency = time.perf_counter() - start
+        return Rerun(interaction.name, latency, session.elements, session.bytes)
+
+    def run(self, interactions: List[Interaction]) -> List[Rerun]:
+        """Runs the app script once per interaction in a new session
+
+        Arguments:
+            interactions {List[Interaction]} -- The interactions
+
+        Returns:
+            List[Rerun] -- The measurements per rerun
+        """
+        session = _Session()
+        with self.installed():
+            return [self.rerun(session, interaction) for interaction in interactions]
+
+
+def format_reruns(reruns: List[Rerun]) -> str:
+    """The reruns formatted as a table"""
+    lines = [f"{'Rerun':<25}{'Latency (ms)':>15}{'Elements':>10}{'Bytes':>15}"]
+    for rerun in reruns:
+        lines.append(
+            f"{rerun.name:<25}{rerun.latency * 1000:>15.1f}"
+            f"{rerun.elements:>10}{rerun.bytes:>15,}"
+        )
+    return "\n".join(lines)